@@ -4,9 +4,12 @@ from typing import Optional
 
 import click
 
+from . import codec
 from .config import Config
 from .core import PromptSite
 from .exceptions import PromptNotFoundError, PromptSiteError, StorageError
+from .stats import RunStats
+from .storage.search import SEARCH_SCOPES
 
 pass_promptsite = click.make_pass_decorator(PromptSite)
 
@@ -14,6 +17,10 @@ pass_promptsite = click.make_pass_decorator(PromptSite)
 def get_promptsite() -> PromptSite:
     config = Config()
     config.load_config()
+    # The CLI runs one PromptSite per process, so the configured codec is
+    # used process-wide, for run exports too
+    if "json_codec" in config.config:
+        codec.set_codec(config.config["json_codec"])
     return PromptSite(config.get_storage_backend())
 
 
@@ -176,27 +183,52 @@ def version():
 def version_list(ps: PromptSite, prompt_id: str):
     """List versions for a prompt in a tree structure"""
     try:
-        prompt = ps.get_prompt(prompt_id)
-        versions = ps.list_versions(prompt_id)
+        versions = ps.list_versions(prompt_id, exclude_runs=True)
         # Sort versions by creation timestamp
-        versions = sorted(versions.values(), key=lambda v: v.created_at)
+        versions = sorted(versions, key=lambda v: v.created_at)
 
         # Print each version with active marker for latest
         for version in versions:
-            active_marker = (
-                "*"
-                if version.version_id == prompt.get_latest_version().version_id
-                else " "
-            )
-
+            active_marker = "*" if version is versions[-1] else " "
+            stats = ps.get_run_stats(prompt_id, version.version_id)
             click.echo(
                 f"[{version.version_id[:8]}] {active_marker} "
-                f"Created: {version.created_at.strftime('%Y-%m-%d %H:%M')}"
+                f"Created: {version.created_at.strftime('%Y-%m-%d %H:%M')}  "
+                f"{_format_run_stats(stats)}"
             )
     except PromptSiteError as e:
         click.echo(f"Error: {str(e)}", err=True)
 
 
+@version.command("rebuild-stats")
+@click.argument("prompt_id", required=False)
+@pass_promptsite
+def version_rebuild_stats(ps: PromptSite, prompt_id: Optional[str]):
+    """Recompute the run statistics of versions from their runs"""
+    try:
+        count = ps.rebuild_run_stats(prompt_id)
+        click.echo(f"Rebuilt run statistics of {count} version(s)")
+    except PromptSiteError as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+def _format_run_stats(stats: RunStats) -> str:
+    """Format the run statistics of a version on one line."""
+    summary = stats.summary()
+    text = f"Runs: {summary['run_count']}"
+    if summary["execution_time_mean"] is not None:
+        text += (
+            f"  Mean: {summary['execution_time_mean']:.2f}s"
+            f"  p50: {summary['execution_time_p50']:.2f}s"
+            f"  p95: {summary['execution_time_p95']:.2f}s"
+            f"  Max: {summary['execution_time_max']:.2f}s"
+        )
+    if summary["last_run_at"]:
+        text += f"  Last run: {summary['last_run_at'][:16]}"
+    return text
+
+
 @version.command("get")
 @click.argument("prompt_id")
 @click.argument("version_id")
@@ -249,6 +281,8 @@ def list_runs(ps: PromptSite, prompt_id: str, version_id: str):
             click.echo("No runs found")
             return
 
+        click.echo(_format_run_stats(ps.get_run_stats(prompt_id, version_id)))
+        click.echo("")
         for run in runs:
             click.echo(f"Run ID: {run.run_id}")
             click.echo(f"  Created: {run.created_at.strftime('%Y-%m-%d %H:%M:%S')}")
@@ -282,10 +316,54 @@ def get_run(ps: PromptSite, prompt_id: str, version_id: str, run_id: str):
         if run.llm_config:
             click.echo("\nLLM config:")
             click.echo(json.dumps(run.llm_config, indent=2))
+        if run.validation:
+            click.echo("\nValidation:")
+            click.echo(json.dumps(run.validation, indent=2))
+        if run.dropped_rows:
+            click.echo("\nDropped rows:")
+            click.echo(json.dumps(run.dropped_rows, indent=2))
     except PromptSiteError as e:
         click.echo(f"Error: Run not found {str(e)}", err=True)
 
 
+@run.command("export")
+@click.argument("output")
+@click.option(
+    "--format",
+    "-f",
+    "export_format",
+    type=click.Choice(["parquet", "jsonl"]),
+    default="parquet",
+    help="Export format",
+)
+@click.option("--prompt-id", "-p", default=None, help="Only export runs of a prompt")
+@click.option("--version-id", "-v", default=None, help="Only export runs of a version")
+@pass_promptsite
+def export_runs(
+    ps: PromptSite,
+    output: str,
+    export_format: str,
+    prompt_id: Optional[str],
+    version_id: Optional[str],
+):
+    """Export runs to a Parquet dataset partitioned by prompt and date, or JSON lines"""
+    query = ps.runs.where(prompt_id=prompt_id, version_id=version_id)
+    try:
+        if export_format == "parquet":
+            query.to_parquet(output)
+        else:
+            with open(output, "w", encoding="utf-8") as f:
+                for row in query.iter():
+                    f.write(codec.dumps(row, default=str) + "\n")
+        click.echo(f"Exported runs to {output}")
+    except ImportError:
+        click.echo("Error: Parquet export requires pyarrow to be installed", err=True)
+        sys.exit(1)
+    except PromptSiteError as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
 @prompt.command("last-run")
 @click.argument("prompt_id")
 @pass_promptsite
@@ -308,6 +386,12 @@ def get_last_run(ps: PromptSite, prompt_id: str):
     if run.llm_config:
         click.echo("\nLLM config:")
         click.echo(json.dumps(run.llm_config, indent=2))
+    if run.validation:
+        click.echo("\nValidation:")
+        click.echo(json.dumps(run.validation, indent=2))
+    if run.dropped_rows:
+        click.echo("\nDropped rows:")
+        click.echo(json.dumps(run.dropped_rows, indent=2))
 
 
 @cli.command()
@@ -340,6 +424,84 @@ def commands():
         click.echo(f"  {cmd}")
 
 
+@cli.command("export-bundle")
+@click.argument("output")
+@click.option(
+    "--pin",
+    "-p",
+    multiple=True,
+    help="Pin a prompt to a version, formatted as PROMPT_ID=VERSION_ID",
+)
+@click.option(
+    "--format",
+    "-f",
+    "bundle_format",
+    type=click.Choice(["json", "msgpack"]),
+    default=None,
+    help="Bundle format, inferred from the file extension by default",
+)
+@pass_promptsite
+def export_bundle(ps: PromptSite, output: str, pin: tuple, bundle_format: str):
+    """Export the latest or pinned version of every prompt into a bundle file."""
+    version_ids = {}
+    for item in pin:
+        prompt_id, sep, version_id = item.partition("=")
+        if not sep or not prompt_id or not version_id:
+            click.echo(
+                f"Error: Invalid pin '{item}', use PROMPT_ID=VERSION_ID", err=True
+            )
+            sys.exit(1)
+        version_ids[prompt_id] = version_id
+
+    try:
+        ps.export_bundle(output, version_ids=version_ids, format=bundle_format)
+        click.echo(f"Exported bundle to {output}")
+    except PromptSiteError as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+
+@cli.command("search")
+@click.argument("text")
+@click.option(
+    "--scope",
+    "-s",
+    type=click.Choice(list(SEARCH_SCOPES)),
+    default="runs",
+    help="Search version contents or run prompts and outputs",
+)
+@click.option("--prompt-id", "-p", default=None, help="Only search a prompt")
+@click.option("--limit", "-n", type=int, default=20, help="Maximum number of results")
+@click.option("--rebuild", is_flag=True, help="Rebuild the search index first")
+@pass_promptsite
+def search(
+    ps: PromptSite,
+    text: str,
+    scope: str,
+    prompt_id: Optional[str],
+    limit: int,
+    rebuild: bool,
+):
+    """Search version contents or run prompts and outputs for text"""
+    try:
+        if rebuild:
+            ps.rebuild_search_index()
+        results = ps.search(text, scope=scope, prompt_id=prompt_id, limit=limit)
+    except PromptSiteError as e:
+        click.echo(f"Error: {str(e)}", err=True)
+        sys.exit(1)
+
+    if not results:
+        click.echo("No matches found")
+        return
+    for result in results:
+        header = f"{result['prompt_id']} [{result['version_id'][:8]}]"
+        if scope == "runs":
+            header += f" {result['run_id']}  {str(result['created_at'])[:16]}"
+        click.echo(header)
+        click.echo(f"  {result['snippet']}")
+
+
 @cli.command("sync-git")
 @pass_promptsite
 def sync_git(ps: PromptSite):
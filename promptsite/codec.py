@@ -0,0 +1,199 @@
+"""JSON codec used for storage formats and LLM responses.
+
+orjson is used when it is installed, the standard library otherwise. Both codecs
+write compact UTF-8 JSON, so files written by one are read by the other.
+
+Prompt text is always encoded with the standard library, so rendered prompts
+are the same whichever codec is used.
+"""
+
+import json
+import re
+from typing import Any, Callable, Optional, Union
+
+JSON_CODECS = ("auto", "orjson", "json")
+
+_CODE_FENCE = re.compile(r"```(?:json)?")
+
+
+class JsonCodec:
+    """JSON codec backed by the standard library.
+
+    Attributes:
+        name (str): The name of the codec
+    """
+
+    name = "json"
+
+    def dumps_bytes(
+        self,
+        value: Any,
+        default: Optional[Callable[[Any], Any]] = None,
+        sort_keys: bool = False,
+    ) -> bytes:
+        """Encode a value as compact UTF-8 JSON.
+
+        Args:
+            value (Any): The value to encode
+            default (Optional[Callable[[Any], Any]]): Converts values that are
+                not JSON serializable, datetimes included
+            sort_keys (bool): Whether to sort the keys of objects
+
+        Returns:
+            bytes: The JSON
+        """
+        return json.dumps(
+            value,
+            default=default,
+            sort_keys=sort_keys,
+            ensure_ascii=False,
+            separators=(",", ":"),
+        ).encode()
+
+    def dumps(
+        self,
+        value: Any,
+        default: Optional[Callable[[Any], Any]] = None,
+        sort_keys: bool = False,
+    ) -> str:
+        """Encode a value as compact JSON text.
+
+        Args:
+            value (Any): The value to encode
+            default (Optional[Callable[[Any], Any]]): Converts values that are
+                not JSON serializable, datetimes included
+            sort_keys (bool): Whether to sort the keys of objects
+
+        Returns:
+            str: The JSON
+        """
+        return self.dumps_bytes(value, default=default, sort_keys=sort_keys).decode()
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        """Decode JSON.
+
+        Args:
+            data (Union[str, bytes]): The JSON
+
+        Returns:
+            Any: The decoded value
+
+        Raises:
+            json.JSONDecodeError: If the data is not valid JSON
+        """
+        return json.loads(data)
+
+
+class OrjsonCodec(JsonCodec):
+    """JSON codec backed by orjson.
+
+    Datetimes are passed to `default` like the standard library does, and non
+    string keys are converted to strings.
+    """
+
+    name = "orjson"
+
+    def __init__(self):
+        import orjson
+
+        self._orjson = orjson
+
+    def dumps_bytes(
+        self,
+        value: Any,
+        default: Optional[Callable[[Any], Any]] = None,
+        sort_keys: bool = False,
+    ) -> bytes:
+        option = self._orjson.OPT_PASSTHROUGH_DATETIME | self._orjson.OPT_NON_STR_KEYS
+        if sort_keys:
+            option |= self._orjson.OPT_SORT_KEYS
+        return self._orjson.dumps(value, default=default, option=option)
+
+    def loads(self, data: Union[str, bytes]) -> Any:
+        # orjson.JSONDecodeError is a subclass of json.JSONDecodeError
+        return self._orjson.loads(data)
+
+
+_codec: Optional[JsonCodec] = None
+
+
+def make_codec(name: str = "auto") -> JsonCodec:
+    """Create a codec by name.
+
+    Args:
+        name (str): "orjson", "json", or "auto" for orjson when it is installed
+
+    Returns:
+        JsonCodec: The codec
+
+    Raises:
+        ValueError: If the name is not one of `JSON_CODECS`
+        ImportError: If "orjson" is requested but not installed
+    """
+    if name not in JSON_CODECS:
+        raise ValueError(
+            f"Unsupported JSON codec '{name}', expected one of {', '.join(JSON_CODECS)}"
+        )
+    if name == "json":
+        return JsonCodec()
+    try:
+        return OrjsonCodec()
+    except ImportError:
+        if name == "orjson":
+            raise
+        return JsonCodec()
+
+
+def get_codec() -> JsonCodec:
+    """Get the codec in use, orjson when it is installed unless set otherwise.
+
+    Returns:
+        JsonCodec: The codec
+    """
+    global _codec
+    if _codec is None:
+        _codec = make_codec()
+    return _codec
+
+
+def set_codec(codec: Union[str, JsonCodec]) -> None:
+    """Set the codec in use.
+
+    Args:
+        codec (Union[str, JsonCodec]): The codec or its name, see `make_codec`
+    """
+    global _codec
+    _codec = make_codec(codec) if isinstance(codec, str) else codec
+
+
+def dumps(
+    value: Any, default: Optional[Callable[[Any], Any]] = None, sort_keys: bool = False
+) -> str:
+    """Encode a value as compact JSON text with the codec in use."""
+    return get_codec().dumps(value, default=default, sort_keys=sort_keys)
+
+
+def dumps_bytes(
+    value: Any, default: Optional[Callable[[Any], Any]] = None, sort_keys: bool = False
+) -> bytes:
+    """Encode a value as compact UTF-8 JSON with the codec in use."""
+    return get_codec().dumps_bytes(value, default=default, sort_keys=sort_keys)
+
+
+def loads(data: Union[str, bytes]) -> Any:
+    """Decode JSON with the codec in use."""
+    return get_codec().loads(data)
+
+
+def strip_code_fences(text: str) -> str:
+    """Remove the Markdown code fences LLMs often wrap JSON output in.
+
+    Args:
+        text (str): The LLM output
+
+    Returns:
+        str: The output without "```json" and "```" markers
+    """
+    if "```" not in text:
+        return text
+    return _CODE_FENCE.sub("", text)
@@ -1,6 +1,6 @@
 import os
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Optional
 
 import yaml
 
@@ -93,9 +93,17 @@ class Config:
         """
 
         backend_type: str = self.config["storage_backend"]
+        max_workers: Optional[int] = self.config.get("max_workers")
+        parse_processes: Optional[int] = self.config.get("parse_processes")
+        json_codec: Optional[str] = self.config.get("json_codec")
 
         if backend_type == "file":
-            return FileStorage(base_path=self.BASE_DIRECTORY)
+            return FileStorage(
+                base_path=self.BASE_DIRECTORY,
+                max_workers=max_workers,
+                parse_processes=parse_processes,
+                json_codec=json_codec,
+            )
         elif backend_type == "git":
             branch: str = self.config.get("branch", "main")
             remote: str = self.config.get("remote")
@@ -105,6 +113,9 @@ class Config:
                 branch=branch,
                 remote=remote,
                 auto_sync=auto_sync,
+                max_workers=max_workers,
+                parse_processes=parse_processes,
+                json_codec=json_codec,
             )
 
         raise StorageBackendNotFoundError(f"Storage backend '{backend_type}' not found")
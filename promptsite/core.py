@@ -4,10 +4,19 @@ except ImportError:
     from datetime import timezone as _timezone
 
     UTC = _timezone.utc
-from typing import Any, Dict, List, Optional
+import hashlib
+import json
+import time
+import uuid
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+import pandas as pd
 
 from .config import Config
 from .exceptions import (
+    DatasetNotFoundError,
     InvalidPromptContentError,
     PromptAlreadyExistsError,
     PromptNotFoundError,
@@ -15,13 +24,58 @@ from .exceptions import (
     StorageError,
     VersionNotFoundError,
 )
+from .filters import parse_filters
+from .model.dataset import Dataset
 from .model.prompt import Prompt
 from .model.run import Run
 from .model.variable import Variable
 from .model.version import Version
 from .query import PromptQuery, Query, RunQuery, VersionQuery
+from .stats import RunStats
 from .storage import StorageBackend
+from .storage.bundle import BundleStorage, write_bundle
 from .storage.file import FileStorage
+from .storage.search import SEARCH_SCOPES
+
+if TYPE_CHECKING:
+    from .llm import LLM
+    from .model.variable import ValidationPolicy
+
+EVALUATION_COLUMNS = [
+    "item",
+    "version_id",
+    "run_id",
+    "llm_output",
+    "execution_time",
+    "error",
+]
+
+EVALUATION_CHECKPOINT_SIZE = 50
+
+
+def evaluation_run_id(
+    evaluation_id: str, version_id: str, item: int, values: Dict[str, Any]
+) -> str:
+    """Get the ID of the run of a version on an item of an evaluation.
+
+    The ID only depends on its arguments, so an evaluation that is run again
+    finds the runs it already recorded. Items whose values changed since, such
+    as edited rows of the dataset, get new IDs and are run again.
+
+    Args:
+        evaluation_id: ID of the evaluation
+        version_id: ID of the version
+        item: Position of the row or partition in the dataset
+        values: Values of the variables of the item
+
+    Returns:
+        str: The run ID
+    """
+    digest = hashlib.sha256(
+        json.dumps(values, sort_keys=True, default=str).encode()
+    ).hexdigest()
+    name = f"{evaluation_id}/{version_id}/{item}/{digest}"
+    return f"run_eval_{uuid.uuid5(uuid.NAMESPACE_URL, name).hex}"
 
 
 class PromptSite:
@@ -51,6 +105,68 @@ class PromptSite:
         else:
             self.storage = storage
 
+    @classmethod
+    def from_bundle(cls, path: str, format: Optional[str] = None) -> "PromptSite":
+        """Create a read-only PromptSite from a snapshot bundle.
+
+        The bundle is loaded with a single file read and variable models are only
+        generated when they are first needed, which keeps cold starts fast.
+
+        Args:
+            path: Path to the bundle file written by `export_bundle`
+            format: "json" or "msgpack", inferred from the file extension if not provided
+
+        Returns:
+            PromptSite: A PromptSite instance backed by the bundle
+
+        Example:
+            >>> ps = PromptSite.from_bundle("prompts.bundle.json")
+            >>> prompt = ps.get_prompt("my-prompt")
+        """
+        return cls(BundleStorage(path=path, format=format))
+
+    def export_bundle(
+        self,
+        path: str,
+        version_ids: Optional[Dict[str, str]] = None,
+        format: Optional[str] = None,
+    ) -> None:
+        """Export one pinned version of every prompt into a snapshot bundle.
+
+        Args:
+            path: Path of the bundle file to write
+            version_ids: Optional mapping of prompt IDs to the version to pin,
+                the latest version is used for prompts not in the mapping
+            format: "json" or "msgpack", inferred from the file extension if not provided
+
+        Raises:
+            PromptNotFoundError: If a pinned prompt doesn't exist
+            VersionNotFoundError: If a pinned version doesn't exist
+        """
+        version_ids = version_ids or {}
+        prompts = self.storage.list_prompts(exclude_versions=True)
+
+        missing = set(version_ids) - {prompt["id"] for prompt in prompts}
+        if missing:
+            raise PromptNotFoundError(f"Prompt '{sorted(missing)[0]}' not found.")
+
+        for prompt in prompts:
+            versions = self.storage.list_versions(prompt["id"], exclude_runs=True)
+            if prompt["id"] in version_ids:
+                versions = [
+                    v for v in versions if v["version_id"] == version_ids[prompt["id"]]
+                ]
+                if not versions:
+                    raise VersionNotFoundError(
+                        f"Version {version_ids[prompt['id']]} not found in prompt {prompt['id']}"
+                    )
+            prompt["versions"] = [
+                {k: v for k, v in version.items() if k != "runs"}
+                for version in versions[-1:]
+            ]
+
+        write_bundle(path, prompts, format=format)
+
     def register_prompt(
         self,
         prompt_id: str,
@@ -232,6 +348,8 @@ class PromptSite:
         llm_output: Optional[str] = None,
         execution_time: Optional[float] = None,
         llm_config: Optional[Dict[str, Any]] = None,
+        validation: Optional[Dict[str, str]] = None,
+        dropped_rows: Optional[Dict[str, int]] = None,
     ) -> Run:
         """Record a new execution run for a specific prompt version.
 
@@ -244,6 +362,8 @@ class PromptSite:
             llm_output: Output received from the LLM
             execution_time: Time taken for execution in seconds
             llm_config: Configuration used for the LLM call
+            validation: The validation policy applied to each variable
+            dropped_rows: The number of rows dropped for each variable with a budget
 
         Returns:
             Run: The created run object
@@ -252,24 +372,91 @@ class PromptSite:
             PromptNotFoundError: If prompt doesn't exist
             VersionNotFoundError: If version doesn't exist
         """
-        prompt = self.get_prompt(prompt_id)
-        if version_id not in prompt.versions:
-            raise VersionNotFoundError(
-                f"Version {version_id} not found in prompt {prompt_id}"
-            )
-
-        version = prompt.versions[version_id]
+        version = Version.from_dict(self._get_version_data(prompt_id, version_id))
         run = version.add_run(
             final_prompt=final_prompt,
             variables=variables,
             llm_output=llm_output,
             execution_time=execution_time,
             llm_config=llm_config,
+            validation=validation,
+            dropped_rows=dropped_rows,
         )
 
-        self.storage.update_prompt(prompt_id, prompt.to_dict())
+        self.storage.add_run(prompt_id, version_id, run.to_dict())
         return run
 
+    def _get_version_data(self, prompt_id: str, version_id: str) -> Dict[str, Any]:
+        """Get the raw data of a version without its runs.
+
+        Args:
+            prompt_id: ID of the prompt
+            version_id: ID of the version
+
+        Returns:
+            Dict[str, Any]: The version data
+
+        Raises:
+            PromptNotFoundError: If prompt doesn't exist
+            VersionNotFoundError: If version doesn't exist
+        """
+        version_data = self.storage.get_version(prompt_id, version_id)
+        if version_data is not None:
+            return version_data
+        if not self.storage.get_prompt(prompt_id, exclude_versions=True):
+            raise PromptNotFoundError(f"Prompt '{prompt_id}' not found.")
+        raise VersionNotFoundError(
+            f"Version {version_id} not found in prompt {prompt_id}"
+        )
+
+    def get_run_stats(self, prompt_id: str, version_id: str) -> RunStats:
+        """Get the run count, execution time statistics and first/last run of a version.
+
+        Storage backends that maintain the statistics as runs are added return
+        them without reading the runs.
+
+        Args:
+            prompt_id: ID of the prompt
+            version_id: ID of the version
+
+        Returns:
+            RunStats: The statistics of the runs of the version
+
+        Raises:
+            PromptNotFoundError: If prompt doesn't exist
+            VersionNotFoundError: If version doesn't exist
+        """
+        self._get_version_data(prompt_id, version_id)
+        return RunStats.from_dict(self.storage.get_run_stats(prompt_id, version_id))
+
+    def rebuild_run_stats(self, prompt_id: Optional[str] = None) -> int:
+        """Recompute the run statistics of versions from their runs.
+
+        Args:
+            prompt_id: ID of the prompt, all prompts if None
+
+        Returns:
+            int: The number of versions whose statistics were rebuilt
+
+        Raises:
+            PromptNotFoundError: If prompt doesn't exist
+        """
+        if prompt_id is None:
+            prompt_ids = [
+                p["id"] for p in self.storage.list_prompts(exclude_versions=True)
+            ]
+        elif self.storage.get_prompt(prompt_id, exclude_versions=True):
+            prompt_ids = [prompt_id]
+        else:
+            raise PromptNotFoundError(f"Prompt '{prompt_id}' not found.")
+
+        count = 0
+        for pid in prompt_ids:
+            for version in self.storage.list_versions(pid, exclude_runs=True):
+                self.storage.rebuild_run_stats(pid, version["version_id"])
+                count += 1
+        return count
+
     def get_run(self, prompt_id: str, version_id: str, run_id: str) -> Run:
         """Get a specific run of a prompt version.
 
@@ -318,6 +505,53 @@ class PromptSite:
         except Exception as e:
             raise StorageError(f"Failed to sync with git remote: {str(e)}") from e
 
+    def search(
+        self,
+        text: str,
+        scope: str = "runs",
+        prompt_id: Optional[str] = None,
+        limit: Optional[int] = 20,
+    ) -> List[Dict[str, Any]]:
+        """Search version contents or run prompts and outputs for text.
+
+        Args:
+            text: The search text, every term must match
+            scope: "versions" to search version contents, "runs" to search the
+                final prompts and LLM outputs of runs
+            prompt_id: Only search the versions or runs of this prompt
+            limit: The maximum number of results
+
+        Returns:
+            List[Dict[str, Any]]: The matches, best first, with prompt_id,
+                version_id (and run_id and created_at for runs) and a snippet of
+                the matching text
+
+        Raises:
+            ValueError: If the scope is not supported
+
+        Example:
+            >>> ps.search("rate limit", scope="runs", prompt_id="my-prompt")
+        """
+        if scope not in SEARCH_SCOPES:
+            raise ValueError(
+                f"Unsupported search scope '{scope}', "
+                f"expected one of {', '.join(SEARCH_SCOPES)}"
+            )
+        return self.storage.search(text, scope=scope, prompt_id=prompt_id, limit=limit)
+
+    def rebuild_search_index(self) -> None:
+        """Rebuild the full-text search index from the stored versions and runs.
+
+        Use this after prompt files were changed outside of PromptSite, for
+        example after pulling from a git remote.
+
+        Raises:
+            StorageError: If storage backend doesn't maintain a search index
+        """
+        if not hasattr(self.storage, "rebuild_search_index"):
+            raise StorageError("Storage backend doesn't maintain a search index")
+        self.storage.rebuild_search_index()
+
     def get_version_by_content(self, prompt_id: str, content: str) -> Optional[Version]:
         """Get a version by its content.
 
@@ -335,6 +569,309 @@ class PromptSite:
                 return version
         return None
 
+    def save_dataset(self, dataset: Dataset, format: Optional[str] = None) -> None:
+        """Save a dataset in storage, replacing the dataset with the same ID.
+
+        Relationships are saved as references to the related datasets by ID,
+        save the related datasets too so that they can be loaded.
+
+        Args:
+            dataset: The dataset to save
+            format: "arrow" (memory-mappable Arrow IPC), "parquet" or "jsonl",
+                "arrow" when pyarrow is installed and "jsonl" otherwise if None
+
+        Raises:
+            StorageError: If the storage backend doesn't store datasets
+        """
+        if dataset.table is not None:
+            rows = dataset.table
+        else:
+            rows = dataset.data if isinstance(dataset.data, list) else [dataset.data]
+        self.storage.save_dataset(dataset.id, dataset.to_dict(), rows, format=format)
+
+    def get_dataset(self, dataset_id: str) -> Dataset:
+        """Load a dataset and the datasets it is related to from storage.
+
+        Args:
+            dataset_id: ID of the dataset
+
+        Returns:
+            Dataset: The dataset, backed by a memory-mapped pyarrow Table if it was
+                saved in the "arrow" or "parquet" format
+
+        Raises:
+            DatasetNotFoundError: If the dataset or a related dataset doesn't exist
+        """
+        return self._load_dataset(dataset_id, {})
+
+    def _load_dataset(self, dataset_id: str, loaded: Dict[str, Dataset]) -> Dataset:
+        """Load a dataset, reusing the related datasets already loaded.
+
+        Args:
+            dataset_id: ID of the dataset
+            loaded: The datasets already loaded, by ID
+
+        Returns:
+            Dataset: The dataset
+        """
+        if dataset_id in loaded:
+            return loaded[dataset_id]
+
+        dataset_data = self.storage.get_dataset(dataset_id)
+        if dataset_data is None:
+            raise DatasetNotFoundError(f"Dataset '{dataset_id}' not found.")
+
+        rows = dataset_data["rows"]
+        if not dataset_data.get("is_list", True):
+            rows = (rows if isinstance(rows, list) else rows.to_pylist())[0]
+        dataset = Dataset(
+            dataset_id,
+            Variable.from_dict(dataset_data["variable"]),
+            rows,
+            description=dataset_data.get("description"),
+        )
+        loaded[dataset_id] = dataset
+
+        relationships = {
+            name: {
+                "field": mapped["field"],
+                "dataset": self._load_dataset(mapped["dataset"], loaded),
+            }
+            for name, mapped in (dataset_data.get("relationships") or {}).items()
+        }
+        dataset.relationships = relationships or None
+        return dataset
+
+    def list_datasets(self) -> List[str]:
+        """List the IDs of the datasets in storage.
+
+        Returns:
+            List[str]: The dataset IDs
+        """
+        return self.storage.list_datasets()
+
+    def delete_dataset(self, dataset_id: str) -> None:
+        """Delete a dataset from storage.
+
+        Args:
+            dataset_id: ID of the dataset
+
+        Raises:
+            DatasetNotFoundError: If the dataset doesn't exist
+        """
+        if dataset_id not in self.storage.list_datasets():
+            raise DatasetNotFoundError(f"Dataset '{dataset_id}' not found.")
+        self.storage.delete_dataset(dataset_id)
+
+    def evaluate(
+        self,
+        prompt_id: str,
+        version_ids: Optional[List[str]],
+        dataset: Dataset,
+        llm: Optional["LLM"] = None,
+        concurrency: int = 4,
+        variables: Optional[Dict[str, Any]] = None,
+        partition_variable: Optional[str] = None,
+        partition_size: Optional[int] = None,
+        validation: Optional[Union[str, "ValidationPolicy"]] = None,
+        evaluation_id: Optional[str] = None,
+        checkpoint_size: int = EVALUATION_CHECKPOINT_SIZE,
+    ) -> pd.DataFrame:
+        """Run versions of a prompt on every row or partition of a dataset.
+
+        Each row is rendered with its fields as the values of the variables of
+        the version, or each partition of rows as the value of
+        `partition_variable`. The prompts are executed by the LLM over a pool of
+        `concurrency` threads and the runs are recorded in bulk, every
+        `checkpoint_size` runs of a version.
+
+        Runs get IDs derived from the evaluation, version and item values, so
+        evaluating again resumes from the runs already recorded, after a crash
+        or for the items whose LLM call failed. Items whose values changed are
+        run again. Use another `evaluation_id` to
+        run an evaluation again from scratch.
+
+        Args:
+            prompt_id: ID of the prompt
+            version_ids: IDs of the versions to evaluate, every version if None
+            dataset: The dataset
+            llm: The LLM backend, the configured backend if None
+            concurrency: The maximum number of concurrent LLM calls
+            variables: Values of the variables that are the same for every item
+            partition_variable: The variable the rows are passed in, a row per
+                item if None
+            partition_size: The number of rows in a partition, all the rows if None
+            validation: Overrides the validation policy of every variable
+            evaluation_id: ID of the evaluation, the dataset ID if None
+            checkpoint_size: The number of runs of a version recorded at a time
+
+        Returns:
+            pd.DataFrame: The comparison of the versions, a row per item and a
+                column per field of `EVALUATION_COLUMNS` and version, e.g.
+                `results["llm_output"][version_id]`. The error is set instead
+                of the run when the item failed to render or the LLM call failed.
+
+        Raises:
+            PromptNotFoundError: If prompt doesn't exist
+            VersionNotFoundError: If a version doesn't exist
+            ValueError: If concurrency or a size is not positive, or
+                partition_size is given without partition_variable
+        """
+        if concurrency < 1 or checkpoint_size < 1:
+            raise ValueError("concurrency and checkpoint_size must be positive")
+        if partition_size is not None and partition_variable is None:
+            raise ValueError("partition_size requires a partition_variable")
+        if partition_size is not None and partition_size < 1:
+            raise ValueError("partition_size must be positive")
+
+        if version_ids is None:
+            if not self.storage.get_prompt(prompt_id, exclude_versions=True):
+                raise PromptNotFoundError(f"Prompt '{prompt_id}' not found.")
+            versions = self.list_versions(prompt_id, exclude_runs=True)
+        else:
+            versions = [
+                Version.from_dict(self._get_version_data(prompt_id, version_id))
+                for version_id in version_ids
+            ]
+        if llm is None:
+            llm = Config().get_llm_backend()
+        llm_config = getattr(llm, "config", None)
+        evaluation_id = evaluation_id or dataset.id
+
+        items = self._evaluation_items(
+            dataset, variables or {}, partition_variable, partition_size
+        )
+        run_ids = {
+            (version.version_id, item): evaluation_run_id(
+                evaluation_id, version.version_id, item, items[item]
+            )
+            for version in versions
+            for item in range(len(items))
+        }
+        recorded = {
+            run["run_id"]: run
+            for version in versions
+            for run in self.storage.query_runs(
+                filters=parse_filters(
+                    prompt_id=prompt_id,
+                    version_id=version.version_id,
+                    run_id__in=[
+                        run_ids[(version.version_id, item)]
+                        for item in range(len(items))
+                    ],
+                ),
+                columns=["run_id", "llm_output", "execution_time"],
+            )
+        }
+
+        results = {}
+        for key, run_id in run_ids.items():
+            if run_id in recorded:
+                run = recorded[run_id]
+                results[key] = (
+                    run_id,
+                    run.get("llm_output"),
+                    run.get("execution_time"),
+                    None,
+                )
+
+        def execute(version: Version, values: Dict[str, Any]) -> Run:
+            rendered = version.render(values, validation=validation)
+            start_time = time.time()
+            llm_output = llm.run(rendered.prompt)
+            return Run(
+                final_prompt=rendered.prompt,
+                variables=values,
+                llm_output=llm_output,
+                execution_time=time.time() - start_time,
+                llm_config=llm_config,
+                validation=version.validation_policies(validation),
+                dropped_rows=rendered.dropped_rows,
+            )
+
+        pending = defaultdict(list)
+
+        def record(version_id: str) -> None:
+            self.storage.add_runs(prompt_id, version_id, pending.pop(version_id, []))
+
+        with ThreadPoolExecutor(
+            max_workers=concurrency, thread_name_prefix="promptsite-evaluate"
+        ) as executor:
+            futures = {
+                executor.submit(execute, version, items[item]): (version, item)
+                for version in versions
+                for item in range(len(items))
+                if (version.version_id, item) not in results
+            }
+            try:
+                for future in as_completed(futures):
+                    version, item = futures[future]
+                    key = (version.version_id, item)
+                    try:
+                        run = future.result()
+                    # LLM backends raise their own errors, the item is retried
+                    # when the evaluation is resumed
+                    except Exception as e:
+                        results[key] = (None, None, None, str(e))
+                        continue
+                    run.run_id = run_ids[key]
+                    results[key] = (
+                        run.run_id,
+                        run.llm_output,
+                        run.execution_time,
+                        None,
+                    )
+                    pending[version.version_id].append(run.to_dict())
+                    if len(pending[version.version_id]) >= checkpoint_size:
+                        record(version.version_id)
+            finally:
+                # Keep the runs completed so far, even if the evaluation is
+                # interrupted
+                for version_id in list(pending):
+                    record(version_id)
+
+        frame = pd.DataFrame(
+            [
+                (item, version.version_id, *results[(version.version_id, item)])
+                for item in range(len(items))
+                for version in versions
+            ],
+            columns=EVALUATION_COLUMNS,
+        )
+        return frame.pivot(
+            index="item", columns="version_id", values=EVALUATION_COLUMNS[2:]
+        ).reindex(columns=[version.version_id for version in versions], level=1)
+
+    def _evaluation_items(
+        self,
+        dataset: Dataset,
+        variables: Dict[str, Any],
+        partition_variable: Optional[str],
+        partition_size: Optional[int],
+    ) -> List[Dict[str, Any]]:
+        """Get the values of the variables for each item of an evaluation.
+
+        Args:
+            dataset: The dataset
+            variables: Values of the variables that are the same for every item
+            partition_variable: The variable the rows are passed in, a row per
+                item if None
+            partition_size: The number of rows in a partition, all the rows if None
+
+        Returns:
+            List[Dict[str, Any]]: The values of the variables of each item
+        """
+        if partition_variable is None:
+            return [{**variables, **row} for row in dataset.iter_rows()]
+        if partition_size is None:
+            return [{**variables, partition_variable: dataset.data}]
+
+        rows = list(dataset.iter_rows())
+        return [
+            {**variables, partition_variable: rows[start : start + partition_size]}
+            for start in range(0, len(rows), partition_size)
+        ]
+
     # get last run of a prompt
     def get_last_run(self, prompt_id: str) -> Run:
         """Get the last run of a specific prompt.
@@ -345,15 +882,16 @@ class PromptSite:
         Returns:
             Run: The last run of the prompt
         """
-        prompt = self.get_prompt(prompt_id)
-
-        runs = []
-        for version in prompt.versions.values():
-            runs.extend(list(version.runs.values()))
-
-        if runs:
-            return sorted(runs, key=lambda x: x.created_at)[-1]
+        if not self.storage.get_prompt(prompt_id, exclude_versions=True):
+            raise PromptNotFoundError(f"Prompt '{prompt_id}' not found.")
 
+        runs = self.storage.query_runs(
+            filters=parse_filters(prompt_id=prompt_id),
+            order_by=["-created_at"],
+            limit=1,
+        )
+        for run in runs:
+            return Run.from_dict(run)
         return None
 
     @property
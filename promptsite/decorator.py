@@ -1,11 +1,12 @@
-import json
 import time
+from collections.abc import Iterator
 from functools import wraps
 from typing import Any, Callable, Dict, List, Optional
 
 from .config import Config
 from .core import PromptSite
-from .exceptions import ContentRequiredError, PromptNotFoundError
+from .exceptions import ContentRequiredError, OutputParseError, PromptNotFoundError
+from .output import OutputParser
 
 
 def tracker(
@@ -18,6 +19,7 @@ def tracker(
     llm_config: Optional[Dict] = None,
     variables: Optional[Dict] = None,
     disable_tracking: bool = False,
+    strict_output: bool = False,
 ) -> Callable:
     """
     Decorator to automatically register prompts and track their executions.
@@ -31,6 +33,9 @@ def tracker(
         ps: Optional PromptSite instance (will create new one if not provided)
         llm_config: Optional configuration dictionary for the LLM
         disable_tracking: Optional boolean to disable tracking of versions and runs
+        strict_output: Optional boolean to raise OutputParseError if the output is
+            not JSON conforming to the output variable, instead of returning it as is.
+            Streamed output (an iterator of chunks) is checked as it arrives.
     """
 
     def decorator(func: Callable) -> Callable:
@@ -78,6 +83,10 @@ def tracker(
                         prompt_content,
                         variables=prompt_variables_config,
                     )
+                elif prompt_variables_config:
+                    # The stored variables match by fingerprint, render with the
+                    # caller's so validation doesn't regenerate the stored models
+                    version.variables = prompt_variables_config
 
             except PromptNotFoundError:
                 # Register new prompt if it doesn't exist
@@ -90,11 +99,13 @@ def tracker(
                 )
                 version = prompt.get_latest_version()
 
-            prompt_content = version.build_final_prompt(
+            rendered = version.render(
                 kwargs.get("variables", {}),
                 no_instructions=kwargs.get("no_instructions", False),
                 custom_instructions=kwargs.get("custom_instructions", ""),
+                validation=kwargs.get("validation"),
             )
+            prompt_content = rendered.prompt
 
             _llm_config = kwargs.get("llm_config", llm_config)
 
@@ -104,6 +115,19 @@ def tracker(
             kwargs["llm_config"] = _llm_config
             kwargs["prompt_variables_config"] = prompt_variables_config
             response = func(*args, **kwargs)
+
+            parser = OutputParser(version.output_variable if strict_output else None)
+            stream_error = None
+            if isinstance(response, Iterator):
+                chunks = []
+                try:
+                    for chunk in response:
+                        chunks.append(chunk)
+                        if strict_output:
+                            parser.feed(chunk)
+                except OutputParseError as e:
+                    stream_error = e
+                response = "".join(chunks)
             execution_time = time.time() - start_time
 
             if not disable_tracking:
@@ -116,11 +140,17 @@ def tracker(
                     llm_output=response,
                     execution_time=execution_time,
                     llm_config=kwargs.get("llm_config", llm_config),
+                    validation=version.validation_policies(kwargs.get("validation")),
+                    dropped_rows=rendered.dropped_rows,
                 )
 
+            if stream_error is not None:
+                raise stream_error
             try:
-                return json.loads(response.replace("```json", "").replace("```", ""))
-            except json.JSONDecodeError:
+                return parser.parse(response)
+            except OutputParseError:
+                if strict_output:
+                    raise
                 return response
 
         return wrapper
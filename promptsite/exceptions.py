@@ -66,6 +66,18 @@ class VariableValidationError(PromptSiteError):
     pass
 
 
+class VariableBudgetError(PromptSiteError):
+    """Raised when a variable value doesn't fit the budget of the variable."""
+
+    pass
+
+
+class OutputParseError(PromptSiteError):
+    """Raised when the LLM output doesn't parse or conform to the output variable."""
+
+    pass
+
+
 class RunNotFoundError(PromptSiteError):
     """Raised when a run is not found."""
 
@@ -82,3 +94,15 @@ class DatasetFieldNotFoundError(PromptSiteError):
     """Raised when a field is not found in the dataset."""
 
     pass
+
+
+class DatasetGenerationError(PromptSiteError):
+    """Raised when a dataset can't be generated."""
+
+    pass
+
+
+class DatasetNotFoundError(PromptSiteError):
+    """Raised when a dataset is not found."""
+
+    pass
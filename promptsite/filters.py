@@ -0,0 +1,304 @@
+"""Predicates shared by the query API and the storage backends.
+
+Filters are written as keyword arguments in the form `field__operator=value`, for
+example `created_at__gte=datetime(2025, 1, 1)` or `tags__contains="test"`. A bare
+`field=value` is an equality check. Storage backends may evaluate some filters
+natively and use `apply_query` to evaluate the rest in memory.
+"""
+
+import heapq
+from dataclasses import dataclass
+from dataclasses import field as dataclass_field
+from datetime import datetime
+from functools import cmp_to_key
+from itertools import islice
+from typing import Any, Dict, Iterable, Iterator, List, Optional, Set, Tuple
+
+try:
+    from datetime import UTC  # type: ignore
+except ImportError:
+    from datetime import timezone as _timezone
+
+    UTC = _timezone.utc
+
+OPERATORS = ("eq", "ne", "gt", "gte", "lt", "lte", "in", "contains", "isnull")
+
+DATETIME_FIELDS = ("created_at", "run_at")
+
+
+def _to_datetime(value: Any) -> Any:
+    """Convert an ISO formatted string to a timezone aware datetime.
+
+    Args:
+        value (Any): The value to convert
+
+    Returns:
+        Any: A UTC aware datetime if the value is a datetime or ISO string,
+            the value unchanged otherwise
+    """
+    if isinstance(value, str):
+        try:
+            value = datetime.fromisoformat(value.replace("Z", "+00:00"))
+        except ValueError:
+            return value
+    if isinstance(value, datetime) and value.tzinfo is None:
+        value = value.replace(tzinfo=UTC)
+    return value
+
+
+def normalize(field: str, value: Any) -> Any:
+    """Normalize a field value so that it can be compared and sorted.
+
+    Args:
+        field (str): The name of the field
+        value (Any): The value of the field
+
+    Returns:
+        Any: The normalized value
+    """
+    if field in DATETIME_FIELDS or isinstance(value, datetime):
+        return _to_datetime(value)
+    return value
+
+
+@dataclass(frozen=True)
+class Filter:
+    """A single predicate on a field of a record.
+
+    Attributes:
+        field (str): The name of the field
+        op (str): The operator, one of `OPERATORS`
+        value (Any): The value to compare the field with
+    """
+
+    field: str
+    op: str
+    value: Any
+    _expected: Any = dataclass_field(init=False, repr=False, compare=False)
+
+    def __post_init__(self) -> None:
+        """Normalize the value once instead of for every record."""
+        if self.op == "in":
+            expected = [normalize(self.field, v) for v in self.value]
+        elif self.op in ("isnull", "contains"):
+            expected = self.value
+        else:
+            expected = normalize(self.field, self.value)
+        object.__setattr__(self, "_expected", expected)
+
+    def matches(self, record: Dict[str, Any]) -> bool:
+        """Check whether a record satisfies the predicate.
+
+        Args:
+            record (Dict[str, Any]): The record to check
+
+        Returns:
+            bool: True if the record satisfies the predicate, False otherwise
+        """
+        actual = normalize(self.field, record.get(self.field))
+        expected = self._expected
+
+        if self.op == "isnull":
+            return (actual is None) == bool(expected)
+        if self.op == "in":
+            return actual in expected
+        if self.op == "contains":
+            return actual is not None and expected in actual
+
+        if self.op == "eq":
+            return actual == expected
+        if self.op == "ne":
+            return actual != expected
+        if actual is None:
+            return False
+
+        try:
+            if self.op == "gt":
+                return actual > expected
+            if self.op == "gte":
+                return actual >= expected
+            if self.op == "lt":
+                return actual < expected
+            return actual <= expected
+        except TypeError:
+            return False
+
+
+def parse_filters(**kwargs) -> List[Filter]:
+    """Parse `field__operator=value` keyword arguments into filters.
+
+    Args:
+        **kwargs: The filters, `field=value` means equality
+
+    Returns:
+        List[Filter]: The parsed filters
+
+    Raises:
+        ValueError: If an operator is not supported
+    """
+    filters = []
+    for key, value in kwargs.items():
+        field, _, op = key.partition("__")
+        op = op or "eq"
+        if op not in OPERATORS:
+            raise ValueError(
+                f"Unsupported operator '{op}' in filter '{key}', "
+                f"expected one of {', '.join(OPERATORS)}"
+            )
+        filters.append(Filter(field, op, value))
+    return filters
+
+
+def parse_order_by(fields: Iterable[str]) -> List[Tuple[str, bool]]:
+    """Parse order by fields, a leading "-" means descending.
+
+    Args:
+        fields (Iterable[str]): The fields to order by
+
+    Returns:
+        List[Tuple[str, bool]]: Pairs of field name and whether it is descending
+    """
+    return [(f[1:], True) if f.startswith("-") else (f, False) for f in fields]
+
+
+def scope_values(filters: Iterable[Filter], field: str) -> Optional[Set[Any]]:
+    """Get the values a field is restricted to by equality or `in` filters.
+
+    Storage backends use this to only read the prompts, versions or runs that
+    can possibly match instead of scanning everything.
+
+    Args:
+        filters (Iterable[Filter]): The filters of the query
+        field (str): The name of the field
+
+    Returns:
+        Optional[Set[Any]]: The allowed values, or None if the field is unrestricted
+    """
+    allowed = None
+    for f in filters:
+        if f.field != field or f.op not in ("eq", "in"):
+            continue
+        try:
+            values = {f.value} if f.op == "eq" else set(f.value)
+        except TypeError:
+            # Unhashable values can't scope a read, the filter is still applied
+            continue
+        allowed = values if allowed is None else allowed & values
+    return allowed
+
+
+def range_bounds(
+    filters: Iterable[Filter], field: str
+) -> Tuple[Optional[Any], Optional[Any]]:
+    """Get the inclusive bounds a field is restricted to by comparison filters.
+
+    Exclusive bounds are treated as inclusive, so the bounds select a superset
+    of the matching records and the filters still have to be applied.
+
+    Args:
+        filters (Iterable[Filter]): The filters of the query
+        field (str): The name of the field
+
+    Returns:
+        Tuple[Optional[Any], Optional[Any]]: The normalized lower and upper
+            bounds, None if the field is unbounded on that side
+    """
+    lower = upper = None
+    for f in filters:
+        if f.field != field:
+            continue
+        value = normalize(field, f.value)
+        if f.op in ("gt", "gte", "eq"):
+            lower = value if lower is None else max(lower, value)
+        if f.op in ("lt", "lte", "eq"):
+            upper = value if upper is None else min(upper, value)
+    return lower, upper
+
+
+def required_fields(
+    filters: Optional[List[Filter]] = None, order_by: Optional[List[str]] = None
+) -> Set[str]:
+    """Get the fields a query needs to evaluate its filters and ordering.
+
+    Args:
+        filters (Optional[List[Filter]]): The filters of the query
+        order_by (Optional[List[str]]): The fields to order by
+
+    Returns:
+        Set[str]: The names of the fields
+    """
+    fields = {f.field for f in filters or []}
+    fields.update(field for field, _ in parse_order_by(order_by or []))
+    return fields
+
+
+def project(
+    records: Iterable[Dict[str, Any]], columns: Optional[List[str]] = None
+) -> Iterator[Dict[str, Any]]:
+    """Keep only the given columns of each record.
+
+    Args:
+        records (Iterable[Dict[str, Any]]): The records to project
+        columns (Optional[List[str]]): The columns to keep, all columns if None
+
+    Returns:
+        Iterator[Dict[str, Any]]: The projected records
+    """
+    if columns is None:
+        return iter(records)
+    return ({c: r[c] for c in columns if c in r} for r in records)
+
+
+def _compare(
+    order_by: List[Tuple[str, bool]], a: Dict[str, Any], b: Dict[str, Any]
+) -> int:
+    """Compare two records by the order by fields, None values go last."""
+    for field, descending in order_by:
+        x, y = normalize(field, a.get(field)), normalize(field, b.get(field))
+        if x == y:
+            continue
+        if x is None:
+            return 1
+        if y is None:
+            return -1
+        result = -1 if x < y else 1
+        return -result if descending else result
+    return 0
+
+
+def apply_query(
+    records: Iterable[Dict[str, Any]],
+    filters: Optional[List[Filter]] = None,
+    order_by: Optional[List[str]] = None,
+    limit: Optional[int] = None,
+    offset: int = 0,
+) -> Iterator[Dict[str, Any]]:
+    """Filter, order and slice records in memory.
+
+    Records are consumed lazily. Without ordering, iteration stops as soon as
+    enough records are found. With ordering and a limit, only the top records
+    are kept in memory.
+
+    Args:
+        records (Iterable[Dict[str, Any]]): The records to query
+        filters (Optional[List[Filter]]): The filters to apply
+        order_by (Optional[List[str]]): The fields to order by
+        limit (Optional[int]): The maximum number of records to return
+        offset (int): The number of records to skip
+
+    Returns:
+        Iterator[Dict[str, Any]]: The matching records
+    """
+    filters = filters or []
+    matched = (r for r in records if all(f.matches(r) for f in filters))
+
+    if order_by:
+        ordering = parse_order_by(order_by)
+        key = cmp_to_key(lambda a, b: _compare(ordering, a, b))
+        if limit is not None:
+            matched = iter(heapq.nsmallest(offset + limit, matched, key=key))
+        else:
+            matched = iter(sorted(matched, key=key))
+
+    stop = None if limit is None else offset + limit
+    return islice(matched, offset, stop)
@@ -1,24 +1,120 @@
-from typing import TYPE_CHECKING, Any, Callable, Dict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Callable,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import pandas as pd
 
 if TYPE_CHECKING:
-    from promptsite.model.variable import Variable
+    import pyarrow as pa
+
+    from promptsite.llm import LLM
+    from promptsite.model.variable import ValidationPolicy, Variable
 import json
+import random
 
 from jinja2 import Template
+from pydantic import BaseModel, ValidationError
 
+from promptsite import codec
 from promptsite.config import Config
-from promptsite.exceptions import DatasetFieldNotFoundError
+from promptsite.exceptions import DatasetFieldNotFoundError, DatasetGenerationError
+from promptsite.model.frame import (
+    errors_frame,
+    needs_row_validation,
+    validate_frame,
+    validate_rows,
+)
+from promptsite.storage.dataset import rows_to_table
+
+PREVIEW_ROWS = 3
+
+
+def _is_arrow_table(value: Any) -> bool:
+    """Check whether a value is a pyarrow Table without importing pyarrow."""
+    return type(value).__module__.startswith("pyarrow") and hasattr(value, "num_rows")
+
+
+def _parse_rows(
+    response: str, model: BaseModel, related_keys: Dict[str, Set[Any]]
+) -> List[Dict[str, Any]]:
+    """Parse the rows of a generated batch, dropping the rows that are not valid.
+
+    Args:
+        response (str): The LLM output
+        model (BaseModel): The model of a row
+        related_keys (Dict[str, Set[Any]]): The values allowed by the
+            relationships, by field
+
+    Returns:
+        List[Dict[str, Any]]: The rows conforming to the model
+
+    Raises:
+        json.JSONDecodeError: If the output is not valid JSON
+        ValueError: If the output is not a list
+    """
+    data = codec.loads(codec.strip_code_fences(response.strip()))
+    if not isinstance(data, list):
+        raise ValueError("The generated batch is not a list")
+
+    rows = []
+    for row in data:
+        try:
+            model.model_validate(row)
+        except ValidationError:
+            continue
+        if _has_related_keys(row, related_keys):
+            rows.append(row)
+    return rows
+
+
+def _related_keys(relationships: Optional[Dict[str, Any]]) -> Dict[str, Set[Any]]:
+    """Get the values allowed by relationships.
+
+    Args:
+        relationships (Optional[Dict[str, Any]]): The relationships with other
+            datasets
+
+    Returns:
+        Dict[str, Set[Any]]: The key values of the related datasets, by field
+    """
+    return {
+        name: set(mapped["dataset"].key_values(mapped["field"]))
+        for name, mapped in (relationships or {}).items()
+    }
+
+
+def _has_related_keys(row: Any, related_keys: Dict[str, Set[Any]]) -> bool:
+    """Check whether the related fields of a row are in the related datasets."""
+    if not related_keys:
+        return True
+    return isinstance(row, dict) and all(
+        row.get(name) in keys for name, keys in related_keys.items()
+    )
 
 
 class Dataset:
     """Class for dataset model.
 
+    The data of a dataset loaded from storage is backed by a memory-mapped
+    pyarrow Table. Rows are only converted to Python objects when `data` is
+    first accessed, and `iter_rows` reads them a batch at a time.
+
     Args:
         id: The id of the dataset.
         variable: The Variable object of the dataset.
-        data: The actual data of the dataset.
+        data: The actual data of the dataset, a pyarrow Table for array datasets.
         description: The description of the dataset.
         relationships: The relationships with other datasets.
 
@@ -77,6 +173,46 @@ class Dataset:
         self.description = description
         self.relationships = relationships
 
+    @property
+    def data(self) -> Any:
+        """The rows of the dataset, converted from its pyarrow Table on first access."""
+        if self._data is None and self._table is not None:
+            self._data = self._table.to_pylist()
+        return self._data
+
+    @data.setter
+    def data(self, data: Any) -> None:
+        self._table = data if _is_arrow_table(data) else None
+        self._data = None if self._table is not None else data
+        self._df = None
+
+    @property
+    def table(self) -> Optional["pa.Table"]:
+        """The pyarrow Table backing the dataset, None if the data is in memory."""
+        return self._table
+
+    def __len__(self) -> int:
+        """Get the number of rows of the dataset."""
+        if self._table is not None:
+            return self._table.num_rows
+        return len(self._data) if isinstance(self._data, list) else 1
+
+    def iter_rows(self, batch_size: int = 1000) -> Iterator[Any]:
+        """Iterate over the rows without converting them all at once.
+
+        Args:
+            batch_size: The number of rows converted at a time from the pyarrow
+                Table backing the dataset.
+
+        Returns:
+            Iterator[Any]: The rows
+        """
+        if self._table is None or self._data is not None:
+            yield from self.data if isinstance(self.data, list) else [self.data]
+            return
+        for batch in self._table.to_batches(max_chunksize=batch_size):
+            yield from batch.to_pylist()
+
     def __getitem__(self, field: str):
         """Get an metadata of a field from the dataset when defining the relationships."""
         if field not in self.variable.model.model_fields:
@@ -85,6 +221,101 @@ class Dataset:
             )
         return {"field": field, "dataset": self}
 
+    def key_values(self, field: str) -> List[Any]:
+        """Get the distinct values of a field, in the order of the rows.
+
+        Args:
+            field: The name of the field.
+
+        Returns:
+            List[Any]: The values of the field
+        """
+        if self._data is None and self._table is not None:
+            if field not in self._table.column_names:
+                return [None] if len(self) else []
+            return self._table.column(field).unique().to_pylist()
+        rows = self.data if isinstance(self.data, list) else [self.data]
+        return list(
+            dict.fromkeys(row.get(field) for row in rows if isinstance(row, dict))
+        )
+
+    def sample_rows(self, n: int, seed: int = 0) -> List[Any]:
+        """Get a reproducible sample of the rows, in the order of the rows.
+
+        Args:
+            n: The number of rows.
+            seed: The seed of the sample.
+
+        Returns:
+            List[Any]: The sampled rows, all rows if there are no more than n
+        """
+        if len(self) <= n:
+            return list(self.iter_rows())
+        indexes = sorted(random.Random(seed).sample(range(len(self)), n))
+        if self._data is None and self._table is not None:
+            return self._table.take(indexes).to_pylist()
+        return [self.data[i] for i in indexes]
+
+    def check_relationships(self) -> Dict[str, List[int]]:
+        """Find the rows whose related fields are not in the related datasets.
+
+        Returns:
+            Dict[str, List[int]]: The indexes of the invalid rows, by field, for
+                the fields with invalid rows
+        """
+        if not self.relationships:
+            return {}
+        return self._invalid_relationships(self._rows_frame())
+
+    def _has_object_rows(self) -> bool:
+        """Check whether every row is an object, so that fields are frame columns."""
+        if self._data is None and self._table is not None:
+            return True
+        rows = self._data if isinstance(self._data, list) else [self._data]
+        return all(isinstance(row, dict) for row in rows)
+
+    def _rows_frame(self, indexes: Optional[List[int]] = None) -> pd.DataFrame:
+        """Get rows as a DataFrame indexed by row number.
+
+        Args:
+            indexes: The rows to get, all rows if None.
+
+        Returns:
+            pd.DataFrame: The rows, rows that are not objects have no values
+        """
+        if self._has_object_rows():
+            frame = self.to_df()
+            if indexes is None or len(indexes) == len(frame):
+                return frame
+            return frame.iloc[indexes]
+
+        rows = self._data if isinstance(self._data, list) else [self._data]
+        indexes = range(len(rows)) if indexes is None else indexes
+        return pd.DataFrame(
+            [rows[i] if isinstance(rows[i], dict) else {} for i in indexes],
+            index=list(indexes),
+        )
+
+    def _invalid_relationships(self, frame: pd.DataFrame) -> Dict[str, List[Any]]:
+        """Find the rows of a frame whose related fields are not in the related datasets.
+
+        Args:
+            frame: The rows of the dataset, indexed by row number.
+
+        Returns:
+            Dict[str, List[Any]]: The invalid rows, by field
+        """
+        invalid = {}
+        for name, mapped in (self.relationships or {}).items():
+            keys = mapped["dataset"].key_values(mapped["field"])
+            if name in frame.columns:
+                rows = frame.index[~frame[name].isin(keys)].tolist()
+            else:
+                rows = frame.index.tolist()
+            if rows:
+                invalid[name] = rows
+        return invalid
+
     @classmethod
     def generate(
         cls,
@@ -93,19 +324,153 @@ class Dataset:
         description: str = None,
         relationships: Dict[str, Callable] = None,
         num_rows: int = None,
+        batch_size: Optional[int] = None,
+        max_workers: int = 4,
+        max_retries: int = 2,
+        preview_rows: int = PREVIEW_ROWS,
     ) -> "Dataset":
         """Generate the dataset.
 
+        The prompt includes the related key columns of the related datasets and
+        a sample of their rows. Generated rows whose related fields are not in
+        the related datasets are dropped.
+
+        When `batch_size` is set and an array of more than `batch_size` rows is
+        requested, the rows are generated in batches of `batch_size` by
+        concurrent LLM calls. Rows that don't conform to the variable model and
+        duplicate rows are dropped, and the missing rows are requested again, up
+        to `max_retries` times.
+
         Args:
             id: The id of the dataset.
             variable: The Variable object of the dataset.
             description: The description of the dataset.
             relationships: The relationships with other datasets.
             num_rows: The number of rows to generate.
+            batch_size: The number of rows requested by each LLM call, all rows
+                are requested at once if None.
+            max_workers: The maximum number of concurrent LLM calls.
+            max_retries: The number of times missing rows are requested again.
+            preview_rows: The number of rows of each related dataset included in
+                the prompt.
+
+        Returns:
+            Dataset: The generated dataset, with fewer than `num_rows` rows if
+                batches still fail after the retries.
+
+        Raises:
+            DatasetGenerationError: If no valid rows are generated in batches.
+        """
+        from promptsite.model.variable import ArrayVariable
+
+        llm = Config().get_llm_backend()
+        extra_datasets = cls._extra_datasets(relationships, preview_rows)
+        related_keys = _related_keys(relationships)
+
+        if (
+            batch_size
+            and num_rows
+            and num_rows > batch_size
+            and isinstance(variable, ArrayVariable)
+        ):
+            data = cls._generate_batches(
+                llm,
+                variable,
+                description,
+                relationships,
+                extra_datasets,
+                related_keys,
+                num_rows,
+                batch_size,
+                max_workers,
+                max_retries,
+            )
+        else:
+            prompt = cls._generation_prompt(
+                variable, description, relationships, extra_datasets, num_rows
+            )
+            response = llm.run(prompt)
+
+            try:
+                data = codec.loads(codec.strip_code_fences(response.strip()))
+            except json.JSONDecodeError:
+                data = response
+
+            if related_keys and isinstance(data, list):
+                data = [row for row in data if _has_related_keys(row, related_keys)]
+
+        return Dataset(
+            id, variable, data, description=description, relationships=relationships
+        )
+
+    @staticmethod
+    def _extra_datasets(
+        relationships: Optional[Dict[str, Any]], preview_rows: int
+    ) -> Optional[List[Dict[str, str]]]:
+        """Get the context of the related datasets included in the prompt.
+
+        Args:
+            relationships: The relationships with other datasets.
+            preview_rows: The number of rows of each related dataset to include.
+
+        Returns:
+            Optional[List[Dict[str, str]]]: The id, schema, related key values and
+                sampled rows of each related dataset, None without relationships
+        """
+        if not relationships:
+            return None
+
+        key_fields: Dict[int, List[str]] = {}
+        datasets: Dict[int, Dataset] = {}
+        for mapped in relationships.values():
+            datasets[id(mapped["dataset"])] = mapped["dataset"]
+            key_fields.setdefault(id(mapped["dataset"]), []).append(mapped["field"])
+
+        extra_datasets = []
+        for key, dataset in datasets.items():
+            keys = {
+                name: dataset.key_values(name)
+                for name in dict.fromkeys(key_fields[key])
+            }
+            extra_datasets.append(
+                {
+                    "id": dataset.id,
+                    "schema": dataset.variable.model.model_json_schema(),
+                    "key_values": json.dumps(keys, default=str),
+                    "preview": json.dumps(
+                        dataset.sample_rows(preview_rows), default=str
+                    ),
+                }
+            )
+        return extra_datasets
+
+    @staticmethod
+    def _generation_prompt(
+        variable: "Variable",
+        description: Optional[str],
+        relationships: Optional[Dict[str, Callable]],
+        extra_datasets: Optional[List[Dict[str, str]]],
+        num_rows: Optional[int],
+        batch: Optional[Tuple[int, int]] = None,
+    ) -> str:
+        """Render the prompt generating the dataset.
+
+        Args:
+            variable: The Variable object of the dataset.
+            description: The description of the dataset.
+            relationships: The relationships with other datasets.
+            extra_datasets: The context of the related datasets, see
+                `_extra_datasets`.
+            num_rows: The number of rows to generate.
+            batch: The number of the batch and the number of batches, if the
+                rows are generated in batches.
+
+        Returns:
+            str: The prompt
         """
         from promptsite.model.variable import ArrayVariable
 
-        prompt = Template(
+        return Template(
             """You are a data expert who can generates data that satisfies the{% if description %} DATA DESCRIPTION,{% endif %} the DATA REQUIREMENT and the OUTPUT SCHEMA{% if extra_datasets %}, given the EXTRA DATASETS{% endif %}.
 
 {% if description %}
@@ -118,14 +483,17 @@ EXTRA DATASETS:
 {% for dataset in extra_datasets %}
 - DATASET "{{ dataset.id }}":
     * SCHEMA:
-    {{ dataset.variable.model.model_json_schema() }}
-    * DATASET:
-    {{ dataset.data }}
+    {{ dataset.schema }}
+    * KEYS:
+    {{ dataset.key_values }}
+    * PREVIEW:
+    {{ dataset.preview }}
 {% endfor %}
 {% endif %}
 
 DATA REQUIREMENT: 
-{{ requirement }}
+{{ requirement }}{% if batch %}
+- This is batch {{ batch[0] }} of {{ batch[1] }}, generate rows that are different from the other batches{% endif %}
 {% if relationships %}
 {% for field, mapped in relationships.items() %}
 - Make sure "{{ field }}" field matches "{{ mapped.field }}" field in the DATASET "{{ mapped.dataset.id }}"
@@ -151,47 +519,423 @@ Here is an example of the output:
 """
         ).render(
             requirement=description,
-            extra_datasets=set(
-                [relationship["dataset"] for relationship in relationships.values()]
-            )
-            if relationships
-            else None,
+            extra_datasets=extra_datasets,
             relationships=relationships,
             description=variable.description,
             json_instructions=f"a list of {num_rows or ''} JSON instances"
             if isinstance(variable, ArrayVariable)
             else "a JSON instance",
             schema=json.dumps(variable.model.model_json_schema()),
+            batch=batch,
         )
 
-        config = Config()
-        llm = config.get_llm_backend()
-        response = llm.run(prompt)
+    @classmethod
+    def _generate_batches(
+        cls,
+        llm: "LLM",
+        variable: "Variable",
+        description: Optional[str],
+        relationships: Optional[Dict[str, Callable]],
+        extra_datasets: Optional[List[Dict[str, str]]],
+        related_keys: Dict[str, Set[Any]],
+        num_rows: int,
+        batch_size: int,
+        max_workers: int,
+        max_retries: int,
+    ) -> List[Dict[str, Any]]:
+        """Generate the rows of an array dataset in concurrent batches.
 
-        try:
-            data = json.loads(
-                response.strip().replace("```json", "").replace("```", "")
-            )
-        except json.JSONDecodeError:
-            data = response
+        Returns:
+            List[Dict[str, Any]]: The valid, distinct rows in batch order
+
+        Raises:
+            DatasetGenerationError: If no valid rows are generated
+        """
+        rows: List[Dict[str, Any]] = []
+        seen = set()
+        error = None
+
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="promptsite-generate"
+        ) as executor:
+            for _ in range(max_retries + 1):
+                missing = num_rows - len(rows)
+                sizes = [batch_size] * (missing // batch_size)
+                if missing % batch_size:
+                    sizes.append(missing % batch_size)
+                futures = [
+                    executor.submit(
+                        llm.run,
+                        cls._generation_prompt(
+                            variable,
+                            description,
+                            relationships,
+                            extra_datasets,
+                            size,
+                            batch=(i + 1, len(sizes)),
+                        ),
+                    )
+                    for i, size in enumerate(sizes)
+                ]
+                for future in futures:
+                    try:
+                        batch_rows = _parse_rows(
+                            future.result(), variable.model, related_keys
+                        )
+                    # LLM backends raise their own errors, retry the batch on any
+                    except Exception as e:
+                        error = e
+                        continue
+                    for row in batch_rows:
+                        key = codec.dumps(row, sort_keys=True)
+                        if key not in seen:
+                            seen.add(key)
+                            rows.append(row)
+                if len(rows) >= num_rows:
+                    break
 
-        return Dataset(id, variable, data, description=description)
+        if not rows:
+            raise DatasetGenerationError(
+                f"No valid rows were generated in {max_retries + 1} attempts"
+            ) from error
+        return rows[:num_rows]
 
     def to_df(self) -> pd.DataFrame:
         """Convert the dataset to a pandas DataFrame.
 
+        The DataFrame of a dataset backed by a pyarrow Table is converted once
+        and cached until its rows are accessed through `data`, which can be
+        modified. Copy the DataFrame before modifying it.
+
         Returns:
             pd.DataFrame: The pandas DataFrame of the dataset.
         """
+        if self._data is None and self._table is not None:
+            if self._df is None:
+                self._df = self._table.to_pandas()
+            return self._df
         if isinstance(self.data, list):
             return pd.DataFrame(self.data)
-        else:
-            return pd.DataFrame([self.data])
+        return pd.DataFrame([self.data])
+
+    def to_arrow(self) -> "pa.Table":
+        """Convert the dataset to a pyarrow Table.
+
+        Requires `pyarrow` to be installed.
+
+        Returns:
+            pa.Table: The pyarrow Table of the dataset.
+        """
+        if self._table is not None:
+            return self._table
+
+        return rows_to_table(self.data if isinstance(self.data, list) else [self.data])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the dataset metadata to a dictionary, without the rows.
+
+        Returns:
+            Dict[str, Any]: The id, description, variable, relationships by
+                dataset id and number of rows of the dataset
+        """
+        return {
+            "id": self.id,
+            "description": self.description,
+            "variable": self.variable.to_dict(),
+            "relationships": {
+                name: {"dataset": mapped["dataset"].id, "field": mapped["field"]}
+                for name, mapped in self.relationships.items()
+            }
+            if self.relationships
+            else None,
+            "num_rows": len(self),
+            "is_list": self._table is not None or isinstance(self._data, list),
+        }
 
-    def validate(self) -> bool:
+    def validate(self, policy: Optional[Union[str, "ValidationPolicy"]] = None) -> bool:
         """Validate the dataset.
 
+        Args:
+            policy: Overrides the validation policy of the variable, such as "sample(100)".
+
+        Returns:
+            bool: True if the dataset is valid according to the variable model and
+                its relationships, False otherwise.
+        """
+        return self.validation_errors(policy).empty
+
+    def validation_errors(
+        self, policy: Optional[Union[str, "ValidationPolicy"]] = None
+    ) -> pd.DataFrame:
+        """Validate the dataset and report the invalid rows.
+
+        The columns of the DataFrame of the dataset are checked in bulk, and only
+        the values of nested fields are validated by pydantic. Models with
+        validators, strict mode or forbidden extra fields are validated a row at
+        a time by pydantic. Related fields are checked against the key values of
+        the related datasets.
+
+        Args:
+            policy: Overrides the validation policy of the variable, such as "sample(100)".
+
+        Returns:
+            pd.DataFrame: One row per invalid row and field, with the "row" number,
+                the "field" and the "error", empty if the dataset is valid.
+        """
+        from promptsite.model.variable import ValidationPolicy
+
+        if policy is None:
+            policy = self.variable.validation_policy
+        policy = ValidationPolicy.parse(policy)
+        if policy.mode == "off":
+            return errors_frame([])
+
+        model = self.variable.model
+        if self._table is None and not isinstance(self._data, list):
+            errors = validate_rows([self._data], model)
+            if not isinstance(self._data, dict):
+                return errors
+            frame = self.to_df()
+        else:
+            indexes = policy.select(list(range(len(self))))
+            frame = self._rows_frame(indexes)
+            if needs_row_validation(model) or not self._has_object_rows():
+                errors = validate_rows([self.data[i] for i in indexes], model, indexes)
+            else:
+                errors = validate_frame(frame, model)
+
+        errors = list(errors.itertuples(index=False, name=None))
+        for name, rows in self._invalid_relationships(frame).items():
+            mapped = self.relationships[name]
+            message = f"Not in {mapped['dataset'].id}.{mapped['field']}"
+            errors.extend((row, name, message) for row in rows)
+        return errors_frame(errors)
+
+
+@dataclass
+class DatasetSpec:
+    """Specification of a dataset generated by a `DatasetGraph`.
+
+    Attributes:
+        id (str): The id of the dataset
+        variable (Variable): The Variable object of the dataset
+        description (Optional[str]): The description of the dataset
+        relationships (Dict[str, Any]): The relationships with other datasets, by
+            field. A relationship is either "dataset_id.field" for a dataset of the
+            graph, or `dataset[field]` for a dataset that already exists
+        num_rows (Optional[int]): The number of rows to generate
+        options (Dict[str, Any]): Other arguments of `Dataset.generate`, such as
+            `batch_size`
+    """
+
+    id: str
+    variable: "Variable"
+    description: Optional[str] = None
+    relationships: Dict[str, Any] = field(default_factory=dict)
+    num_rows: Optional[int] = None
+    options: Dict[str, Any] = field(default_factory=dict)
+
+    def references(self) -> Dict[str, Tuple[str, str]]:
+        """Get the relationships with datasets of the graph.
+
+        Returns:
+            Dict[str, Tuple[str, str]]: Pairs of dataset id and field, by field
+
+        Raises:
+            ValueError: If a relationship is not in the form "dataset_id.field"
+        """
+        references = {}
+        for name, mapped in self.relationships.items():
+            if not isinstance(mapped, str):
+                continue
+            dataset_id, _, mapped_field = mapped.rpartition(".")
+            if not dataset_id or not mapped_field:
+                raise ValueError(
+                    f"Invalid relationship '{mapped}' for '{self.id}.{name}', "
+                    "expected 'dataset_id.field'"
+                )
+            references[name] = (dataset_id, mapped_field)
+        return references
+
+    def parents(self) -> Set[str]:
+        """Get the ids of the datasets of the graph this dataset depends on.
+
+        Returns:
+            Set[str]: The dataset ids
+        """
+        return {dataset_id for dataset_id, _ in self.references().values()}
+
+
+class DatasetGraph:
+    """Related datasets generated in the order of their relationships.
+
+    Datasets are generated as soon as the datasets they depend on are generated,
+    so independent datasets are generated concurrently. The prompt of a dataset
+    only includes the key columns of the datasets it depends on, not their
+    full data.
+
+    Attributes:
+        specs (Dict[str, DatasetSpec]): The specifications of the datasets, by id
+
+    Example:
+        >>> graph = DatasetGraph()
+        >>> graph.add("customers", ArrayVariable(model=Customer), num_rows=100)
+        >>> graph.add(
+        ...     "orders",
+        ...     ArrayVariable(model=Order),
+        ...     relationships={"customer_id": "customers.id"},
+        ...     num_rows=500,
+        ... )
+        >>> datasets = graph.generate_all()
+        >>> datasets["orders"].to_df()
+    """
+
+    def __init__(self, specs: Optional[Iterable[DatasetSpec]] = None):
+        self.specs: Dict[str, DatasetSpec] = {}
+        for spec in specs or []:
+            self._add_spec(spec)
+
+    def add(
+        self,
+        id: str,
+        variable: "Variable",
+        description: Optional[str] = None,
+        relationships: Optional[Dict[str, Any]] = None,
+        num_rows: Optional[int] = None,
+        **options,
+    ) -> DatasetSpec:
+        """Add a dataset to the graph.
+
+        Args:
+            id: The id of the dataset.
+            variable: The Variable object of the dataset.
+            description: The description of the dataset.
+            relationships: The relationships with other datasets, see `DatasetSpec`.
+            num_rows: The number of rows to generate.
+            **options: Other arguments of `Dataset.generate`.
+
+        Returns:
+            DatasetSpec: The specification of the dataset
+
+        Raises:
+            ValueError: If a dataset with the same id was already added
+        """
+        return self._add_spec(
+            DatasetSpec(
+                id,
+                variable,
+                description=description,
+                relationships=relationships or {},
+                num_rows=num_rows,
+                options=options,
+            )
+        )
+
+    def _add_spec(self, spec: DatasetSpec) -> DatasetSpec:
+        """Add a dataset specification to the graph."""
+        if spec.id in self.specs:
+            raise ValueError(f"Dataset '{spec.id}' is already in the graph")
+        self.specs[spec.id] = spec
+        return spec
+
+    def order(self) -> List[List[str]]:
+        """Sort the datasets by their relationships.
+
         Returns:
-            bool: True if the dataset is valid according to the variable model, False otherwise.
+            List[List[str]]: The dataset ids in generation stages, the datasets of
+                a stage only depend on datasets of earlier stages
+
+        Raises:
+            ValueError: If a relationship refers to a dataset that is not in the
+                graph, or the relationships are cyclic
+            DatasetFieldNotFoundError: If a relationship refers to a field that is
+                not in the dataset
         """
-        return self.variable.validate(self.data)
+        parents = {}
+        for spec in self.specs.values():
+            for dataset_id, mapped_field in spec.references().values():
+                if dataset_id not in self.specs:
+                    raise ValueError(
+                        f"Dataset '{spec.id}' depends on '{dataset_id}', "
+                        "which is not in the graph"
+                    )
+                # Raises DatasetFieldNotFoundError for unknown fields
+                Dataset(dataset_id, self.specs[dataset_id].variable, None)[mapped_field]
+            parents[spec.id] = spec.parents()
+
+        stages = []
+        done: Set[str] = set()
+        while len(done) < len(parents):
+            stage = [
+                dataset_id
+                for dataset_id, dataset_parents in parents.items()
+                if dataset_id not in done and dataset_parents <= done
+            ]
+            if not stage:
+                cycle = sorted(set(parents) - done)
+                raise ValueError(
+                    f"The relationships of datasets {', '.join(cycle)} are cyclic"
+                )
+            stages.append(stage)
+            done.update(stage)
+        return stages
+
+    def generate_all(self, max_workers: int = 4) -> Dict[str, "Dataset"]:
+        """Generate all datasets of the graph.
+
+        Args:
+            max_workers: The maximum number of datasets generated concurrently.
+
+        Returns:
+            Dict[str, Dataset]: The generated datasets, by id, with their
+                relationships referring to the generated datasets
+        """
+        self.order()
+
+        datasets: Dict[str, Dataset] = {}
+        pending = dict(self.specs)
+        running = {}
+        with ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="promptsite-graph"
+        ) as executor:
+            while pending or running:
+                for dataset_id, spec in list(pending.items()):
+                    if spec.parents() <= datasets.keys():
+                        future = executor.submit(self._generate, spec, datasets)
+                        running[future] = dataset_id
+                        del pending[dataset_id]
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    datasets[running.pop(future)] = future.result()
+
+        return {dataset_id: datasets[dataset_id] for dataset_id in self.specs}
+
+    def _generate(self, spec: DatasetSpec, datasets: Dict[str, Dataset]) -> Dataset:
+        """Generate a dataset once the datasets it depends on are generated.
+
+        Args:
+            spec: The specification of the dataset.
+            datasets: The generated datasets, by id.
+
+        Returns:
+            Dataset: The generated dataset
+        """
+        references = spec.references()
+        relationships = {
+            name: datasets[dataset_id][mapped_field]
+            for name, (dataset_id, mapped_field) in references.items()
+        }
+        relationships.update(
+            (name, mapped)
+            for name, mapped in spec.relationships.items()
+            if name not in references
+        )
+
+        return Dataset.generate(
+            spec.id,
+            spec.variable,
+            description=spec.description,
+            relationships=relationships or None,
+            num_rows=spec.num_rows,
+            **spec.options,
+        )
@@ -0,0 +1,246 @@
+"""Bulk validation of dataset rows held in a pandas DataFrame.
+
+Columns of simple fields (int, float, str, bool) with numeric or boolean dtypes
+are checked with vectorized operations. The other columns, such as nested
+objects, are validated by pydantic a column at a time.
+"""
+
+import types
+from typing import (
+    Annotated,
+    Any,
+    Iterable,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Union,
+    get_args,
+    get_origin,
+)
+
+import numpy as np
+import pandas as pd
+from pydantic import TypeAdapter, ValidationError
+from pydantic.fields import FieldInfo
+
+ERROR_COLUMNS = ["row", "field", "error"]
+
+SIMPLE_TYPES = (int, float, str, bool)
+
+_UNION_TYPES = tuple(
+    t for t in (Union, getattr(types, "UnionType", None)) if t is not None
+)
+
+
+def errors_frame(errors: Iterable[Tuple[Any, str, str]]) -> pd.DataFrame:
+    """Collect validation errors into a DataFrame.
+
+    Args:
+        errors (Iterable[Tuple[Any, str, str]]): Triples of row, field and error
+
+    Returns:
+        pd.DataFrame: The errors, one per row and field, ordered by row
+    """
+    frame = pd.DataFrame(list(errors), columns=ERROR_COLUMNS)
+    return frame.sort_values("row", kind="stable", ignore_index=True)
+
+
+def needs_row_validation(model: type) -> bool:
+    """Check whether a model can only be validated one row at a time.
+
+    Models with validators, strict mode or forbidden extra fields depend on
+    whole rows, so their columns can't be checked independently.
+
+    Args:
+        model (type): The pydantic model of a row
+
+    Returns:
+        bool: True if rows must be validated by pydantic
+    """
+    decorators = model.__pydantic_decorators__
+    config = model.model_config
+    return bool(
+        decorators.validators
+        or decorators.field_validators
+        or decorators.root_validators
+        or decorators.model_validators
+        or config.get("strict")
+        or config.get("extra") == "forbid"
+    )
+
+
+def validate_rows(
+    rows: Sequence[Any], model: type, indexes: Optional[Sequence[Any]] = None
+) -> pd.DataFrame:
+    """Validate rows one at a time with pydantic.
+
+    Args:
+        rows (Sequence[Any]): The rows
+        model (type): The pydantic model of a row
+        indexes (Optional[Sequence[Any]]): The row numbers reported in errors,
+            the positions of the rows if None
+
+    Returns:
+        pd.DataFrame: The errors, see `ERROR_COLUMNS`
+    """
+    errors = []
+    for position, row in enumerate(rows):
+        try:
+            model.model_validate(row)
+        except ValidationError as e:
+            index = position if indexes is None else indexes[position]
+            for error in e.errors():
+                field = ".".join(str(loc) for loc in error["loc"])
+                errors.append((index, field or "__root__", error["msg"]))
+    return errors_frame(errors)
+
+
+def _column_name(name: str, field: FieldInfo) -> str:
+    """Get the column holding a field, its alias if it has one."""
+    alias = field.validation_alias or field.alias
+    return alias if isinstance(alias, str) else name
+
+
+def _simple_type(annotation: Any) -> Tuple[Optional[type], bool]:
+    """Get the simple type of a field annotation and whether it is nullable.
+
+    Args:
+        annotation (Any): The field annotation
+
+    Returns:
+        Tuple[Optional[type], bool]: The type if it is one of `SIMPLE_TYPES`,
+            None otherwise, and whether None is allowed
+    """
+    nullable = annotation is None or annotation is type(None)
+    if get_origin(annotation) in _UNION_TYPES:
+        args = [arg for arg in get_args(annotation) if arg is not type(None)]
+        nullable = len(args) < len(get_args(annotation))
+        annotation = args[0] if len(args) == 1 else None
+    if annotation in SIMPLE_TYPES:
+        return annotation, nullable
+    return None, nullable or annotation is Any
+
+
+def _vectorized_invalid(column: pd.Series, kind: type) -> Optional[pd.Series]:
+    """Check a column of a numeric or boolean dtype in bulk.
+
+    Args:
+        column (pd.Series): The non-null values of the column
+        kind (type): The simple type of the field
+
+    Returns:
+        Optional[pd.Series]: Whether each value is invalid, None if the dtype
+            can't be checked in bulk
+    """
+    dtype = column.dtype
+    is_bool = pd.api.types.is_bool_dtype(dtype)
+    is_int = pd.api.types.is_integer_dtype(dtype) and not is_bool
+    is_float = pd.api.types.is_float_dtype(dtype)
+    if not (is_bool or is_int or is_float):
+        return None
+
+    if kind is str:
+        return pd.Series(True, index=column.index)
+    if kind is float or (kind is int and not is_float):
+        return pd.Series(False, index=column.index)
+    if kind is int:
+        return column % 1 != 0
+    if is_bool:
+        return pd.Series(False, index=column.index)
+    if is_int:
+        return ~column.isin([0, 1])
+    return None
+
+
+_INFERRED_TYPES = {
+    int: ("integer",),
+    float: ("integer", "floating", "mixed-integer-float"),
+    str: ("string",),
+    bool: ("boolean",),
+}
+
+
+def _to_python(value: Any) -> Any:
+    """Convert arrays of nested values back to lists."""
+    if isinstance(value, np.ndarray):
+        return [_to_python(v) for v in value.tolist()]
+    if isinstance(value, dict):
+        return {k: _to_python(v) for k, v in value.items()}
+    return value
+
+
+def _field_errors(column: pd.Series, field: FieldInfo) -> List[Tuple[Any, str]]:
+    """Validate the values of a field.
+
+    Args:
+        column (pd.Series): The values of the field
+        field (FieldInfo): The pydantic field
+
+    Returns:
+        List[Tuple[Any, str]]: Pairs of row and error
+    """
+    kind, nullable = _simple_type(field.annotation)
+    errors = []
+
+    present = column.notna()
+    if not nullable and field.is_required():
+        errors.extend((row, "Field required") for row in column.index[~present])
+    values = column[present]
+    if values.empty:
+        return errors
+
+    if kind is not None and not field.metadata:
+        invalid = _vectorized_invalid(values, kind)
+        if invalid is not None:
+            message = f"Input should be a valid {kind.__name__}"
+            errors.extend((row, message) for row in values.index[invalid])
+            return errors
+        # Object columns whose values all have the type need no coercion
+        if pd.api.types.infer_dtype(values, skipna=False) in _INFERRED_TYPES[kind]:
+            return errors
+
+    annotation = field.annotation
+    if field.metadata:
+        annotation = Annotated[(annotation, *field.metadata)]
+    # The whole column is validated by a single pydantic call
+    try:
+        TypeAdapter(List[annotation]).validate_python(
+            [_to_python(value) for value in values]
+        )
+    except ValidationError as e:
+        failed = set()
+        for error in e.errors():
+            position = error["loc"][0]
+            if position not in failed:
+                failed.add(position)
+                errors.append((values.index[position], error["msg"]))
+    return errors
+
+
+def validate_frame(frame: pd.DataFrame, model: type) -> pd.DataFrame:
+    """Validate the rows of a DataFrame against a model, a column at a time.
+
+    Missing values of fields with defaults are treated as missing keys, which
+    pydantic accepts.
+
+    Args:
+        frame (pd.DataFrame): The rows, indexed by row number
+        model (type): The pydantic model of a row, without validators that
+            depend on whole rows, see `needs_row_validation`
+
+    Returns:
+        pd.DataFrame: The errors, see `ERROR_COLUMNS`
+    """
+    errors = []
+    for name, field in model.model_fields.items():
+        column_name = _column_name(name, field)
+        if column_name not in frame.columns:
+            if field.is_required():
+                errors.extend((row, name, "Field required") for row in frame.index)
+            continue
+        errors.extend(
+            (row, name, error)
+            for row, error in _field_errors(frame[column_name], field)
+        )
+    return errors_frame(errors)
@@ -1,3 +1,4 @@
+import uuid
 from dataclasses import dataclass, field
 from datetime import datetime
 from typing import List
@@ -26,6 +27,10 @@ class Run:
         llm_output (Optional[str]): The output text from the LLM
         execution_time (Optional[float]): Time taken to execute in seconds
         llm_config (Optional[Dict[str, Any]]): Configuration used for the LLM
+        validation (Optional[Dict[str, str]]): The validation policy applied to
+            each variable, such as "full" or "sample(100)"
+        dropped_rows (Optional[Dict[str, int]]): The number of rows dropped from
+            each variable with a budget
     """
 
     run_id: Optional[str] = None
@@ -36,6 +41,8 @@ class Run:
     llm_output: Optional[str] = None
     execution_time: Optional[float] = None
     llm_config: Optional[Dict[str, Any]] = None
+    validation: Optional[Dict[str, str]] = None
+    dropped_rows: Optional[Dict[str, int]] = None
 
     def __post_init__(self) -> None:
         """Initialize the run_id if not provided."""
@@ -43,8 +50,8 @@ class Run:
             self.run_id = self._generate_run_id()
 
     def _generate_run_id(self) -> str:
-        """Generate a run ID based on the hash of the run_at timestamp."""
-        return f"run_{datetime.now(UTC).strftime('%Y%m%d_%H%M%S')}_{id(self)}"
+        """Generate a unique run ID prefixed with the creation timestamp."""
+        return f"run_{datetime.now(UTC).strftime('%Y%m%d_%H%M%S')}_{uuid.uuid4().hex}"
 
     def to_dict(self, columns: Optional[List[str]] = None) -> Dict[str, Any]:
         """
@@ -63,6 +70,8 @@ class Run:
                 "llm_output",
                 "execution_time",
                 "llm_config",
+                "validation",
+                "dropped_rows",
             ]
 
         _dict = {}
@@ -80,6 +89,10 @@ class Run:
             _dict["execution_time"] = self.execution_time
         if "llm_config" in columns:
             _dict["llm_config"] = self.llm_config
+        if "validation" in columns:
+            _dict["validation"] = self.validation
+        if "dropped_rows" in columns:
+            _dict["dropped_rows"] = self.dropped_rows
         if "run_at" in columns:
             _dict["run_at"] = str(self.run_at)
         return _dict
@@ -109,6 +122,8 @@ class Run:
             llm_output=data.get("llm_output"),
             execution_time=data.get("execution_time"),
             llm_config=data.get("llm_config"),
+            validation=data.get("validation"),
+            dropped_rows=data.get("dropped_rows"),
             **kwargs,
             final_prompt=data["final_prompt"],
             variables=data.get("variables", {}),
@@ -1,11 +1,292 @@
+import hashlib
 import io
 import json
+import random
+import re
+import string
+import threading
 from contextlib import redirect_stdout
-from typing import Any, Dict
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, Union
 
 from datamodel_code_generator import generate
 from pydantic import *  # noqa F403
-from pydantic import BaseModel, ValidationError
+from pydantic import BaseModel, TypeAdapter, ValidationError
+
+from .. import codec
+from ..exceptions import VariableBudgetError
+
+VALIDATION_MODES = ("full", "sample", "first", "off")
+
+_POLICY_PATTERN = re.compile(r"^(sample|first)\((\d+)\)$")
+
+_CODEGEN_LOCK = threading.Lock()
+
+
+def iter_json(value: Any, sort_keys: bool = False) -> Iterator[str]:
+    """Encode a value as JSON one list item at a time.
+
+    The chunks join to the same text as `json.dumps(value, sort_keys=sort_keys)`,
+    but a large list is never encoded into a single string.
+
+    Args:
+        value (Any): The value to encode
+        sort_keys (bool): Whether to sort the keys of objects
+
+    Returns:
+        Iterator[str]: The chunks of the JSON text
+    """
+    if not isinstance(value, list):
+        yield json.dumps(value, sort_keys=sort_keys)
+        return
+    yield "["
+    for i, item in enumerate(value):
+        yield (", " if i else "") + json.dumps(item, sort_keys=sort_keys)
+    yield "]"
+
+
+BUDGET_STRATEGIES = ("head", "tail", "head_tail", "sample")
+
+
+def approximate_tokens(text: str) -> int:
+    """Estimate the number of tokens of a text, about four characters per token.
+
+    Args:
+        text (str): The text
+
+    Returns:
+        int: The estimated number of tokens
+    """
+    return (len(text) + 3) // 4
+
+
+@dataclass(frozen=True)
+class Budget:
+    """A cap on the size of the dataset rendered into a prompt.
+
+    Rows of an array are kept until the next one would exceed the budget. "head"
+    keeps the first rows, "tail" the last rows, "head_tail" alternates between
+    both ends and "sample" keeps rows in a random order that is fixed by the
+    seed. The kept rows stay in their original order.
+
+    Attributes:
+        max_tokens (Optional[int]): The maximum number of tokens of the dataset JSON
+        max_bytes (Optional[int]): The maximum number of UTF-8 bytes of the dataset JSON
+        strategy (str): One of `BUDGET_STRATEGIES`
+        seed (int): Seed of the "sample" strategy
+        tokenizer (Callable[[str], int]): Counts the tokens of a text, estimated
+            from its length by default
+
+    Example:
+        >>> ArrayVariable(model=Customer, budget=Budget(max_tokens=8000))
+        >>> ArrayVariable(model=Customer, budget=Budget(max_bytes=65536, strategy="tail"))
+    """
+
+    max_tokens: Optional[int] = None
+    max_bytes: Optional[int] = None
+    strategy: str = "head"
+    seed: int = 0
+    tokenizer: Callable[[str], int] = approximate_tokens
+
+    def __post_init__(self) -> None:
+        if self.strategy not in BUDGET_STRATEGIES:
+            raise ValueError(
+                f"Unsupported budget strategy '{self.strategy}', "
+                f"expected one of {', '.join(BUDGET_STRATEGIES)}"
+            )
+        if self.max_tokens is None and self.max_bytes is None:
+            raise ValueError("A budget needs max_tokens or max_bytes")
+
+    def _cost(self, text: str) -> Tuple[int, int]:
+        """Get the number of tokens and bytes of a text, 0 for unlimited ones."""
+        tokens = 0 if self.max_tokens is None else self.tokenizer(text)
+        size = 0 if self.max_bytes is None else len(text.encode())
+        return tokens, size
+
+    def _fits(self, tokens: int, size: int) -> bool:
+        """Check whether a number of tokens and bytes is within the budget."""
+        return (self.max_tokens is None or tokens <= self.max_tokens) and (
+            self.max_bytes is None or size <= self.max_bytes
+        )
+
+    def fits(self, text: str) -> bool:
+        """Check whether a text is within the budget.
+
+        Args:
+            text (str): The text
+
+        Returns:
+            bool: True if the text is within the budget, False otherwise
+        """
+        return self._fits(*self._cost(text))
+
+    def _order(self, n: int) -> List[int]:
+        """Get the order in which the strategy keeps n rows."""
+        if self.strategy == "head":
+            return list(range(n))
+        if self.strategy == "tail":
+            return list(range(n - 1, -1, -1))
+        if self.strategy == "head_tail":
+            return [i // 2 if i % 2 == 0 else n - 1 - i // 2 for i in range(n)]
+        order = list(range(n))
+        random.Random(self.seed).shuffle(order)
+        return order
+
+    def fit(self, rows: List[Any]) -> Tuple[List[Any], int]:
+        """Keep the rows whose JSON array fits the budget.
+
+        The tokens of the array are estimated as the sum of the tokens of its
+        rows and separators.
+
+        Args:
+            rows (List[Any]): The rows
+
+        Returns:
+            Tuple[List[Any], int]: The kept rows and the number of dropped rows
+        """
+        tokens, size = self._cost("[]")
+        separator_tokens, separator_size = self._cost(", ")
+        kept = []
+        for i in self._order(len(rows)):
+            row_tokens, row_size = self._cost(json.dumps(rows[i], sort_keys=True))
+            if kept:
+                row_tokens += separator_tokens
+                row_size += separator_size
+            if not self._fits(tokens + row_tokens, size + row_size):
+                break
+            tokens += row_tokens
+            size += row_size
+            kept.append(i)
+        kept.sort()
+        return [rows[i] for i in kept], len(rows) - len(kept)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Convert the budget to a dictionary, without the tokenizer.
+
+        Returns:
+            Dict[str, Any]: The limits, strategy and seed
+        """
+        return {
+            "max_tokens": self.max_tokens,
+            "max_bytes": self.max_bytes,
+            "strategy": self.strategy,
+            "seed": self.seed,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Budget":
+        """Create a budget from its dictionary representation.
+
+        The tokenizer is not stored, so the budget estimates tokens from the
+        text length.
+
+        Args:
+            data (Dict[str, Any]): The limits, strategy and seed, see `to_dict`
+
+        Returns:
+            Budget: The budget
+        """
+        return cls(
+            max_tokens=data.get("max_tokens"),
+            max_bytes=data.get("max_bytes"),
+            strategy=data.get("strategy", "head"),
+            seed=data.get("seed", 0),
+        )
+
+
+@dataclass(frozen=True)
+class ValidationPolicy:
+    """How much of a variable value is validated.
+
+    "full" validates every item, "sample" validates n random items of an array,
+    "first" validates its first n items and "off" skips validation. Values that
+    are not arrays are validated fully unless the policy is "off".
+
+    Attributes:
+        mode (str): One of `VALIDATION_MODES`
+        n (Optional[int]): The number of items validated by "sample" and "first"
+        seed (Optional[int]): Seed of the random sample, for reproducible runs
+
+    Example:
+        >>> ArrayVariable(model=Customer, validation=ValidationPolicy.sample(100))
+        >>> ArrayVariable(model=Customer, validation="first(1000)")
+    """
+
+    mode: str = "full"
+    n: Optional[int] = None
+    seed: Optional[int] = None
+
+    def __post_init__(self) -> None:
+        if self.mode not in VALIDATION_MODES:
+            raise ValueError(
+                f"Unsupported validation mode '{self.mode}', "
+                f"expected one of {', '.join(VALIDATION_MODES)}"
+            )
+        if self.mode in ("sample", "first") and (self.n is None or self.n < 1):
+            raise ValueError(f"Validation mode '{self.mode}' needs a positive n")
+
+    @classmethod
+    def full(cls) -> "ValidationPolicy":
+        """Validate every item."""
+        return cls("full")
+
+    @classmethod
+    def sample(cls, n: int, seed: Optional[int] = None) -> "ValidationPolicy":
+        """Validate n random items of arrays."""
+        return cls("sample", n, seed)
+
+    @classmethod
+    def first(cls, n: int) -> "ValidationPolicy":
+        """Validate the first n items of arrays."""
+        return cls("first", n)
+
+    @classmethod
+    def off(cls) -> "ValidationPolicy":
+        """Skip validation."""
+        return cls("off")
+
+    @classmethod
+    def parse(cls, value: Union[str, "ValidationPolicy"]) -> "ValidationPolicy":
+        """Get a policy from its string form, such as "full" or "sample(100)".
+
+        Args:
+            value (Union[str, ValidationPolicy]): The policy or its string form
+
+        Returns:
+            ValidationPolicy: The policy
+
+        Raises:
+            ValueError: If the string is not a valid policy
+        """
+        if isinstance(value, cls):
+            return value
+        match = _POLICY_PATTERN.match(value)
+        if match:
+            return cls(match.group(1), int(match.group(2)))
+        return cls(value)
+
+    def select(self, items: List[Any]) -> List[Any]:
+        """Get the items of an array the policy validates.
+
+        Args:
+            items (List[Any]): The items of the array
+
+        Returns:
+            List[Any]: The items to validate, in their original order
+        """
+        if self.mode == "off":
+            return []
+        if self.mode == "full" or len(items) <= self.n:
+            return items
+        if self.mode == "first":
+            return items[: self.n]
+        indexes = random.Random(self.seed).sample(range(len(items)), self.n)
+        return [items[i] for i in sorted(indexes)]
+
+    def __str__(self) -> str:
+        if self.mode in ("sample", "first"):
+            return f"{self.mode}({self.n})"
+        return self.mode
 
 
 class Variable:
@@ -14,17 +295,46 @@ class Variable:
     Attributes:
         description (str): Description of the variable
         disable_validation (bool): Whether to disable validation for the variable
+        validation (Optional[Union[str, ValidationPolicy]]): How much of the
+            values is validated, full validation by default
     """
 
-    def __init__(self, description: str = "", disable_validation: bool = False):
+    def __init__(
+        self,
+        description: str = "",
+        disable_validation: bool = False,
+        validation: Optional[Union[str, ValidationPolicy]] = None,
+    ):
         self.description = description
         self.disable_validation = disable_validation
+        self.validation = (
+            None if validation is None else ValidationPolicy.parse(validation)
+        )
 
-    def validate(self, value: str) -> bool:
+    @property
+    def validation_policy(self) -> ValidationPolicy:
+        """The validation policy applied by default, "off" if validation is disabled."""
+        if self.disable_validation:
+            return ValidationPolicy.off()
+        return self.validation or ValidationPolicy.full()
+
+    def _policy(
+        self, policy: Optional[Union[str, ValidationPolicy]] = None
+    ) -> ValidationPolicy:
+        """Get the policy of a validation, the given one or the default one."""
+        if policy is None:
+            return self.validation_policy
+        return ValidationPolicy.parse(policy)
+
+    def validate(
+        self, value: str, policy: Optional[Union[str, ValidationPolicy]] = None
+    ) -> bool:
         """Validate if the given value matches the variable type.
 
         Args:
             value (str): The value to validate
+            policy (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of the variable
 
         Returns:
             bool: True if value is valid for this variable type, False otherwise
@@ -34,13 +344,32 @@ class Variable:
         """
         raise NotImplementedError
 
+    def _fingerprint_fields(self) -> Dict[str, Any]:
+        """Get the fields that identify the variable in its fingerprint.
+
+        Returns:
+            Dict[str, Any]: The fields, all JSON serializable
+        """
+        return {"type": self.__class__.__name__}
+
+    @property
+    def fingerprint(self) -> str:
+        """A stable digest of the variable type, schema and flags.
+
+        Two variables with the same fingerprint render and validate the same
+        way, so versions are compared by fingerprint instead of full payloads.
+        """
+        payload = json.dumps(self._fingerprint_fields(), sort_keys=True)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
     def to_dict(self) -> Dict[str, Any]:
         """Convert the variable instance to a dictionary representation.
 
         Returns:
             Dict[str, Any]: A dictionary containing the variable type information
+                and fingerprint
         """
-        return {"type": self.__class__.__name__}
+        return {"type": self.__class__.__name__, "fingerprint": self.fingerprint}
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "Variable":
@@ -79,16 +408,154 @@ class ComplexVariable(Variable):
     This class handles structured data that needs to conform to a specific schema defined
     by a Pydantic model.
 
+    The JSON schema, its serialized form, its hash and the validator are computed
+    once per variable and cached until the model is replaced.
+
     Attributes:
         model (BaseModel): The Pydantic model used for validation and schema generation
         is_output (bool): Whether the variable is an output variable
+        budget (Optional[Budget]): Caps the size of the dataset rendered into prompts
     """
 
-    def __init__(self, model: BaseModel, is_output: bool = False, **kwargs):
-        self.model = model
+    def __init__(
+        self,
+        model: BaseModel = None,
+        is_output: bool = False,
+        budget: Optional[Budget] = None,
+        **kwargs,
+    ):
+        self._model = model
+        self._model_class = None
+        self._json_schema = None
+        self._schema_json = None
+        self._schema_hash = None
+        self._fingerprint = None
+        self._adapter = None
         self.is_output = is_output
+        self.budget = budget
         super().__init__(**kwargs)
 
+    @property
+    def model(self) -> BaseModel:
+        """The Pydantic model of the variable.
+
+        Variables loaded with `from_dict` keep the stored JSON schema and only
+        generate the model on first access, so loading prompts never runs codegen.
+        """
+        if self._model is None and self._json_schema is not None:
+            self._model = self._generate_model(self._model_class, self._json_schema)
+        return self._model
+
+    @model.setter
+    def model(self, model: BaseModel) -> None:
+        self._model = model
+        self._model_class = None
+        self._json_schema = None
+        self._schema_json = None
+        self._schema_hash = None
+        self._fingerprint = None
+        self._adapter = None
+
+    @property
+    def model_class(self) -> str:
+        """The class name of the Pydantic model."""
+        if self._model_class is not None:
+            return self._model_class
+        return self.model.__name__
+
+    @property
+    def json_schema(self) -> Dict[str, Any]:
+        """The JSON schema of the Pydantic model.
+
+        For variables loaded with `from_dict`, this is the stored schema.
+        """
+        if self._json_schema is None:
+            self._json_schema = self.model.model_json_schema()
+        return self._json_schema
+
+    @property
+    def schema_json(self) -> str:
+        """The JSON schema serialized with sorted keys, as inserted into prompts."""
+        if self._schema_json is None:
+            self._schema_json = json.dumps(self.json_schema, sort_keys=True)
+        return self._schema_json
+
+    @property
+    def schema_hash(self) -> str:
+        """The SHA-256 hex digest of the serialized JSON schema."""
+        if self._schema_hash is None:
+            self._schema_hash = hashlib.sha256(self.schema_json.encode()).hexdigest()
+        return self._schema_hash
+
+    def _adapter_type(self) -> Any:
+        """Get the type values of the variable are validated against."""
+        return self.model
+
+    @property
+    def adapter(self) -> TypeAdapter:
+        """The compiled pydantic validator of the variable values."""
+        if self._adapter is None:
+            self._adapter = TypeAdapter(self._adapter_type())
+        return self._adapter
+
+    def validate_json(
+        self,
+        data: Union[str, bytes],
+        policy: Optional[Union[str, ValidationPolicy]] = None,
+    ) -> bool:
+        """Validate a JSON encoded value without decoding it in Python first.
+
+        Args:
+            data (Union[str, bytes]): The JSON encoded value
+            policy (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of the variable
+
+        Returns:
+            bool: True if the value conforms to the model schema, False otherwise
+        """
+        policy = self._policy(policy)
+        if policy.mode == "off":
+            return True
+        if policy.mode != "full":
+            # Only part of the value is validated, decode it to select the items
+            try:
+                return self.validate(codec.loads(data), policy)
+            except json.JSONDecodeError:
+                return False
+        try:
+            self.adapter.validate_json(data)
+            return True
+        except ValidationError:
+            return False
+
+    def _fingerprint_fields(self) -> Dict[str, Any]:
+        """Get the fields that identify the variable in its fingerprint.
+
+        Returns:
+            Dict[str, Any]: The type, model class name, schema hash, output flag
+                and budget if any
+        """
+        fields = {
+            "type": self.__class__.__name__,
+            "model_class": self.model_class,
+            "schema_hash": self.schema_hash,
+            "is_output": self.is_output,
+        }
+        if self.budget is not None:
+            fields["budget"] = self.budget.to_dict()
+        return fields
+
+    @property
+    def fingerprint(self) -> str:
+        """A stable digest of the variable type, schema and flags.
+
+        Variables loaded with `from_dict` keep the stored fingerprint, so they
+        can be compared without serializing or hashing their schema.
+        """
+        if self._fingerprint is not None:
+            return self._fingerprint
+        return super().fingerprint
+
     @property
     def schema_instructions(self) -> str:
         if self.is_output:
@@ -106,23 +573,89 @@ class ComplexVariable(Variable):
         """
         return json.dumps(value)
 
-    def get_prompt_insert(self, value: Any, custom_instructions: str = "") -> str:
+    def fit_budget(self, value: Any) -> Tuple[Any, int]:
+        """Drop the rows of a value that don't fit the budget of the variable.
+
+        Args:
+            value (Any): The dataset value
+
+        Returns:
+            Tuple[Any, int]: The value with the kept rows and the number of
+                dropped rows
+
+        Raises:
+            VariableBudgetError: If a value that is not a list exceeds the budget
+        """
+        if self.budget is None or self.is_output:
+            return value, 0
+        if isinstance(value, list):
+            return self.budget.fit(value)
+        if not self.budget.fits(json.dumps(value, sort_keys=True)):
+            raise VariableBudgetError(
+                f"The value doesn't fit the budget {self.budget.to_dict()}"
+            )
+        return value, 0
+
+    def iter_prompt_insert(
+        self, value: Any, custom_instructions: str = "", apply_budget: bool = True
+    ) -> Iterator[str]:
+        """Generate the prompt insert in chunks, the dataset one item at a time.
+
+        The chunks join to the same text as `get_prompt_insert`.
+
+        Args:
+            value (Any): The dataset value to include in the prompt
+            custom_instructions (str, optional): Custom instructions template to use.
+                                               Defaults to schema_instructions.
+            apply_budget (bool): Whether to drop the rows exceeding the budget,
+                False if the value has already been fitted
+
+        Returns:
+            Iterator[str]: The chunks of the prompt insert
+        """
+        if apply_budget:
+            value, _ = self.fit_budget(value)
+        instructions = (
+            custom_instructions if custom_instructions else self.schema_instructions
+        )
+
+        for literal, field_name, _, _ in string.Formatter().parse(instructions):
+            if literal:
+                yield literal
+            if field_name is None:
+                continue
+            if field_name == "schema":
+                yield self.schema_json
+            elif field_name == "dataset":
+                if not self.is_output:
+                    yield "The actual dataset is: \n"
+                    yield from iter_json(value, sort_keys=True)
+            else:
+                raise KeyError(field_name)
+
+    def get_prompt_insert(
+        self, value: Any, custom_instructions: str = "", apply_budget: bool = True
+    ) -> str:
         """Generate a formatted prompt string with schema and dataset information.
 
         Args:
             value (Any): The dataset value to include in the prompt
             custom_instructions (str, optional): Custom instructions template to use.
                                                Defaults to schema_instructions.
+            apply_budget (bool): Whether to drop the rows exceeding the budget,
+                False if the value has already been fitted
 
         Returns:
             str: Formatted prompt string containing schema and dataset information
         """
+        if apply_budget:
+            value, _ = self.fit_budget(value)
         instructions = (
             custom_instructions if custom_instructions else self.schema_instructions
         )
 
         return instructions.format(
-            schema=json.dumps(self.model.model_json_schema(), sort_keys=True),
+            schema=self.schema_json,
             dataset="The actual dataset is: \n" + json.dumps(value, sort_keys=True)
             if not self.is_output
             else "",
@@ -133,14 +666,18 @@ class ComplexVariable(Variable):
 
         Returns:
             Dict[str, Any]: A dictionary containing the variable type, model class name,
-                           and model schema information
+                           model schema information, fingerprint and budget if any
         """
-        return {
+        data = {
             "type": self.__class__.__name__,
-            "model_class": self.model.__name__,
-            "model": self.model.model_json_schema(),
+            "model_class": self.model_class,
+            "model": self.json_schema,
             "is_output": self.is_output,
+            "fingerprint": self.fingerprint,
         }
+        if self.budget is not None:
+            data["budget"] = self.budget.to_dict()
+        return data
 
     @classmethod
     def from_dict(cls, data: Dict[str, Any]) -> "ComplexVariable":
@@ -151,17 +688,41 @@ class ComplexVariable(Variable):
                                   model schema information
 
         Returns:
-            ComplexVariable: A new instance of ComplexVariable with the reconstructed
-                           Pydantic model
+            ComplexVariable: A new instance of ComplexVariable whose Pydantic model
+                           is reconstructed lazily from the schema
         """
-        f = io.StringIO()
-        with redirect_stdout(f):
-            generate(input_=json.dumps(data["model"]), input_file_type="jsonschema")
-        exec(f.getvalue())
         cls = globals()[data["type"]]
-        model = eval(data["model_class"])
-        model.model_rebuild()
-        return cls(model=model, is_output=data.get("is_output", False))
+        budget = data.get("budget")
+        variable = cls(
+            is_output=data.get("is_output", False),
+            budget=Budget.from_dict(budget) if budget else None,
+        )
+        variable._model_class = data["model_class"]
+        variable._json_schema = data["model"]
+        variable._fingerprint = data.get("fingerprint")
+        return variable
+
+    @staticmethod
+    def _generate_model(model_class: str, schema: Dict[str, Any]) -> BaseModel:
+        """Generate a Pydantic model from a JSON schema.
+
+        Args:
+            model_class (str): The class name of the model to generate
+            schema (Dict[str, Any]): The JSON schema of the model
+
+        Returns:
+            BaseModel: The generated Pydantic model class
+        """
+        f = io.StringIO()
+        # The generated code is captured from sys.stdout, which is shared by
+        # every thread
+        with _CODEGEN_LOCK, redirect_stdout(f):
+            generate(input_=json.dumps(schema), input_file_type="jsonschema")
+        namespace = {}
+        exec(f.getvalue(), namespace)
+        model = namespace[model_class]
+        model.model_rebuild(_types_namespace=namespace)
+        return model
 
 
 class StringVariable(SingleVariable):
@@ -170,16 +731,20 @@ class StringVariable(SingleVariable):
     Validates that values are Python string instances.
     """
 
-    def validate(self, value: str) -> bool:
+    def validate(
+        self, value: str, policy: Optional[Union[str, ValidationPolicy]] = None
+    ) -> bool:
         """Validate if the given value is a string.
 
         Args:
             value (str): The value to validate
+            policy (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of the variable
 
         Returns:
             bool: True if value is a string instance, False otherwise
         """
-        if self.disable_validation:
+        if self._policy(policy).mode == "off":
             return True
         return isinstance(value, str)
 
@@ -190,16 +755,20 @@ class NumberVariable(SingleVariable):
     Validates that values are Python integer instances.
     """
 
-    def validate(self, value: str) -> bool:
+    def validate(
+        self, value: str, policy: Optional[Union[str, ValidationPolicy]] = None
+    ) -> bool:
         """Validate if the given value is an integer.
 
         Args:
             value (str): The value to validate
+            policy (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of the variable
 
         Returns:
             bool: True if value is an integer instance, False otherwise
         """
-        if self.disable_validation:
+        if self._policy(policy).mode == "off":
             return True
         return isinstance(value, int)
 
@@ -210,16 +779,20 @@ class BooleanVariable(SingleVariable):
     Validates that values are Python boolean instances.
     """
 
-    def validate(self, value: str) -> bool:
+    def validate(
+        self, value: str, policy: Optional[Union[str, ValidationPolicy]] = None
+    ) -> bool:
         """Validate if the given value is a boolean.
 
         Args:
             value (str): The value to validate
+            policy (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of the variable
 
         Returns:
             bool: True if value is a boolean instance, False otherwise
         """
-        if self.disable_validation:
+        if self._policy(policy).mode == "off":
             return True
         return isinstance(value, bool)
 
@@ -255,26 +828,37 @@ Here is an example of the output:
 ```
 """
 
-    def validate(self, value: Any) -> bool:
+    def _adapter_type(self) -> Any:
+        """Get the type values of the variable are validated against."""
+        return List[self.model]
+
+    def validate(
+        self, value: Any, policy: Optional[Union[str, ValidationPolicy]] = None
+    ) -> bool:
         """Validate if the given value is a list conforming to the model schema.
 
+        The items selected by the validation policy are validated in a single
+        call of the cached validator.
+
         Args:
             value (Any): The value to validate
+            policy (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of the variable
 
         Returns:
             bool: True if value is a list and all items conform to the model schema,
                  False otherwise
         """
-        if self.disable_validation:
+        policy = self._policy(policy)
+        if policy.mode == "off":
             return True
         if not isinstance(value, list):
             return False
-        for item in value:
-            try:
-                self.model.model_validate(item)
-            except ValidationError:
-                return False
-        return True
+        try:
+            self.adapter.validate_python(policy.select(value))
+            return True
+        except ValidationError:
+            return False
 
 
 class ObjectVariable(ComplexVariable):
@@ -303,17 +887,21 @@ Here is the output schema:
 ```
 """
 
-    def validate(self, value: Any) -> bool:
+    def validate(
+        self, value: Any, policy: Optional[Union[str, ValidationPolicy]] = None
+    ) -> bool:
         """Validate if the given value is a dict conforming to the model schema.
 
         Args:
             value (Any): The value to validate
+            policy (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of the variable
 
         Returns:
             bool: True if value is a dict and conforms to the model schema,
                  False otherwise
         """
-        if self.disable_validation:
+        if self._policy(policy).mode == "off":
             return True
         if not isinstance(value, dict):
             return False
@@ -6,15 +6,33 @@ except ImportError:
     UTC = _timezone.utc
 
 import hashlib
+import re
+from collections import Counter
 from dataclasses import dataclass, field
 from datetime import datetime
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple, Union
 
-from jinja2 import Template
+from jinja2 import Environment, Template, nodes
 
 from ..exceptions import VariableUnmatchError, VariableValidationError
 from .run import Run
-from .variable import Variable
+from .variable import ValidationPolicy, Variable, iter_json
+
+STREAM_CHUNK_SIZE = 65536
+
+
+@dataclass
+class RenderedPrompt:
+    """A final prompt and the rows dropped to fit the variable budgets.
+
+    Attributes:
+        prompt (str): The final prompt
+        dropped_rows (Optional[Dict[str, int]]): The number of rows dropped for
+            each variable with a budget, None if no variable has one
+    """
+
+    prompt: str
+    dropped_rows: Optional[Dict[str, int]] = None
 
 
 @dataclass
@@ -59,6 +77,8 @@ class Version:
         llm_output: Optional[str] = None,
         execution_time: Optional[float] = None,
         llm_config: Optional[Dict[str, Any]] = None,
+        validation: Optional[Dict[str, str]] = None,
+        dropped_rows: Optional[Dict[str, int]] = None,
     ) -> Run:
         """Create and add a new run to this version.
 
@@ -66,6 +86,10 @@ class Version:
             llm_output (Optional[str]): The output text from the LLM
             execution_time (Optional[float]): Time taken to execute in seconds
             llm_config (Optional[Dict[str, Any]]): Configuration used for the LLM
+            validation (Optional[Dict[str, str]]): The validation policy applied
+                to each variable
+            dropped_rows (Optional[Dict[str, int]]): The number of rows dropped
+                for each variable with a budget
 
         Returns:
             Run: The newly created run
@@ -76,6 +100,8 @@ class Version:
             llm_output=llm_output,
             execution_time=execution_time,
             llm_config=llm_config,
+            validation=validation,
+            dropped_rows=dropped_rows,
         )
 
         self.runs[run.run_id] = run
@@ -86,6 +112,7 @@ class Version:
         values: Dict[str, Any],
         no_instructions: Optional[bool] = False,
         custom_instructions: Optional[str] = "",
+        validation: Optional[Union[str, ValidationPolicy]] = None,
     ) -> str:
         """Build the final prompt with the variables of the version.
 
@@ -93,28 +120,43 @@ class Version:
             values (Dict[str, Any]): The values of the variables
             no_instructions (Optional[bool]): Whether to use the custom instructions
             custom_instructions (Optional[str]): The custom instructions
+            validation (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of every variable
 
         Returns:
             str: The final prompt
         """
+        return self.render(
+            values,
+            no_instructions=no_instructions,
+            custom_instructions=custom_instructions,
+            validation=validation,
+        ).prompt
+
+    def render(
+        self,
+        values: Dict[str, Any],
+        no_instructions: Optional[bool] = False,
+        custom_instructions: Optional[str] = "",
+        validation: Optional[Union[str, ValidationPolicy]] = None,
+    ) -> "RenderedPrompt":
+        """Build the final prompt, reporting the rows dropped by variable budgets.
+
+        Args:
+            values (Dict[str, Any]): The values of the variables
+            no_instructions (Optional[bool]): Whether to use the custom instructions
+            custom_instructions (Optional[str]): The custom instructions
+            validation (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of every variable
+
+        Returns:
+            RenderedPrompt: The final prompt and the dropped rows
+        """
         template = Template(self.content)
 
         if self.variables:
-            input_variables = [
-                k
-                for k, v in self.variables.items()
-                if not getattr(v, "is_output", False)
-            ]
-
-            if set(input_variables) != set(values.keys()):
-                raise VariableUnmatchError("The variables and the values do not match")
-
-            for variable_name in input_variables:
-                variable_type = self.variables[variable_name]
-                if not variable_type.validate(values[variable_name]):
-                    raise VariableValidationError(
-                        f"The variable {variable_name} is not valid"
-                    )
+            self._validate_values(values, validation)
+            values, dropped_rows = self._fit_budgets(values)
 
             prompt_inserts = {}
             for variable_name, variable_type in self.variables.items():
@@ -127,15 +169,183 @@ class Version:
                     prompt_inserts[variable_name] = variable_type.get_prompt_insert(
                         values.get(variable_name),
                         custom_instructions=custom_instructions,
+                        apply_budget=False,
                     )
 
-            return template.render(**prompt_inserts)
+            return RenderedPrompt(template.render(**prompt_inserts), dropped_rows)
+
+        return RenderedPrompt(template.render(**values))
+
+    def stream_final_prompt(
+        self,
+        values: Dict[str, Any],
+        no_instructions: Optional[bool] = False,
+        custom_instructions: Optional[str] = "",
+        validation: Optional[Union[str, ValidationPolicy]] = None,
+        chunk_size: int = STREAM_CHUNK_SIZE,
+    ) -> Iterator[str]:
+        """Build the final prompt in chunks, without holding it in memory.
+
+        Complex variables output as a bare `{{ name }}` are encoded one dataset
+        item at a time, other variables are rendered as in `build_final_prompt`.
+        The chunks join to the same text as `build_final_prompt`.
+
+        Args:
+            values (Dict[str, Any]): The values of the variables
+            no_instructions (Optional[bool]): Whether to use the custom instructions
+            custom_instructions (Optional[str]): The custom instructions
+            validation (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of every variable
+            chunk_size (int): The size of the chunks to yield, in characters
+
+        Returns:
+            Iterator[str]: The chunks of the final prompt
+
+        Example:
+            >>> with open("prompt.txt", "w") as f:
+            ...     f.writelines(version.stream_final_prompt({"rows": rows}))
+        """
+        template = Template(self.content)
 
-        return template.render(**values)
+        if not self.variables:
+            yield from _buffer_chunks(template.generate(**values), chunk_size)
+            return
+
+        self._validate_values(values, validation)
+        values, _ = self._fit_budgets(values)
+
+        # Streamed variables are rendered as markers, replaced by their chunks
+        streamable = _bare_output_names(self.content)
+        context = {}
+        streams: Dict[str, Callable[[], Iterator[str]]] = {}
+        for i, (variable_name, variable_type) in enumerate(self.variables.items()):
+            has_prompt_insert = getattr(variable_type, "get_prompt_insert", False)
+            if no_instructions or not has_prompt_insert:
+                value = values[variable_name]
+            else:
+                value = values.get(variable_name)
+
+            if has_prompt_insert and variable_name in streamable:
+                marker = f"\x00{i}\x00"
+                context[variable_name] = marker
+                streams[marker] = _insert_stream(
+                    variable_type, value, no_instructions, custom_instructions
+                )
+            elif no_instructions or not has_prompt_insert:
+                context[variable_name] = variable_type.to_json(value)
+            else:
+                context[variable_name] = variable_type.get_prompt_insert(
+                    value, custom_instructions=custom_instructions, apply_budget=False
+                )
+
+        def chunks() -> Iterator[str]:
+            if not streams:
+                yield from template.generate(**context)
+                return
+            markers = re.compile("(" + "|".join(map(re.escape, streams)) + ")")
+            for chunk in template.generate(**context):
+                for part in markers.split(chunk):
+                    if part in streams:
+                        yield from streams[part]()
+                    elif part:
+                        yield part
+
+        yield from _buffer_chunks(chunks(), chunk_size)
+
+    def _fit_budgets(
+        self, values: Dict[str, Any]
+    ) -> Tuple[Dict[str, Any], Optional[Dict[str, int]]]:
+        """Drop the rows of the values that don't fit the variable budgets.
+
+        Args:
+            values (Dict[str, Any]): The values of the variables
+
+        Returns:
+            Tuple[Dict[str, Any], Optional[Dict[str, int]]]: The fitted values and
+                the number of rows dropped for each variable with a budget, None
+                if no variable has one
+
+        Raises:
+            VariableBudgetError: If an object value exceeds its budget
+        """
+        fitted = dict(values)
+        dropped_rows = {}
+        for variable_name, variable_type in self.variables.items():
+            if (
+                getattr(variable_type, "budget", None) is None
+                or getattr(variable_type, "is_output", False)
+                or variable_name not in values
+            ):
+                continue
+            fitted[variable_name], dropped_rows[variable_name] = (
+                variable_type.fit_budget(values[variable_name])
+            )
+        return fitted, dropped_rows or None
+
+    def _validate_values(
+        self,
+        values: Dict[str, Any],
+        validation: Optional[Union[str, ValidationPolicy]] = None,
+    ) -> None:
+        """Check that the values match the input variables of the version.
+
+        Args:
+            values (Dict[str, Any]): The values of the variables
+            validation (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of every variable
+
+        Raises:
+            VariableUnmatchError: If the values don't match the input variables
+            VariableValidationError: If a value is not valid
+        """
+        input_variables = [
+            k for k, v in self.variables.items() if not getattr(v, "is_output", False)
+        ]
+
+        if set(input_variables) != set(values.keys()):
+            raise VariableUnmatchError("The variables and the values do not match")
+
+        for variable_name in input_variables:
+            variable_type = self.variables[variable_name]
+            if not variable_type.validate(values[variable_name], validation):
+                raise VariableValidationError(
+                    f"The variable {variable_name} is not valid"
+                )
+
+    @property
+    def output_variable(self) -> Optional[Variable]:
+        """The output variable of the version, None if it has none."""
+        for variable in (self.variables or {}).values():
+            if getattr(variable, "is_output", False):
+                return variable
+        return None
+
+    def validation_policies(
+        self, validation: Optional[Union[str, ValidationPolicy]] = None
+    ) -> Optional[Dict[str, str]]:
+        """Get the validation policy applied to each input variable.
+
+        Args:
+            validation (Optional[Union[str, ValidationPolicy]]): Overrides the
+                validation policy of every variable
+
+        Returns:
+            Optional[Dict[str, str]]: The policies by variable name, None if the
+                version has no input variables
+        """
+        policies = {
+            name: str(variable._policy(validation))
+            for name, variable in (self.variables or {}).items()
+            if not getattr(variable, "is_output", False)
+        }
+        return policies or None
 
     def compare_variables(self, variables: Dict[str, Variable]) -> bool:
         """Compare the variables of the version with the variables of the new version.
 
+        Variables are compared by fingerprint, so stored variables don't have to
+        rebuild their models or regenerate their schemas.
+
         Args:
             variables (Dict[str, Variable]): The variables of the new version
 
@@ -151,7 +361,7 @@ class Version:
             return False
 
         for variable_name, variable in my_variables.items():
-            if variable.to_dict() != new_variables[variable_name].to_dict():
+            if variable.fingerprint != new_variables[variable_name].fingerprint:
                 return False
 
         return True
@@ -206,3 +416,59 @@ class Version:
             if data.get("variables")
             else None,
         )
+
+
+def _bare_output_names(content: str) -> Set[str]:
+    """Get the variables a template only outputs as a bare `{{ name }}`.
+
+    Args:
+        content (str): The template
+
+    Returns:
+        Set[str]: The names of the variables
+    """
+    ast = Environment().parse(content)
+    bare = Counter(
+        node.name
+        for output in ast.find_all(nodes.Output)
+        for node in output.nodes
+        if isinstance(node, nodes.Name)
+    )
+    used = Counter(node.name for node in ast.find_all(nodes.Name))
+    return {name for name, count in bare.items() if used[name] == count}
+
+
+def _insert_stream(
+    variable: Variable,
+    value: Any,
+    no_instructions: bool,
+    custom_instructions: str,
+) -> Callable[[], Iterator[str]]:
+    """Get a function generating the chunks of a complex variable insert."""
+    if no_instructions:
+        return lambda: iter_json(value)
+    return lambda: variable.iter_prompt_insert(
+        value, custom_instructions=custom_instructions, apply_budget=False
+    )
+
+
+def _buffer_chunks(chunks: Iterator[str], chunk_size: int) -> Iterator[str]:
+    """Join small chunks so that each yielded chunk has about chunk_size characters.
+
+    Args:
+        chunks (Iterator[str]): The chunks to join
+        chunk_size (int): The minimum size of the yielded chunks, but the last
+
+    Returns:
+        Iterator[str]: The joined chunks
+    """
+    buffer: List[str] = []
+    size = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        size += len(chunk)
+        if size >= chunk_size:
+            yield "".join(buffer)
+            buffer, size = [], 0
+    if buffer:
+        yield "".join(buffer)
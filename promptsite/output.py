@@ -0,0 +1,297 @@
+"""Parsing of structured LLM output against the output variable of a version."""
+
+import re
+from typing import Any, List, Optional
+
+from pydantic import ValidationError
+
+from . import codec
+from .exceptions import OutputParseError
+from .model.variable import ArrayVariable, ComplexVariable
+
+_FENCED_BLOCK = re.compile(r"```(?:json)?[ \t]*\r?\n?(.*?)```", re.DOTALL)
+
+_FENCE = "```"
+
+_JSON_START = frozenset('{["-0123456789tfn')
+
+_CLOSING = {"[": "]", "{": "}"}
+
+_WHITESPACE = re.compile(r"\s*")
+
+_STRUCTURAL = re.compile(r'[\[\]{}",]')
+
+_STRING_SPECIAL = re.compile(r'["\\]')
+
+
+def extract_json(text: str) -> str:
+    """Get the JSON of an LLM output, the first fenced code block if there is one.
+
+    Args:
+        text (str): The LLM output
+
+    Returns:
+        str: The JSON text
+    """
+    if _FENCE in text:
+        match = _FENCED_BLOCK.search(text)
+        if match:
+            return match.group(1)
+    return text
+
+
+class OutputParser:
+    """Parse LLM output as JSON, validated by an output variable if given.
+
+    The output can be parsed at once with `parse`, or while it is streamed with
+    `feed` and `close`. Streamed output is parsed as it arrives, so malformed
+    JSON and invalid array items raise as soon as they are received.
+
+    Attributes:
+        variable (Optional[ComplexVariable]): The output variable validating the
+            parsed value, the value is only parsed if None
+
+    Example:
+        >>> parser = OutputParser(version.output_variable)
+        >>> for chunk in stream:
+        ...     parser.feed(chunk)
+        >>> value = parser.close()
+    """
+
+    def __init__(self, variable: Optional[ComplexVariable] = None):
+        self.variable = variable
+        self._chunks: List[str] = []
+        # Streaming state, the output is scanned once and only the pieces of the
+        # current array item or object member are kept until it is complete
+        self._head = ""
+        self._preamble = False
+        self._fenced = False
+        self._started = False
+        self._done = False
+        self._stack: List[str] = []
+        self._in_string = False
+        self._escape = False
+        self._item: List[str] = []
+        self._value: Any = None
+
+    def parse(self, text: str) -> Any:
+        """Parse and validate a complete output.
+
+        Args:
+            text (str): The LLM output
+
+        Returns:
+            Any: The parsed value
+
+        Raises:
+            OutputParseError: If the output is not valid JSON or doesn't conform
+                to the output variable
+        """
+        try:
+            value = codec.loads(extract_json(text))
+        except ValueError as e:
+            raise OutputParseError(f"The output is not valid JSON: {e}") from e
+        self._validate(value)
+        return value
+
+    def feed(self, chunk: str) -> Any:
+        """Add a chunk of streamed output and parse what has been received.
+
+        A preamble before the JSON is skipped, see `_start`. Only the new chunk
+        is scanned, each array item or object member is parsed once it is
+        complete.
+
+        Args:
+            chunk (str): The next chunk of the output
+
+        Returns:
+            Any: The complete array items or object members received so far, None
+                if no JSON array or object has been received yet
+
+        Raises:
+            OutputParseError: If the output received so far can't be the start of
+                valid JSON, or an array item doesn't conform to the output variable
+        """
+        self._chunks.append(chunk)
+        if self._done:
+            return self._value
+        if not self._started:
+            chunk = self._start(chunk)
+            if chunk is None:
+                return None
+        self._scan(chunk)
+        return self._value
+
+    def close(self) -> Any:
+        """Parse and validate the complete streamed output.
+
+        Returns:
+            Any: The parsed value
+
+        Raises:
+            OutputParseError: If the output is not valid JSON or doesn't conform
+                to the output variable
+        """
+        return self.parse("".join(self._chunks))
+
+    def _start(self, chunk: str) -> Optional[str]:
+        """Find the start of the streamed JSON, skipping a preamble and a fence.
+
+        Like `extract_json`, the JSON is the first fenced block when the output
+        has a preamble, and the output itself otherwise.
+
+        Returns:
+            Optional[str]: The text after the opening bracket of the JSON, None
+                while the JSON hasn't started yet
+
+        Raises:
+            OutputParseError: If the JSON doesn't start with a valid character
+        """
+        text = self._head + chunk
+        self._head = ""
+        pos = _WHITESPACE.match(text).end()
+        if not self._fenced:
+            if self._preamble:
+                pos = text.find(_FENCE)
+                if pos == -1:
+                    # Keep the backticks that may start a fence in the next chunk
+                    self._head = text[len(text.rstrip("`")) :]
+                    return None
+            elif pos == len(text) or _FENCE.startswith(text[pos:]):
+                self._head = text[pos:]
+                return None
+            elif not text.startswith(_FENCE, pos) and text[pos] not in _CLOSING:
+                # Preambles are only skipped up to a fenced block, like in parse,
+                # and unfenced scalars are parsed once the output is closed
+                self._preamble = True
+                return self._start(text[pos:])
+
+            if text.startswith(_FENCE, pos):
+                newline = text.find("\n", pos)
+                if newline == -1:
+                    self._head = text[pos:]
+                    return None
+                self._fenced = True
+                pos = _WHITESPACE.match(text, newline + 1).end()
+
+        if pos == len(text):
+            return None
+        if text[pos] in _CLOSING:
+            return self._open(text[pos], text[pos + 1 :])
+        if text[pos] not in _JSON_START:
+            raise OutputParseError(
+                f"The output is not valid JSON: unexpected character {text[pos]!r}"
+            )
+        # A scalar value can only be parsed once the output is closed
+        self._started = self._done = True
+        return None
+
+    def _open(self, bracket: str, rest: str) -> str:
+        """Start streaming the array or object opened by a bracket."""
+        self._started = True
+        self._stack.append(bracket)
+        self._value = [] if bracket == "[" else {}
+        return rest
+
+    def _scan(self, text: str) -> None:
+        """Scan the next piece of the streamed JSON for complete items."""
+        pos = start = 0
+        while not self._done:
+            if self._in_string:
+                if self._escape:
+                    if pos >= len(text):
+                        break
+                    pos += 1
+                    self._escape = False
+                    continue
+                match = _STRING_SPECIAL.search(text, pos)
+                if match is None:
+                    break
+                pos = match.end()
+                if match.group() == "\\":
+                    self._escape = True
+                else:
+                    self._in_string = False
+                continue
+
+            match = _STRUCTURAL.search(text, pos)
+            if match is None:
+                break
+            char, pos = match.group(), match.end()
+            if char == '"':
+                self._in_string = True
+            elif char in _CLOSING:
+                self._stack.append(char)
+            elif char == ",":
+                if len(self._stack) == 1:
+                    self._add_item(text[start : pos - 1])
+                    start = pos
+            else:
+                if _CLOSING[self._stack.pop()] != char:
+                    raise OutputParseError(
+                        f"The output is not valid JSON: unexpected {char!r}"
+                    )
+                if not self._stack:
+                    self._add_item(text[start : pos - 1], last=True)
+                    self._done = True
+        if not self._done:
+            self._item.append(text[start:])
+
+    def _add_item(self, tail: str, last: bool = False) -> None:
+        """Parse a complete item of the streamed array or member of the object.
+
+        Raises:
+            OutputParseError: If the item is not valid JSON or doesn't conform to
+                the output variable
+        """
+        self._item.append(tail)
+        text = "".join(self._item).strip()
+        self._item = []
+        if not text and last and not self._value:
+            return
+
+        is_array = isinstance(self._value, list)
+        try:
+            item = codec.loads(text if is_array else f"{{{text}}}")
+        except ValueError as e:
+            raise OutputParseError(f"The output is not valid JSON: {e}") from e
+        if not is_array:
+            self._value.update(item)
+            return
+        if isinstance(self.variable, ArrayVariable):
+            self._validate_item(item, len(self._value))
+        self._value.append(item)
+
+    def _validate_item(self, item: Any, index: int) -> None:
+        """Validate an item of a streamed array against the output variable.
+
+        Raises:
+            OutputParseError: If the item doesn't conform to the output variable,
+                the error locations starting with the index of the item
+        """
+        try:
+            self.variable.adapter.validate_python([item])
+        except ValidationError as e:
+            errors = "; ".join(
+                ".".join(str(loc) for loc in (index, *error["loc"][1:]))
+                + f": {error['msg']}"
+                for error in e.errors()
+            )
+            raise OutputParseError(
+                f"The output doesn't conform to the output schema: {errors}"
+            ) from e
+
+    def _validate(self, value: Any) -> None:
+        """Validate a value against the output variable.
+
+        Raises:
+            OutputParseError: If the value doesn't conform to the output variable
+        """
+        if self.variable is None:
+            return
+        try:
+            self.variable.adapter.validate_python(value)
+        except ValidationError as e:
+            raise OutputParseError(
+                f"The output doesn't conform to the output schema: {e}"
+            ) from e
@@ -1,10 +1,79 @@
-from typing import TYPE_CHECKING, Any, Dict, List
+import copy
+from datetime import datetime
+from itertools import islice
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional
 
 import pandas as pd
 
+from . import codec
+from .exceptions import PromptNotFoundError
+from .filters import normalize, parse_filters
+from .model.prompt import Prompt
+from .model.run import Run
+from .model.version import Version
+from .stats import DEFAULT_METRICS, validate_metrics
+
 if TYPE_CHECKING:
+    import pyarrow as pa
+
     from .core import PromptSite
 
+RUN_COLUMNS = [
+    "run_id",
+    "created_at",
+    "llm_output",
+    "final_prompt",
+    "variables",
+    "execution_time",
+    "llm_config",
+    "validation",
+    "dropped_rows",
+    "run_at",
+    "prompt_id",
+    "version_id",
+]
+
+
+def _concat_column_batches(
+    batches: Iterator[Dict[str, List[Any]]],
+) -> Dict[str, List[Any]]:
+    """Concatenate columnar batches into a single set of columns.
+
+    Args:
+        batches: The columnar batches
+
+    Returns:
+        Dict[str, List[Any]]: Column names mapped to all their values
+    """
+    columns = {}
+    size = 0
+    for batch in batches:
+        batch_size = len(next(iter(batch.values()), []))
+        for column, values in batch.items():
+            columns.setdefault(column, [None] * size).extend(values)
+        size += batch_size
+        for values in columns.values():
+            if len(values) < size:
+                values.extend([None] * (size - len(values)))
+    return columns
+
+
+def _to_arrow_values(values: List[Any], column: Optional[str] = None) -> List[Any]:
+    """Convert column values into values pyarrow can store.
+
+    Timestamps are parsed into datetimes and nested values are encoded as JSON.
+
+    Args:
+        values: The values of the column
+        column: The name of the column
+
+    Returns:
+        List[Any]: The converted values
+    """
+    if column is not None:
+        values = [normalize(column, v) for v in values]
+    return [codec.dumps(v) if isinstance(v, (dict, list)) else v for v in values]
+
 
 class Query:
     """Query module for PromptSite.
@@ -29,6 +98,8 @@ class Query:
         versions_df = ps.versions.only(['version_id', 'content']).as_df()
         # Filter runs by prompt_id
         runs_df = ps.runs.where(prompt_id='prompt1').as_df()
+        # Get the slowest 100 runs of the last week
+        runs = ps.runs.where(created_at__gte=last_week).order_by('-execution_time').limit(100).all()
     """
 
     def __init__(self, ps: "PromptSite"):
@@ -39,27 +110,208 @@ class Query:
         """
         self.ps = ps
         self.columns = None
+        self.filters = []
+        self.ordering = []
+        self._limit = None
+        self._offset = 0
+        self._prompt_id = None
 
     def one(self) -> Dict[str, Any]:
-        """Get the first item in the query."""
-        return self.all()[0]
+        """Get the first item in the query.
+
+        Raises:
+            IndexError: If the query has no results
+        """
+        for row in self.iter():
+            return row
+        raise IndexError("The query returned no results")
 
     def all(self) -> List[Dict[str, Any]]:
-        """Get all prompts."""
+        """Get all results as a list of dictionaries."""
+        return list(self.iter())
+
+    def iter(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the results lazily.
+
+        Results are read from storage as they are consumed, so stopping early
+        avoids reading the remaining data.
+
+        Returns:
+            Iterator[Dict[str, Any]]: An iterator of dictionaries
+        """
         raise NotImplementedError("This method must be implemented by the subclass.")
 
+    def iter_batches(self, batch_size: int = 1000) -> Iterator[List[Dict[str, Any]]]:
+        """Iterate over the results lazily in batches.
+
+        Args:
+            batch_size: The maximum number of results in each batch
+
+        Returns:
+            Iterator[List[Dict[str, Any]]]: An iterator of lists of dictionaries
+
+        Example:
+            >>> for batch in ps.runs.iter_batches(10000):
+            ...     export(batch)
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        rows = self.iter()
+        while True:
+            batch = list(islice(rows, batch_size))
+            if not batch:
+                return
+            yield batch
+
     def only(self, columns: List[str]) -> "Query":
         """Select only the specified columns."""
         self.columns = columns
         return self
 
     def where(self, **kwargs) -> "Query":
-        """Filter the query."""
-        raise NotImplementedError("This method must be implemented by the subclass.")
+        """Filter the query.
+
+        Filters are given as `field__operator=value`, where the operator is one of
+        eq, ne, gt, gte, lt, lte, in, contains and isnull. A bare `field=value`
+        is an equality check. Calling `where` multiple times combines the filters.
+
+        Args:
+            **kwargs: The filters to apply
+
+        Returns:
+            Query: The filtered query
+
+        Example:
+            >>> ps.runs.where(created_at__gte=last_week, execution_time__gt=1.5)
+        """
+        self.filters.extend(parse_filters(**kwargs))
+        return self
+
+    def order_by(self, *fields: str) -> "Query":
+        """Order the results by the given fields.
+
+        Args:
+            *fields: The fields to order by, prefixed with "-" for descending order
+
+        Returns:
+            Query: The ordered query
+        """
+        self.ordering = list(fields)
+        return self
+
+    def limit(self, limit: int) -> "Query":
+        """Limit the number of results.
+
+        Args:
+            limit: The maximum number of results
+
+        Returns:
+            Query: The limited query
+        """
+        self._limit = limit
+        return self
+
+    def offset(self, offset: int) -> "Query":
+        """Skip the first results.
+
+        Args:
+            offset: The number of results to skip
+
+        Returns:
+            Query: The query with the offset applied
+        """
+        self._offset = offset
+        return self
+
+    def _check_prompt(self) -> None:
+        """Check that the prompt the query is scoped to exists.
+
+        Raises:
+            PromptNotFoundError: If the prompt given to `where` doesn't exist
+        """
+        if self._prompt_id is not None and not self.ps.storage.get_prompt(
+            self._prompt_id, exclude_versions=True
+        ):
+            raise PromptNotFoundError(f"Prompt '{self._prompt_id}' not found.")
+
+    def _query_args(self) -> Dict[str, Any]:
+        """Get the arguments passed to the storage backend's query method."""
+        self._check_prompt()
+        return {
+            "filters": self.filters,
+            "order_by": self.ordering,
+            "limit": self._limit,
+            "offset": self._offset,
+            "columns": self.columns,
+        }
+
+    def _project(self, data: Dict[str, Any]) -> Dict[str, Any]:
+        """Build a result row from projected raw data.
+
+        Args:
+            data: Raw data holding only the selected columns
+
+        Returns:
+            Dict[str, Any]: The row with the columns in the selected order
+        """
+        return {
+            c: str(data[c]) if isinstance(data[c], datetime) else data[c]
+            for c in self.columns
+            if c in data
+        }
+
+    def iter_column_batches(
+        self, batch_size: int = 10000
+    ) -> Iterator[Dict[str, List[Any]]]:
+        """Iterate over the results lazily in columnar batches.
+
+        Args:
+            batch_size: The maximum number of results in each batch
+
+        Returns:
+            Iterator[Dict[str, List[Any]]]: An iterator of column names mapped to
+                the values of the batch
+        """
+        for batch in self.iter_batches(batch_size):
+            columns = {}
+            for i, row in enumerate(batch):
+                for column, value in row.items():
+                    if column not in columns:
+                        columns[column] = [None] * i
+                    columns[column].append(value)
+                for values in columns.values():
+                    if len(values) == i:
+                        values.append(None)
+            yield columns
 
     def as_df(self) -> pd.DataFrame:
-        """Get the results as a pandas DataFrame."""
-        return pd.DataFrame(self.all())
+        """Get the results as a pandas DataFrame.
+
+        The DataFrame is built from columnar batches rather than a list of rows.
+        """
+        return pd.DataFrame(_concat_column_batches(self.iter_column_batches()))
+
+    def as_arrow(self, batch_size: int = 10000) -> "pa.Table":
+        """Get the results as a pyarrow Table.
+
+        Nested values such as variables and LLM configs are stored as JSON strings.
+        Requires `pyarrow` to be installed.
+
+        Args:
+            batch_size: The number of results converted at a time
+
+        Returns:
+            pa.Table: The results as a pyarrow Table
+        """
+        import pyarrow as pa
+
+        columns = _concat_column_batches(self.iter_column_batches(batch_size))
+        return pa.table(
+            {
+                column: _to_arrow_values(values, column)
+                for column, values in columns.items()
+            }
+        )
 
 
 class PromptQuery(Query):
@@ -69,42 +321,32 @@ class PromptQuery(Query):
     It allows for selecting specific columns, filtering by attributes, and retrieving the prompts.
     """
 
-    def __init__(self, ps: "PromptSite"):
-        """Initialize the query."""
-        super().__init__(ps)
-        self.prompt_id = None
-
-    def all(self) -> List[Dict[str, Any]]:
-        """Get all prompts.
+    def iter(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the prompts lazily.
 
         Returns:
-            List[Dict[str, Any]]: A list of dictionaries containing prompt data
+            Iterator[Dict[str, Any]]: An iterator of dictionaries containing prompt data
         """
-        prompt_dicts = []
-        if self.prompt_id is not None:
-            prompt_dict = self.ps.get_prompt(
-                self.prompt_id, exclude_versions=True
-            ).to_dict(**({"columns": self.columns} if self.columns else {}))
-            prompt_dicts.append(prompt_dict)
-        else:
-            for p in self.ps.list_prompts(exclude_versions=True):
-                prompt_dict = p.to_dict(
-                    **({"columns": self.columns} if self.columns else {})
-                )
-                prompt_dicts.append(prompt_dict)
-        return prompt_dicts
+        for prompt_data in self.ps.storage.query_prompts(**self._query_args()):
+            if self.columns is not None:
+                yield self._project(prompt_data)
+            else:
+                yield Prompt.from_dict(prompt_data).to_dict()
 
-    def where(self, prompt_id: str) -> "PromptQuery":
+    def where(self, prompt_id: Optional[str] = None, **kwargs) -> "PromptQuery":
         """Filter the query.
 
         Args:
             prompt_id: The ID of the prompt to filter by
+            **kwargs: Additional filters, see `Query.where`
 
         Returns:
             PromptQuery: The filtered query
         """
-        self.prompt_id = prompt_id
-        return self
+        if prompt_id is not None:
+            self._prompt_id = prompt_id
+            kwargs["id"] = prompt_id
+        return super().where(**kwargs)
 
 
 class VersionQuery(Query):
@@ -114,58 +356,43 @@ class VersionQuery(Query):
     It allows for selecting specific columns, filtering by attributes, and retrieving the versions.
     """
 
-    def __init__(self, ps: "PromptSite"):
-        """Initialize the query.
+    def iter(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the versions lazily.
 
-        Args:
-            ps: PromptSite instance
+        Returns:
+            Iterator[Dict[str, Any]]: An iterator of dictionaries for versions
         """
-        super().__init__(ps)
-        self.prompt_id = None
-        self.version_id = None
+        for version_data in self.ps.storage.query_versions(**self._query_args()):
+            if self.columns is not None:
+                yield self._project(version_data)
+                continue
+            version_dict = Version.from_dict(version_data).to_dict()
+            del version_dict["runs"]
+            version_dict["prompt_id"] = version_data["prompt_id"]
+            yield version_dict
 
-    def all(self) -> List[Dict[str, Any]]:
-        """Get all versions.
-
-        Returns:
-            List[Dict[str, Any]]: A list of dictionaries for versions
-        """
-        versions = []
-        if self.prompt_id is not None:
-            for version in self.ps.list_versions(self.prompt_id, exclude_runs=True):
-                version.prompt_id = self.prompt_id
-                versions.append(version)
-        else:
-            for prompt in self.ps.list_prompts(exclude_versions=True):
-                for version in self.ps.list_versions(prompt.id, exclude_runs=True):
-                    version.prompt_id = prompt.id
-                    versions.append(version)
-
-        version_dicts = []
-        for version in versions:
-            version_dict = version.to_dict(
-                **({"columns": self.columns} if self.columns else {})
-            )
-            if "runs" in version_dict:
-                del version_dict["runs"]
-            if self.columns is None or "prompt_id" in self.columns:
-                version_dict["prompt_id"] = version.prompt_id
-            version_dicts.append(version_dict)
-        return version_dicts
-
-    def where(self, prompt_id: str, version_id: str = None) -> "VersionQuery":
+    def where(
+        self,
+        prompt_id: Optional[str] = None,
+        version_id: Optional[str] = None,
+        **kwargs,
+    ) -> "VersionQuery":
         """Filter the query.
 
         Args:
             prompt_id: The ID of the prompt to filter by
             version_id: The ID of the version to filter by
+            **kwargs: Additional filters, see `Query.where`
 
         Returns:
             VersionQuery: The filtered query
         """
-        self.prompt_id = prompt_id
-        self.version_id = version_id
-        return self
+        if prompt_id is not None:
+            self._prompt_id = prompt_id
+            kwargs["prompt_id"] = prompt_id
+        if version_id is not None:
+            kwargs["version_id"] = version_id
+        return super().where(**kwargs)
 
 
 class RunQuery(Query):
@@ -175,58 +402,36 @@ class RunQuery(Query):
     It allows for selecting specific columns, filtering by attributes, and retrieving the runs.
     """
 
-    def __init__(self, ps: "PromptSite"):
-        """Initialize the query.
+    def iter(self) -> Iterator[Dict[str, Any]]:
+        """Iterate over the runs lazily across prompts and versions.
 
-        Args:
-            ps: PromptSite instance
-        """
-        super().__init__(ps)
-        self.prompt_id = None
-        self.version_id = None
-        self.run_id = None
+        Only the runs that are consumed are read from storage, so large run
+        histories can be exported without holding them in memory.
 
-    def all(self) -> List[Dict[str, Any]]:
-        """Get all runs.
-
-        Returns:
-            List[Dict[str, Any]]: A list of dictionaries for runs
-        """
-        if self.prompt_id is not None and self.version_id is not None:
-            runs = []
-            for run in self.ps.list_runs(self.prompt_id, self.version_id):
-                run.prompt_id = self.prompt_id
-                run.version_id = self.version_id
-                runs.append(run)
-
-        elif self.prompt_id is not None:
-            runs = []
-            for version in self.ps.list_versions(self.prompt_id, exclude_runs=True):
-                for run in self.ps.list_runs(self.prompt_id, version.version_id):
-                    run.prompt_id = self.prompt_id
-                    run.version_id = version.version_id
-                    runs.append(run)
-        else:
-            runs = []
-            for prompt in self.ps.list_prompts(exclude_versions=True):
-                for version in self.ps.list_versions(prompt.id, exclude_runs=True):
-                    for run in self.ps.list_runs(prompt.id, version.version_id):
-                        run.prompt_id = prompt.id
-                        run.version_id = version.version_id
-                        runs.append(run)
-
-        run_dicts = []
-        for r in runs:
-            run_dict = r.to_dict(**({"columns": self.columns} if self.columns else {}))
-            if self.columns is None or "prompt_id" in self.columns:
-                run_dict["prompt_id"] = r.prompt_id
-            if self.columns is None or "version_id" in self.columns:
-                run_dict["version_id"] = r.version_id
-            run_dicts.append(run_dict)
-        return run_dicts
+        Returns:
+            Iterator[Dict[str, Any]]: An iterator of dictionaries for runs
+
+        Example:
+            >>> for run in ps.runs.where("my-prompt").iter():
+            ...     print(run["run_id"])
+        """
+        for run_data in self.ps.storage.query_runs(**self._query_args()):
+            if self.columns is not None:
+                yield self._project(run_data)
+                continue
+            run_dict = Run.from_dict(run_data).to_dict()
+            run_dict["prompt_id"] = run_data["prompt_id"]
+            run_dict["version_id"] = run_data["version_id"]
+            yield run_dict
 
     def where(
-        self, prompt_id: str, version_id: str = None, run_id: str = None
+        self,
+        prompt_id: Optional[str] = None,
+        version_id: Optional[str] = None,
+        run_id: Optional[str] = None,
+        created_after: Optional[datetime] = None,
+        created_before: Optional[datetime] = None,
+        **kwargs,
     ) -> "RunQuery":
         """Filter the query.
 
@@ -234,11 +439,240 @@ class RunQuery(Query):
             prompt_id: The ID of the prompt to filter by
             version_id: The ID of the version to filter by
             run_id: The ID of the run to filter by
+            created_after: Only keep runs created at or after this time
+            created_before: Only keep runs created before this time
+            **kwargs: Additional filters, see `Query.where`
 
         Returns:
             RunQuery: The filtered query
+
+        Example:
+            >>> ps.runs.where("my-prompt", execution_time__gt=2).order_by("-execution_time").limit(100)
+            >>> ps.runs.where(created_after=datetime.now(UTC) - timedelta(days=1))
         """
-        self.prompt_id = prompt_id
-        self.version_id = version_id
-        self.run_id = run_id
-        return self
+        if prompt_id is not None:
+            self._prompt_id = prompt_id
+            kwargs["prompt_id"] = prompt_id
+        if version_id is not None:
+            kwargs["version_id"] = version_id
+        if run_id is not None:
+            kwargs["run_id"] = run_id
+        if created_after is not None:
+            kwargs["created_at__gte"] = created_after
+        if created_before is not None:
+            kwargs["created_at__lt"] = created_before
+        return super().where(**kwargs)
+
+    def last(self, n: int) -> "RunQuery":
+        """Keep only the last runs by creation time, most recent first.
+
+        Args:
+            n: The number of runs to keep
+
+        Returns:
+            RunQuery: The query ordered by descending created_at and limited to n runs
+
+        Example:
+            >>> ps.runs.where("my-prompt").last(10).all()
+        """
+        return self.order_by("-created_at").limit(n)
+
+    def aggregate(
+        self,
+        by: Optional[List[str]] = None,
+        metrics: Optional[Dict[str, List[str]]] = None,
+    ) -> pd.DataFrame:
+        """Compute statistics of the filtered runs per group.
+
+        The statistics are computed by the storage backend in a single pass
+        without materializing the runs. Percentiles are estimated with a
+        t-digest sketch. Ordering, limit and offset of the query are ignored.
+
+        Args:
+            by: The fields to group by, defaults to prompt_id and version_id
+            metrics: Metric names by numeric field, any of count, sum, mean, min,
+                max or a percentile such as p95. Defaults to count, mean, p50, p95
+                and p99 of execution_time. count only counts non-null values.
+
+        Returns:
+            pd.DataFrame: One row per group with a `<field>_<metric>` column per metric
+
+        Raises:
+            ValueError: If a metric is not supported
+
+        Example:
+            >>> ps.runs.where("my-prompt").aggregate(
+            ...     metrics={"execution_time": ["count", "mean", "p95"]}
+            ... )
+        """
+        by = list(by) if by is not None else ["prompt_id", "version_id"]
+        metrics = metrics or {"execution_time": list(DEFAULT_METRICS)}
+        validate_metrics(metrics)
+        self._check_prompt()
+
+        rows = self.ps.storage.aggregate_runs(by, metrics, filters=self.filters)
+        columns = by + [f"{f}_{m}" for f, names in metrics.items() for m in names]
+        return pd.DataFrame(rows, columns=columns)
+
+    def iter_column_batches(
+        self, batch_size: int = 10000
+    ) -> Iterator[Dict[str, List[Any]]]:
+        """Iterate over the runs lazily in columnar batches.
+
+        Columns are filled straight from the storage records without building a
+        dictionary or a Run object per run.
+
+        Args:
+            batch_size: The maximum number of runs in each batch
+
+        Returns:
+            Iterator[Dict[str, List[Any]]]: An iterator of column names mapped to
+                the values of the batch
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be a positive integer")
+        columns = self.columns or RUN_COLUMNS
+        batch = {column: [] for column in columns}
+        size = 0
+        for run_data in self.ps.storage.query_runs(**self._query_args()):
+            for column in columns:
+                value = run_data.get(column)
+                batch[column].append(
+                    str(value) if isinstance(value, datetime) else value
+                )
+            size += 1
+            if size == batch_size:
+                yield batch
+                batch = {column: [] for column in columns}
+                size = 0
+        if size:
+            yield batch
+
+    def iter_record_batches(
+        self, batch_size: int = 10000
+    ) -> Iterator["pa.RecordBatch"]:
+        """Iterate over the runs lazily as pyarrow record batches.
+
+        All batches share the same schema. Timestamps are converted to UTC
+        timestamps and nested values are stored as JSON strings.
+        Requires `pyarrow` to be installed.
+
+        Args:
+            batch_size: The maximum number of runs in each batch
+
+        Returns:
+            Iterator[pa.RecordBatch]: An iterator of record batches
+        """
+        import pyarrow as pa
+
+        schema = self.arrow_schema()
+        for columns in self.iter_column_batches(batch_size):
+            yield pa.RecordBatch.from_arrays(
+                [
+                    pa.array(_to_arrow_values(columns[f.name], f.name), type=f.type)
+                    for f in schema
+                ],
+                schema=schema,
+            )
+
+    def arrow_schema(self) -> "pa.Schema":
+        """Get the pyarrow schema of the selected run columns.
+
+        Returns:
+            pa.Schema: The schema
+        """
+        import pyarrow as pa
+
+        types = {
+            "run_id": pa.string(),
+            "created_at": pa.timestamp("us", tz="UTC"),
+            "run_at": pa.timestamp("us", tz="UTC"),
+            "final_prompt": pa.large_string(),
+            "llm_output": pa.large_string(),
+            "variables": pa.large_string(),
+            "execution_time": pa.float64(),
+            "llm_config": pa.string(),
+            "validation": pa.string(),
+            "dropped_rows": pa.string(),
+            "prompt_id": pa.string(),
+            "version_id": pa.string(),
+        }
+        return pa.schema(
+            [
+                (column, types.get(column, pa.string()))
+                for column in self.columns or RUN_COLUMNS
+            ]
+        )
+
+    def as_arrow(self, batch_size: int = 10000) -> "pa.Table":
+        """Get the runs as a pyarrow Table.
+
+        Requires `pyarrow` to be installed.
+
+        Args:
+            batch_size: The number of runs converted at a time
+
+        Returns:
+            pa.Table: The runs as a pyarrow Table
+        """
+        import pyarrow as pa
+
+        return pa.Table.from_batches(
+            self.iter_record_batches(batch_size), schema=self.arrow_schema()
+        )
+
+    def to_parquet(
+        self,
+        path: str,
+        partition_by: Optional[List[str]] = None,
+        batch_size: int = 10000,
+    ) -> None:
+        """Export the runs to a Parquet dataset.
+
+        Runs are streamed from storage in batches and written partitioned by
+        prompt_id and date (the UTC day of created_at) by default, using hive
+        style directories such as `prompt_id=my-prompt/date=2025-01-31/`.
+        Requires `pyarrow` to be installed.
+
+        Args:
+            path: The directory to write the dataset to
+            partition_by: The columns to partition by, defaults to prompt_id and date
+            batch_size: The number of runs converted at a time
+        """
+        import pyarrow as pa
+        import pyarrow.dataset as ds
+
+        partition_by = ["prompt_id", "date"] if partition_by is None else partition_by
+        query = self
+        if self.columns is not None:
+            needed = [c for c in partition_by if c != "date"]
+            if "date" in partition_by:
+                needed.append("created_at")
+            query = copy.copy(self)
+            query.columns = self.columns + [c for c in needed if c not in self.columns]
+
+        schema = query.arrow_schema()
+        if "date" in partition_by:
+            schema = schema.append(pa.field("date", pa.string()))
+
+        def batches():
+            for batch in query.iter_record_batches(batch_size):
+                if "date" in partition_by:
+                    dates = [
+                        None if ts is None else ts.date().isoformat()
+                        for ts in batch.column("created_at").to_pylist()
+                    ]
+                    batch = batch.append_column("date", pa.array(dates, pa.string()))
+                yield batch
+
+        ds.write_dataset(
+            pa.RecordBatchReader.from_batches(schema, batches()),
+            path,
+            format="parquet",
+            partitioning=ds.partitioning(
+                pa.schema([schema.field(c) for c in partition_by]), flavor="hive"
+            )
+            if partition_by
+            else None,
+            existing_data_behavior="overwrite_or_ignore",
+        )
@@ -0,0 +1,407 @@
+"""Streaming statistics used to aggregate runs without materializing them.
+
+`RunningStats` keeps exact counters (count, sum, min, max) and a t-digest sketch
+for quantiles, so statistics can be computed in a single pass and merged
+across groups or shards. `RunStats` holds the statistics kept per version.
+"""
+
+import math
+import re
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from .filters import normalize
+
+METRICS = ("count", "sum", "mean", "min", "max")
+
+DEFAULT_METRICS = ("count", "mean", "p50", "p95", "p99")
+
+_QUANTILE_METRIC = re.compile(r"^p(\d{1,2}(\.\d+)?)$")
+
+
+class TDigest:
+    """A merging t-digest sketch for estimating quantiles of a stream.
+
+    Values are buffered and periodically merged into a bounded number of
+    centroids, smaller near the tails so that extreme quantiles stay accurate.
+
+    Attributes:
+        compression (float): Controls the number of centroids kept, higher is
+            more accurate and uses more memory
+        count (float): The total weight of the values added
+        min (Optional[float]): The smallest value added
+        max (Optional[float]): The largest value added
+    """
+
+    BUFFER_SIZE = 500
+
+    def __init__(self, compression: float = 100.0):
+        self.compression = compression
+        self.count = 0.0
+        self.min: Optional[float] = None
+        self.max: Optional[float] = None
+        self._centroids: List[Tuple[float, float]] = []
+        self._buffer: List[Tuple[float, float]] = []
+
+    def add(self, value: float, weight: float = 1.0) -> None:
+        """Add a value to the sketch.
+
+        Args:
+            value (float): The value to add
+            weight (float): The weight of the value
+        """
+        value = float(value)
+        self._buffer.append((value, weight))
+        self.count += weight
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        if len(self._buffer) >= self.BUFFER_SIZE:
+            self._compress()
+
+    def merge(self, other: "TDigest") -> None:
+        """Merge another sketch into this one.
+
+        Args:
+            other (TDigest): The sketch to merge
+        """
+        if not other.count:
+            return
+        self._buffer.extend(other.centroids())
+        self.count += other.count
+        self.min = other.min if self.min is None else min(self.min, other.min)
+        self.max = other.max if self.max is None else max(self.max, other.max)
+        self._compress()
+
+    def centroids(self) -> List[Tuple[float, float]]:
+        """Get the centroids of the sketch.
+
+        Returns:
+            List[Tuple[float, float]]: Pairs of mean and weight, sorted by mean
+        """
+        self._compress()
+        return list(self._centroids)
+
+    def _q_limit(self, q: float) -> float:
+        """Get the largest quantile a centroid starting at q may extend to."""
+        angle = math.asin(2 * q - 1) + 2 * math.pi / self.compression
+        return (math.sin(min(angle, math.pi / 2)) + 1) / 2
+
+    def _compress(self) -> None:
+        """Merge the buffered values into the centroids."""
+        if not self._buffer:
+            return
+        points = sorted(self._centroids + self._buffer)
+        self._buffer = []
+        total = sum(weight for _, weight in points)
+
+        merged = []
+        seen = 0.0
+        mean, weight = points[0]
+        limit = self._q_limit(0.0)
+        for point_mean, point_weight in points[1:]:
+            if (seen + weight + point_weight) / total <= limit:
+                weight += point_weight
+                mean += (point_mean - mean) * point_weight / weight
+            else:
+                merged.append((mean, weight))
+                seen += weight
+                limit = self._q_limit(seen / total)
+                mean, weight = point_mean, point_weight
+        merged.append((mean, weight))
+        self._centroids = merged
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Estimate a quantile of the values added.
+
+        Args:
+            q (float): The quantile, between 0 and 1
+
+        Returns:
+            Optional[float]: The estimated value, or None if the sketch is empty
+        """
+        centroids = self.centroids()
+        if not centroids:
+            return None
+        if len(centroids) == 1:
+            return centroids[0][0]
+
+        target = q * self.count
+        first_mean, first_weight = centroids[0]
+        if target < first_weight / 2:
+            return self.min + (first_mean - self.min) * target / (first_weight / 2)
+
+        seen = 0.0
+        for i in range(len(centroids) - 1):
+            (left, left_weight), (right, right_weight) = centroids[i : i + 2]
+            left_center = seen + left_weight / 2
+            right_center = seen + left_weight + right_weight / 2
+            if target <= right_center:
+                fraction = (target - left_center) / (right_center - left_center)
+                return left + (right - left) * fraction
+            seen += left_weight
+
+        last_mean, last_weight = centroids[-1]
+        last_center = self.count - last_weight / 2
+        fraction = min((target - last_center) / (last_weight / 2), 1.0)
+        return last_mean + (self.max - last_mean) * fraction
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the sketch.
+
+        Returns:
+            Dict[str, Any]: The sketch as plain data
+        """
+        return {
+            "compression": self.compression,
+            "count": self.count,
+            "min": self.min,
+            "max": self.max,
+            "centroids": [list(c) for c in self.centroids()],
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "TDigest":
+        """Deserialize a sketch.
+
+        Args:
+            data (Dict[str, Any]): The sketch as returned by `to_dict`
+
+        Returns:
+            TDigest: The sketch
+        """
+        digest = cls(compression=data.get("compression", 100.0))
+        digest.count = data.get("count", 0.0)
+        digest.min = data.get("min")
+        digest.max = data.get("max")
+        digest._centroids = [tuple(c) for c in data.get("centroids", [])]
+        return digest
+
+
+def quantile_of(metric: str) -> Optional[float]:
+    """Get the quantile of a percentile metric such as "p95".
+
+    Args:
+        metric (str): The metric name
+
+    Returns:
+        Optional[float]: The quantile between 0 and 1, or None if the metric is
+            not a percentile
+    """
+    match = _QUANTILE_METRIC.match(metric)
+    return float(match.group(1)) / 100 if match else None
+
+
+def validate_metrics(metrics: Dict[str, Iterable[str]]) -> None:
+    """Check that metrics are supported.
+
+    Args:
+        metrics (Dict[str, Iterable[str]]): Metric names by field
+
+    Raises:
+        ValueError: If a metric is not supported
+    """
+    for field_name, names in metrics.items():
+        for metric in names:
+            if metric not in METRICS and quantile_of(metric) is None:
+                raise ValueError(
+                    f"Unsupported metric '{metric}' for '{field_name}', expected "
+                    f"one of {', '.join(METRICS)} or a percentile such as p95"
+                )
+
+
+@dataclass
+class RunningStats:
+    """Statistics of a numeric field that are updated one value at a time.
+
+    Attributes:
+        count (int): The number of values
+        total (float): The sum of the values
+        min (Optional[float]): The smallest value
+        max (Optional[float]): The largest value
+        digest (TDigest): The sketch used for percentiles
+    """
+
+    count: int = 0
+    total: float = 0.0
+    min: Optional[float] = None
+    max: Optional[float] = None
+    digest: TDigest = field(default_factory=TDigest)
+
+    def add(self, value: Optional[float]) -> None:
+        """Add a value, None values are ignored.
+
+        Args:
+            value (Optional[float]): The value to add
+        """
+        if value is None:
+            return
+        value = float(value)
+        self.count += 1
+        self.total += value
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+        self.digest.add(value)
+
+    def merge(self, other: "RunningStats") -> None:
+        """Merge the statistics of another stream into these.
+
+        Args:
+            other (RunningStats): The statistics to merge
+        """
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+        if other.max is not None:
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        self.digest.merge(other.digest)
+
+    @property
+    def mean(self) -> Optional[float]:
+        """The mean of the values, None if there are none."""
+        return self.total / self.count if self.count else None
+
+    def value(self, metric: str) -> Optional[float]:
+        """Get the value of a metric.
+
+        Args:
+            metric (str): One of `METRICS` or a percentile such as "p95"
+
+        Returns:
+            Optional[float]: The value of the metric, None if there are no values
+
+        Raises:
+            ValueError: If the metric is not supported
+        """
+        if metric == "count":
+            return self.count
+        if metric == "sum":
+            return self.total
+        if metric == "mean":
+            return self.mean
+        if metric == "min":
+            return self.min
+        if metric == "max":
+            return self.max
+        q = quantile_of(metric)
+        if q is None:
+            raise ValueError(f"Unsupported metric '{metric}'")
+        return self.digest.quantile(q)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the statistics.
+
+        Returns:
+            Dict[str, Any]: The statistics as plain data
+        """
+        return {
+            "count": self.count,
+            "total": self.total,
+            "min": self.min,
+            "max": self.max,
+            "digest": self.digest.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunningStats":
+        """Deserialize statistics.
+
+        Args:
+            data (Dict[str, Any]): The statistics as returned by `to_dict`
+
+        Returns:
+            RunningStats: The statistics
+        """
+        return cls(
+            count=data.get("count", 0),
+            total=data.get("total", 0.0),
+            min=data.get("min"),
+            max=data.get("max"),
+            digest=TDigest.from_dict(data.get("digest", {})),
+        )
+
+
+@dataclass
+class RunStats:
+    """Statistics of the runs of a version, updated one run at a time.
+
+    Attributes:
+        count (int): The number of runs
+        first_run_at (Optional[str]): The created_at of the earliest run
+        last_run_at (Optional[str]): The created_at of the latest run
+        execution_time (RunningStats): Statistics of the execution times
+    """
+
+    count: int = 0
+    first_run_at: Optional[str] = None
+    last_run_at: Optional[str] = None
+    execution_time: RunningStats = field(default_factory=RunningStats)
+
+    def add(self, run_data: Dict[str, Any]) -> None:
+        """Add a run.
+
+        Args:
+            run_data (Dict[str, Any]): The run data, only created_at and
+                execution_time are used
+        """
+        self.count += 1
+        self.execution_time.add(run_data.get("execution_time"))
+
+        created_at = run_data.get("created_at")
+        if created_at is None:
+            return
+        run_at = normalize("created_at", created_at)
+        if self.first_run_at is None or run_at < normalize(
+            "created_at", self.first_run_at
+        ):
+            self.first_run_at = str(created_at)
+        if self.last_run_at is None or run_at > normalize(
+            "created_at", self.last_run_at
+        ):
+            self.last_run_at = str(created_at)
+
+    def summary(self) -> Dict[str, Any]:
+        """Get the values shown for a version.
+
+        Returns:
+            Dict[str, Any]: The run count, first and last run timestamps, and the
+                mean, min, max, p50, p95 and p99 of the execution times
+        """
+        summary = {
+            "run_count": self.count,
+            "first_run_at": self.first_run_at,
+            "last_run_at": self.last_run_at,
+        }
+        for metric in ("mean", "min", "max", "p50", "p95", "p99"):
+            summary[f"execution_time_{metric}"] = self.execution_time.value(metric)
+        return summary
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the statistics.
+
+        Returns:
+            Dict[str, Any]: The statistics as plain data
+        """
+        return {
+            "count": self.count,
+            "first_run_at": self.first_run_at,
+            "last_run_at": self.last_run_at,
+            "execution_time": self.execution_time.to_dict(),
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "RunStats":
+        """Deserialize statistics.
+
+        Args:
+            data (Dict[str, Any]): The statistics as returned by `to_dict`
+
+        Returns:
+            RunStats: The statistics
+        """
+        return cls(
+            count=data.get("count", 0),
+            first_run_at=data.get("first_run_at"),
+            last_run_at=data.get("last_run_at"),
+            execution_time=RunningStats.from_dict(data.get("execution_time", {})),
+        )
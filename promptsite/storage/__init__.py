@@ -1,5 +1,6 @@
 from .base import StorageBackend
+from .bundle import BundleStorage
 from .file import FileStorage
 from .git import GitStorage
 
-__all__ = ["FileStorage", "GitStorage", "StorageBackend"]
+__all__ = ["BundleStorage", "FileStorage", "GitStorage", "StorageBackend"]
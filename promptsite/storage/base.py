@@ -1,5 +1,10 @@
 from abc import ABC, abstractmethod
-from typing import Dict, List, Optional
+from typing import Any, Dict, Iterator, List, Optional
+
+from ..exceptions import StorageError
+from ..filters import Filter, apply_query, project, scope_values
+from ..stats import RunningStats, RunStats
+from .search import search_terms
 
 
 class StorageBackend(ABC):
@@ -95,3 +100,321 @@ class StorageBackend(ABC):
             run_data: Dict - Raw run data
         """
         pass
+
+    def add_runs(self, prompt_id: str, version_id: str, runs_data: List[Dict]) -> None:
+        """
+        Add several runs to a version.
+
+        Backends that can write runs in bulk should override this method,
+        the default implementation adds them one at a time.
+        Args:
+            prompt_id: str - Prompt identifier
+            version_id: str - Version identifier
+            runs_data: List[Dict] - Raw run data
+        """
+        for run_data in runs_data:
+            self.add_run(prompt_id, version_id, run_data)
+
+    def query_prompts(
+        self,
+        filters: Optional[List[Filter]] = None,
+        order_by: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[Dict]:
+        """
+        Query raw prompt data without versions.
+
+        Backends that can evaluate filters natively should override this method,
+        the default implementation filters in memory.
+        Args:
+            filters: List[Filter] - Predicates the prompts must satisfy
+            order_by: List[str] - Fields to order by, prefixed with "-" for descending
+            limit: int - Maximum number of prompts to return
+            offset: int - Number of prompts to skip
+            columns: List[str] - Columns to return, all columns if None. Backends
+                that store columns separately should only read these.
+        Returns:
+            Iterator[Dict]: Matching prompt data
+        """
+        return project(
+            apply_query(
+                self.list_prompts(exclude_versions=True),
+                filters,
+                order_by,
+                limit,
+                offset,
+            ),
+            columns,
+        )
+
+    def query_versions(
+        self,
+        filters: Optional[List[Filter]] = None,
+        order_by: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[Dict]:
+        """
+        Query raw version data without runs, each annotated with its prompt_id.
+
+        Backends that can evaluate filters natively should override this method,
+        the default implementation filters in memory.
+        Args:
+            filters: List[Filter] - Predicates the versions must satisfy
+            order_by: List[str] - Fields to order by, prefixed with "-" for descending
+            limit: int - Maximum number of versions to return
+            offset: int - Number of versions to skip
+            columns: List[str] - Columns to return, all columns if None. Backends
+                that store columns separately should only read these.
+        Returns:
+            Iterator[Dict]: Matching version data
+        """
+        filters = filters or []
+
+        def records():
+            for prompt_id in self._scoped_prompt_ids(filters):
+                for version in self.list_versions(prompt_id, exclude_runs=True):
+                    yield {**version, "prompt_id": prompt_id}
+
+        return project(
+            apply_query(records(), filters, order_by, limit, offset), columns
+        )
+
+    def query_runs(
+        self,
+        filters: Optional[List[Filter]] = None,
+        order_by: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[Dict]:
+        """
+        Query raw run data, each annotated with its prompt_id and version_id.
+
+        Backends that can evaluate filters natively should override this method,
+        the default implementation filters in memory.
+        Args:
+            filters: List[Filter] - Predicates the runs must satisfy
+            order_by: List[str] - Fields to order by, prefixed with "-" for descending
+            limit: int - Maximum number of runs to return
+            offset: int - Number of runs to skip
+            columns: List[str] - Columns to return, all columns if None. Backends
+                that store columns separately should only read these.
+        Returns:
+            Iterator[Dict]: Matching run data
+        """
+        filters = filters or []
+        version_ids = scope_values(filters, "version_id")
+
+        def records():
+            for prompt_id in self._scoped_prompt_ids(filters):
+                for version in self.list_versions(prompt_id, exclude_runs=True):
+                    version_id = version["version_id"]
+                    if version_ids is not None and version_id not in version_ids:
+                        continue
+                    for run in self.list_runs(prompt_id, version_id):
+                        yield {**run, "prompt_id": prompt_id, "version_id": version_id}
+
+        return project(
+            apply_query(records(), filters, order_by, limit, offset), columns
+        )
+
+    def get_run_stats(self, prompt_id: str, version_id: str) -> Dict[str, Any]:
+        """
+        Get the statistics of the runs of a version.
+
+        Backends that maintain the statistics as runs are added should override
+        this method, the default implementation computes them from the runs.
+        Args:
+            prompt_id: str - The ID of the prompt
+            version_id: str - The ID of the version
+        Returns:
+            Dict[str, Any]: The statistics, see `promptsite.stats.RunStats.to_dict`
+        """
+        stats = RunStats()
+        for run in self.list_runs(prompt_id, version_id):
+            stats.add(run)
+        return stats.to_dict()
+
+    def rebuild_run_stats(self, prompt_id: str, version_id: str) -> Dict[str, Any]:
+        """
+        Recompute the statistics of the runs of a version from the runs.
+        Args:
+            prompt_id: str - The ID of the prompt
+            version_id: str - The ID of the version
+        Returns:
+            Dict[str, Any]: The statistics, see `promptsite.stats.RunStats.to_dict`
+        """
+        return StorageBackend.get_run_stats(self, prompt_id, version_id)
+
+    def aggregate_runs(
+        self,
+        by: List[str],
+        metrics: Dict[str, List[str]],
+        filters: Optional[List[Filter]] = None,
+    ) -> List[Dict[str, Any]]:
+        """
+        Compute statistics of run fields per group of runs.
+
+        Backends that can aggregate natively (e.g. in SQL) should override this
+        method, the default implementation makes a single streaming pass over
+        the runs and estimates percentiles with a t-digest sketch.
+        Args:
+            by: List[str] - Fields to group the runs by
+            metrics: Dict[str, List[str]] - Metric names by numeric field, see
+                `promptsite.stats.RunningStats.value`
+            filters: List[Filter] - Predicates the runs must satisfy
+        Returns:
+            List[Dict[str, Any]]: One row per group with the group fields and a
+                `<field>_<metric>` value per metric
+        """
+        groups: Dict[tuple, Dict[str, RunningStats]] = {}
+        columns = list(dict.fromkeys([*by, *metrics]))
+        for run in self.query_runs(filters=filters, columns=columns):
+            key = tuple(run.get(field) for field in by)
+            if key not in groups:
+                groups[key] = {field: RunningStats() for field in metrics}
+            for field, stats in groups[key].items():
+                stats.add(run.get(field))
+
+        rows = []
+        for key, stats in groups.items():
+            row = {field: key[i] for i, field in enumerate(by)}
+            for field, names in metrics.items():
+                for metric in names:
+                    row[f"{field}_{metric}"] = stats[field].value(metric)
+            rows.append(row)
+        return rows
+
+    def search(
+        self,
+        text: str,
+        scope: str = "runs",
+        prompt_id: Optional[str] = None,
+        limit: Optional[int] = 20,
+    ) -> List[Dict[str, Any]]:
+        """
+        Search version contents or run prompts and outputs for text.
+
+        Backends that maintain a full-text index should override this method,
+        the default implementation scans every version or run and matches the
+        terms case-insensitively.
+        Args:
+            text: str - The search text, every term must match
+            scope: str - "versions" or "runs"
+            prompt_id: str - Only search the versions or runs of a prompt
+            limit: int - The maximum number of results
+        Returns:
+            List[Dict[str, Any]]: The matches with their IDs and a snippet of the
+                matching text
+        """
+        terms = [term.lower() for term in search_terms(text)]
+        if not terms:
+            return []
+
+        filters = [] if prompt_id is None else [Filter("prompt_id", "eq", prompt_id)]
+        if scope == "versions":
+            records = self.query_versions(filters=filters)
+            fields, keys = ["content"], ["prompt_id", "version_id"]
+        else:
+            records = self.query_runs(filters=filters)
+            fields = ["final_prompt", "llm_output"]
+            keys = ["prompt_id", "version_id", "run_id", "created_at"]
+
+        results = []
+        for record in records:
+            texts = [str(record.get(f) or "") for f in fields]
+            matching = next(
+                (t for t in texts if all(term in t.lower() for term in terms)), None
+            )
+            if matching is None:
+                continue
+            start = max(matching.lower().index(terms[0]) - 40, 0)
+            snippet = matching[start : start + 120]
+            results.append({**{k: record.get(k) for k in keys}, "snippet": snippet})
+            if limit is not None and len(results) >= limit:
+                break
+        return results
+
+    def save_dataset(
+        self,
+        dataset_id: str,
+        dataset_data: Dict[str, Any],
+        rows: Any,
+        format: Optional[str] = None,
+    ) -> None:
+        """
+        Save a dataset, replacing it if it exists.
+
+        Backends that can store datasets should override this method and
+        `get_dataset`, `list_datasets` and `delete_dataset`.
+        Args:
+            dataset_id: str - The ID of the dataset
+            dataset_data: Dict[str, Any] - The dataset metadata, see
+                `promptsite.model.dataset.Dataset.to_dict`
+            rows: Any - The rows, a list of dicts or a pyarrow Table
+            format: str - The file format of the rows, see
+                `promptsite.storage.dataset.DATASET_FORMATS`
+        Raises:
+            StorageError: If the backend doesn't store datasets
+        """
+        raise StorageError(f"{self.__class__.__name__} doesn't store datasets")
+
+    def get_dataset(self, dataset_id: str) -> Optional[Dict[str, Any]]:
+        """
+        Get a dataset.
+        Args:
+            dataset_id: str - The ID of the dataset
+        Returns:
+            Optional[Dict[str, Any]]: The dataset metadata with its rows under
+                "rows", None if the dataset doesn't exist
+        """
+        return None
+
+    def list_datasets(self) -> List[str]:
+        """
+        List the IDs of the stored datasets.
+        Returns:
+            List[str]: The dataset IDs
+        """
+        return []
+
+    def delete_dataset(self, dataset_id: str) -> None:
+        """
+        Delete a dataset.
+        Args:
+            dataset_id: str - The ID of the dataset
+        Raises:
+            StorageError: If the backend doesn't store datasets
+        """
+        raise StorageError(f"{self.__class__.__name__} doesn't store datasets")
+
+    def close(self) -> None:
+        """
+        Release the resources held by the backend, such as worker pools.
+
+        The default implementation holds none.
+        """
+        return None
+
+    def __enter__(self) -> "StorageBackend":
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+    def _scoped_prompt_ids(self, filters: List[Filter]) -> List[str]:
+        """
+        Get the prompt IDs a query needs to read.
+        Args:
+            filters: List[Filter] - Predicates of the query
+        Returns:
+            List[str]: The prompt IDs restricted by the filters, or all prompt IDs
+        """
+        prompt_ids = scope_values(filters, "prompt_id")
+        if prompt_ids is not None:
+            return sorted(prompt_ids)
+        return [p["id"] for p in self.list_prompts(exclude_versions=True)]
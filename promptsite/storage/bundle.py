@@ -0,0 +1,219 @@
+"""Bundle-based storage implementations for promptsite."""
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from .. import codec
+from ..exceptions import StorageError
+from .base import StorageBackend
+
+BUNDLE_FORMAT = "promptsite-bundle"
+BUNDLE_FORMAT_VERSION = 1
+
+
+def _is_msgpack(path: str, format: Optional[str] = None) -> bool:
+    """Check whether a bundle path should be handled as msgpack.
+
+    Args:
+        path (str): Path to the bundle file
+        format (Optional[str]): Explicit bundle format, "json" or "msgpack"
+
+    Returns:
+        bool: True if the bundle is msgpack encoded, False for JSON
+    """
+    if format is not None:
+        return format == "msgpack"
+    return str(path).endswith((".msgpack", ".mpk"))
+
+
+def write_bundle(
+    path: str, prompts: List[Dict[str, Any]], format: Optional[str] = None
+) -> None:
+    """Write a snapshot bundle to a single file.
+
+    Args:
+        path (str): Path of the bundle file to write
+        prompts (List[Dict[str, Any]]): Raw prompt data, each with a `versions` list
+            holding the pinned versions (without runs)
+        format (Optional[str]): "json" or "msgpack", inferred from the file
+            extension if not provided
+    """
+    bundle = {
+        "format": BUNDLE_FORMAT,
+        "format_version": BUNDLE_FORMAT_VERSION,
+        "created_at": str(datetime.now().astimezone()),
+        "prompts": prompts,
+    }
+
+    if _is_msgpack(path, format):
+        import msgpack
+
+        payload = msgpack.packb(bundle, default=str)
+    else:
+        payload = codec.dumps_bytes(bundle, default=str)
+
+    with open(path, "wb") as f:
+        f.write(payload)
+
+
+def read_bundle(path: str, format: Optional[str] = None) -> Dict[str, Any]:
+    """Read a snapshot bundle with a single file read.
+
+    Args:
+        path (str): Path of the bundle file
+        format (Optional[str]): "json" or "msgpack", inferred from the file
+            extension if not provided
+
+    Returns:
+        Dict[str, Any]: The decoded bundle
+
+    Raises:
+        StorageError: If the file is not a promptsite bundle
+    """
+    with open(path, "rb") as f:
+        payload = f.read()
+
+    if _is_msgpack(path, format):
+        import msgpack
+
+        bundle = msgpack.unpackb(payload)
+    else:
+        bundle = codec.loads(payload)
+
+    if not isinstance(bundle, dict) or bundle.get("format") != BUNDLE_FORMAT:
+        raise StorageError(f"{path} is not a promptsite bundle")
+    if bundle.get("format_version", 0) > BUNDLE_FORMAT_VERSION:
+        raise StorageError(
+            f"Bundle format version {bundle['format_version']} is not supported"
+        )
+    return bundle
+
+
+@dataclass
+class BundleStorage(StorageBackend):
+    """Read-only storage implementation backed by a snapshot bundle.
+
+    A bundle packs one pinned version of every prompt, with its variable schemas
+    already resolved, into a single file. The whole file is read once on
+    initialization and served from memory, so no per-prompt file access or model
+    code generation happens on startup.
+
+    Attributes:
+        path (str): Path to the bundle file
+        format (Optional[str]): "json" or "msgpack", inferred from the file
+            extension if not provided
+
+    Example:
+        >>> storage = BundleStorage(path="prompts.bundle.json")
+        >>> storage.get_prompt("my-prompt")
+    """
+
+    path: str
+    format: Optional[str] = None
+
+    def __post_init__(self):
+        bundle = read_bundle(self.path, self.format)
+        self.created_at = bundle.get("created_at")
+        self._prompts = {prompt["id"]: prompt for prompt in bundle["prompts"]}
+
+    def _read_only(self) -> None:
+        """Reject a write operation.
+
+        Raises:
+            StorageError: Always, bundles are read-only
+        """
+        raise StorageError("Bundle storage is read-only")
+
+    def create_prompt(self, prompt_id: str, prompt_data: Dict) -> None:
+        """Bundles are read-only."""
+        self._read_only()
+
+    def update_prompt(self, prompt_id: str, prompt_data: Dict) -> None:
+        """Bundles are read-only."""
+        self._read_only()
+
+    def delete_prompt(self, prompt_id: str) -> None:
+        """Bundles are read-only."""
+        self._read_only()
+
+    def add_version(self, prompt_id: str, version_data: Dict) -> None:
+        """Bundles are read-only."""
+        self._read_only()
+
+    def add_run(self, prompt_id: str, version_id: str, run_data: Dict) -> None:
+        """Bundles are read-only."""
+        self._read_only()
+
+    def get_prompt(
+        self, prompt_id: str, exclude_versions: bool = False
+    ) -> Optional[Dict]:
+        """Get prompt data including the pinned version.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            exclude_versions (bool): Whether to exclude versions from the prompt data
+
+        Returns:
+            Optional[Dict]: The prompt data or None if the prompt is not in the bundle
+        """
+        prompt = self._prompts.get(prompt_id)
+        if prompt is None:
+            return None
+
+        data = {k: v for k, v in prompt.items() if k != "versions"}
+        if not exclude_versions:
+            data["versions"] = self.list_versions(prompt_id)
+        return data
+
+    def list_prompts(self, exclude_versions: bool = False) -> List[Dict]:
+        """List all prompts in the bundle.
+
+        Args:
+            exclude_versions (bool): Whether to exclude versions from the prompt data
+
+        Returns:
+            List[Dict]: List of prompt data
+        """
+        return [
+            self.get_prompt(prompt_id, exclude_versions=exclude_versions)
+            for prompt_id in self._prompts
+        ]
+
+    def get_version(self, prompt_id: str, version_id: str) -> Optional[Dict]:
+        """Get a pinned version of a prompt.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+
+        Returns:
+            Optional[Dict]: The version data or None if not in the bundle
+        """
+        for version in self.list_versions(prompt_id):
+            if version["version_id"] == version_id:
+                return version
+        return None
+
+    def list_versions(self, prompt_id: str, exclude_runs: bool = False) -> List[Dict]:
+        """List the pinned versions of a prompt.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            exclude_runs (bool): Kept for interface compatibility, bundles hold no runs
+
+        Returns:
+            List[Dict]: List of version data
+        """
+        prompt = self._prompts.get(prompt_id)
+        if prompt is None:
+            return []
+        return [{**version, "runs": []} for version in prompt.get("versions", [])]
+
+    def list_runs(self, prompt_id: str, version_id: str) -> List[Dict]:
+        """Bundles hold no runs.
+
+        Returns:
+            List[Dict]: Always an empty list
+        """
+        return []
@@ -0,0 +1,149 @@
+"""Reading and writing dataset rows in columnar or line-delimited files."""
+
+import os
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Union
+
+from .. import codec
+from ..exceptions import StorageError
+
+if TYPE_CHECKING:
+    import pyarrow as pa
+
+DATASET_FORMATS = ("arrow", "parquet", "jsonl")
+
+DATASET_FILES = {
+    "arrow": "data.arrow",
+    "parquet": "data.parquet",
+    "jsonl": "data.jsonl",
+}
+
+
+def default_dataset_format() -> str:
+    """Get the format datasets are saved in when none is given.
+
+    Returns:
+        str: "arrow" when pyarrow is installed, "jsonl" otherwise
+    """
+    try:
+        import pyarrow  # noqa: F401
+    except ImportError:
+        return "jsonl"
+    return "arrow"
+
+
+def _check_format(format: str) -> None:
+    """Check that a dataset format is supported.
+
+    Raises:
+        ValueError: If the format is not one of `DATASET_FORMATS`
+    """
+    if format not in DATASET_FORMATS:
+        raise ValueError(
+            f"Unsupported dataset format '{format}', "
+            f"expected one of {', '.join(DATASET_FORMATS)}"
+        )
+
+
+def rows_to_table(rows: List[Dict[str, Any]]) -> "pa.Table":
+    """Convert rows to a pyarrow Table, with a column per field of any row.
+
+    `pa.Table.from_pylist` only takes the fields of the first row, so fields
+    that are missing from it would be dropped. Missing values are null.
+
+    Args:
+        rows (List[Dict[str, Any]]): The rows
+
+    Returns:
+        pa.Table: The pyarrow Table of the rows
+    """
+    import pyarrow as pa
+
+    fields = dict.fromkeys(key for row in rows for key in row)
+    return pa.Table.from_pydict(
+        {field: [row.get(field) for row in rows] for field in fields}
+    )
+
+
+def write_dataset_rows(
+    path: str, rows: Any, format: str, json_codec: Optional[codec.JsonCodec] = None
+) -> None:
+    """Write the rows of a dataset to a file.
+
+    Args:
+        path (str): Path of the file to write
+        rows (Any): The rows, a list of dicts or a pyarrow Table
+        format (str): One of `DATASET_FORMATS`
+        json_codec (Optional[codec.JsonCodec]): Encodes "jsonl" rows, the codec
+            in use if None
+
+    Raises:
+        ValueError: If the format is not supported
+    """
+    _check_format(format)
+    tmp_path = f"{path}.tmp"
+
+    if format == "jsonl":
+        json_codec = json_codec or codec.get_codec()
+        if not isinstance(rows, list):
+            rows = rows.to_pylist()
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            for row in rows:
+                f.write(json_codec.dumps(row, default=str) + "\n")
+    else:
+        import pyarrow as pa
+
+        table = rows if isinstance(rows, pa.Table) else rows_to_table(rows)
+        if format == "parquet":
+            import pyarrow.parquet as pq
+
+            pq.write_table(table, tmp_path)
+        else:
+            with pa.OSFile(tmp_path, "wb") as sink:
+                with pa.ipc.new_file(sink, table.schema) as writer:
+                    writer.write_table(table)
+
+    # Readers never see a partially written file
+    os.replace(tmp_path, path)
+
+
+def read_dataset_rows(
+    path: str, format: str, json_codec: Optional[codec.JsonCodec] = None
+) -> Union[List[Dict[str, Any]], Any]:
+    """Read the rows of a dataset from a file.
+
+    Arrow IPC files are memory-mapped, so rows are only read from disk when
+    they are accessed.
+
+    Args:
+        path (str): Path of the file
+        format (str): One of `DATASET_FORMATS`
+        json_codec (Optional[codec.JsonCodec]): Decodes "jsonl" rows, the codec
+            in use if None
+
+    Returns:
+        Union[List[Dict[str, Any]], pa.Table]: The rows, a pyarrow Table for the
+            "arrow" and "parquet" formats
+
+    Raises:
+        ValueError: If the format is not supported
+        StorageError: If the format requires pyarrow and it is not installed
+    """
+    _check_format(format)
+
+    if format == "jsonl":
+        json_codec = json_codec or codec.get_codec()
+        with open(path, "r", encoding="utf-8") as f:
+            return [json_codec.loads(line) for line in f if line.strip()]
+
+    try:
+        import pyarrow as pa
+    except ImportError as e:
+        raise StorageError(
+            f"Reading {format} datasets requires pyarrow to be installed"
+        ) from e
+
+    if format == "parquet":
+        import pyarrow.parquet as pq
+
+        return pq.read_table(path, memory_map=True)
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
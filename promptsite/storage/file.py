@@ -1,13 +1,75 @@
 """File-based storage implementations for promptsite."""
 
+import hashlib
+import heapq
+import multiprocessing
 import os
+import threading
+from bisect import bisect_left
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
 from dataclasses import dataclass
 from datetime import datetime
-from typing import Dict, List, Optional
+from itertools import islice
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Tuple
 
 import yaml
 
+from .. import codec
+from ..filters import (
+    UTC,
+    Filter,
+    apply_query,
+    normalize,
+    parse_order_by,
+    project,
+    range_bounds,
+    required_fields,
+    scope_values,
+)
+from ..stats import RunStats
 from .base import StorageBackend
+from .dataset import (
+    DATASET_FILES,
+    default_dataset_format,
+    read_dataset_rows,
+    write_dataset_rows,
+)
+from .search import SearchIndex, fts5_available
+
+RUN_INDEX_FILE = "runs.index.jsonl"
+RUN_INDEX_COLUMNS = ("run_id", "created_at", "run_at", "execution_time", "llm_config")
+RUN_STATS_FILE = "stats.yaml"
+RUN_TIME_INDEX_FILE = "runs.time.tsv"
+RUN_READ_CHUNK_SIZE = 256
+RUN_PARSE_CHUNK_SIZE = 512
+DATASET_FILE = "dataset.yaml"
+
+_YAML_LOADER = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+def _time_index_header(signature: str) -> str:
+    """Get the first line of a time index, with the signature of its runs."""
+    return f"# {signature}\n"
+
+
+def _parse_yaml_files(paths: List[str]) -> List[Optional[Dict]]:
+    """Read and parse a chunk of YAML files in a worker process.
+
+    Args:
+        paths (List[str]): Paths of the YAML files
+
+    Returns:
+        List[Optional[Dict]]: The parsed data of each file, None if not found
+    """
+    records = []
+    for path in paths:
+        try:
+            with open(path, "r") as f:
+                records.append(yaml.load(f, Loader=_YAML_LOADER))
+        except FileNotFoundError:
+            records.append(None)
+    return records
 
 
 @dataclass
@@ -18,10 +80,43 @@ class FileStorage(StorageBackend):
     - prompts/<prompt_id>/prompt.yaml: Stores prompt metadata
     - prompts/<prompt_id>/versions/<version_id>/version.yaml: Stores version data
     - prompts/<prompt_id>/versions/<version_id>/runs/<run_id>.yaml: Stores run data
+    - prompts/<prompt_id>/versions/<version_id>/runs.index.jsonl: Stores the small
+      run columns (IDs, timestamps, execution time, LLM config) one line per run,
+      so queries on them don't parse the prompts and outputs
+    - prompts/<prompt_id>/versions/<version_id>/stats.yaml: Stores the run count,
+      execution time statistics and first/last run timestamps of a version,
+      updated as runs are added
+    - datasets/<dataset_id>/dataset.yaml: Stores dataset metadata
+    - datasets/<dataset_id>/data.arrow: Stores dataset rows as an Arrow IPC file,
+      or data.parquet or data.jsonl depending on the format
+
+    Every prompt also has a time index,
+    prompts/<prompt_id>/runs.time.tsv, with one `created_at, version_id, run_id`
+    line per run, so date range and "last N runs" queries only open the run
+    files they return. Its header holds a signature of the modification times
+    of the run directories, so it is checked without listing the runs.
+
+    Version contents and run prompts and outputs are searched through a SQLite
+    FTS5 index at index/search.db, built on the first search and then kept up
+    to date as versions and runs are written.
+
+    Directory listings and file reads of bulk loads are fanned out over a thread
+    pool, since they are dominated by I/O latency on network file systems. For
+    large histories, run files can also be parsed in chunks by a process pool so
+    that YAML parsing isn't serialized by the GIL. Call `close`, or use the
+    storage as a context manager, to shut the pools down.
 
     Attributes:
         base_path (str): Base directory for storing all prompt data
+        max_workers (Optional[int]): Number of threads used to read files in
+            parallel, the ThreadPoolExecutor default if None, 1 to read serially
+        parse_processes (Optional[int]): Number of worker processes used to parse
+            run files, disabled if None or 0
+        json_codec (Optional[str]): The JSON codec of the run indexes and JSONL
+            datasets of this storage, see `promptsite.codec.make_codec`. The
+            process-wide codec if None
         prompts_dir (str): Directory containing all prompt data
+        datasets_dir (str): Directory containing all dataset data
 
     Example:
         >>> storage = FileStorage(base_path="/path/to/storage")
@@ -29,11 +124,137 @@ class FileStorage(StorageBackend):
     """
 
     base_path: str
+    max_workers: Optional[int] = None
+    parse_processes: Optional[int] = None
+    json_codec: Optional[str] = None
 
     def __post_init__(self):
         # Ensure prompts directory exists
         self.prompts_dir = os.path.join(self.base_path, "prompts")
         os.makedirs(self.prompts_dir, exist_ok=True)
+        self.datasets_dir = os.path.join(self.base_path, "datasets")
+        self._executor = None
+        self._process_pool = None
+        self._executor_lock = threading.Lock()
+        # Parsed time indexes by prompt, with the signature of the prompt's runs
+        # and the modification time of the index they were read at
+        self._time_indexes: Dict[str, Tuple[Any, List[Tuple[str, str, str]]]] = {}
+        self._codec = (
+            codec.make_codec(self.json_codec) if self.json_codec is not None else None
+        )
+        self.search_index = SearchIndex(
+            os.path.join(self.base_path, "index", "search.db")
+        )
+
+    def _map(self, fn: Callable[[Any], Any], items: Iterable[Any]) -> List[Any]:
+        """Apply a function to items over the thread pool, preserving their order.
+
+        Only leaf reads are submitted to the pool, callers never run `_map`
+        inside a worker so that nested calls can't exhaust the pool.
+
+        Args:
+            fn (Callable[[Any], Any]): The function to apply
+            items (Iterable[Any]): The items to apply the function to
+
+        Returns:
+            List[Any]: The results in the order of the items
+        """
+        items = list(items)
+        if len(items) < 2 or self.max_workers == 1:
+            return [fn(item) for item in items]
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="promptsite-io"
+                )
+        return list(self._executor.map(fn, items))
+
+    def _get_codec(self) -> codec.JsonCodec:
+        """Get the JSON codec of the storage, the process-wide one if not set."""
+        return self._codec or codec.get_codec()
+
+    def close(self) -> None:
+        """Shut down the thread and process pools, waiting for running tasks.
+
+        The pools are created again if the storage is used after being closed.
+        """
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+            process_pool, self._process_pool = self._process_pool, None
+        if executor is not None:
+            executor.shutdown()
+        if process_pool is not None:
+            process_pool.shutdown()
+
+    def _parse_run_files(self, paths: List[str]) -> Iterator[Optional[Dict]]:
+        """Read and parse run files in order.
+
+        Without a process pool, the files are read over the thread pool one chunk
+        at a time. With `parse_processes`, chunks are parsed by worker processes
+        while a bounded number of chunks is kept in flight ahead of the consumer.
+
+        Args:
+            paths (List[str]): Paths of the run files
+
+        Returns:
+            Iterator[Optional[Dict]]: The run data of each file, None if not found
+        """
+        if not self.parse_processes or len(paths) <= RUN_PARSE_CHUNK_SIZE:
+            for start in range(0, len(paths), RUN_READ_CHUNK_SIZE):
+                yield from self._map(
+                    self._read_yaml, paths[start : start + RUN_READ_CHUNK_SIZE]
+                )
+            return
+
+        with self._executor_lock:
+            if self._process_pool is None:
+                # Forking a process that runs I/O threads can deadlock the
+                # children, start them fresh instead
+                self._process_pool = ProcessPoolExecutor(
+                    max_workers=self.parse_processes,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+        chunks = (
+            paths[start : start + RUN_PARSE_CHUNK_SIZE]
+            for start in range(0, len(paths), RUN_PARSE_CHUNK_SIZE)
+        )
+        pending = deque()
+        for chunk in chunks:
+            pending.append(self._process_pool.submit(_parse_yaml_files, chunk))
+            if len(pending) >= self.parse_processes * 2:
+                yield from pending.popleft().result()
+        while pending:
+            yield from pending.popleft().result()
+
+    def _list_dirs(self, path: str) -> List[os.DirEntry]:
+        """List the subdirectories of a directory.
+
+        Args:
+            path (str): Path of the directory
+
+        Returns:
+            List[os.DirEntry]: The subdirectories, empty if the directory doesn't exist
+        """
+        try:
+            with os.scandir(path) as entries:
+                return [entry for entry in entries if entry.is_dir()]
+        except FileNotFoundError:
+            return []
+
+    def _list_files(self, path: str) -> List[str]:
+        """List the paths of the files in a directory.
+
+        Args:
+            path (str): Path of the directory
+
+        Returns:
+            List[str]: The file paths, empty if the directory doesn't exist
+        """
+        try:
+            with os.scandir(path) as entries:
+                return [entry.path for entry in entries if entry.is_file()]
+        except FileNotFoundError:
+            return []
 
     def _ensure_path_exists(self, path: str) -> None:
         """Ensure the directory path exists.
@@ -168,22 +389,26 @@ class FileStorage(StorageBackend):
         self, prompt_id: str, exclude_versions: bool = False
     ) -> Optional[Dict]:
         """Get prompt data including versions."""
-        prompt_path = os.path.join(self.prompts_dir, prompt_id, "prompt.yaml")
-        try:
-            with open(prompt_path, "r") as f:
-                data = yaml.safe_load(f)
-                # Get versions from list_versions
-                if not exclude_versions:
-                    data["versions"] = self.list_versions(prompt_id)
-                    # Convert version data back to proper datetime objects
-                    for version in data["versions"]:
-                        if isinstance(version["created_at"], str):
-                            version["created_at"] = datetime.fromisoformat(
-                                version["created_at"].replace("Z", "+00:00")
-                            )
-                return data
-        except FileNotFoundError:
-            return None
+        data = self._read_yaml(os.path.join(self.prompts_dir, prompt_id, "prompt.yaml"))
+        if data is not None and not exclude_versions:
+            data["versions"] = self._parse_version_dates(self.list_versions(prompt_id))
+        return data
+
+    def _parse_version_dates(self, versions: List[Dict]) -> List[Dict]:
+        """Convert the created_at of versions back to datetime objects.
+
+        Args:
+            versions (List[Dict]): Version data
+
+        Returns:
+            List[Dict]: The same version data
+        """
+        for version in versions:
+            if isinstance(version["created_at"], str):
+                version["created_at"] = datetime.fromisoformat(
+                    version["created_at"].replace("Z", "+00:00")
+                )
+        return versions
 
     def update_prompt(self, prompt_id: str, prompt_data: Dict) -> None:
         """Update an existing prompt's metadata and versions.
@@ -246,6 +471,9 @@ class FileStorage(StorageBackend):
 
             shutil.rmtree(path)
 
+        if self._search_index_enabled():
+            self.search_index.delete_prompt(prompt_id)
+
     def add_version(self, prompt_id: str, version_data: Dict) -> None:
         """Add a new version to an existing prompt.
 
@@ -282,6 +510,9 @@ class FileStorage(StorageBackend):
         with open(os.path.join(version_path, "version.yaml"), "w") as f:
             yaml.safe_dump(serializable_data, f, sort_keys=False)
 
+        if self._search_index_enabled():
+            self.search_index.add_version(prompt_id, serializable_data)
+
         # Add run files for each run in version data
         for run in version_data.get("runs", []):
             self.add_run(prompt_id, version_data["version_id"], run)
@@ -299,10 +530,421 @@ class FileStorage(StorageBackend):
         Note:
             Creates the runs directory if it doesn't exist
         """
-        run_path = self._get_run_path(prompt_id, version_id, run_data["run_id"])
+        self._write_runs(prompt_id, version_id, [run_data])
+
+    def add_runs(self, prompt_id: str, version_id: str, runs_data: List[Dict]) -> None:
+        """Add several runs to a specific version of a prompt at once.
+
+        The run files are written one by one, the run index, statistics, time
+        index and search index are updated once for all of them.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+            runs_data (List[Dict]): Run data to store, each with a run_id
+        """
+        if runs_data:
+            self._write_runs(prompt_id, version_id, runs_data)
+
+    def _write_runs(
+        self, prompt_id: str, version_id: str, runs_data: List[Dict]
+    ) -> None:
+        """Write run files and add the runs to the indexes of their version.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+            runs_data (List[Dict]): Run data to store
+        """
+        signature = self._time_index_signature(prompt_id)
+        for run_data in runs_data:
+            run_path = self._get_run_path(prompt_id, version_id, run_data["run_id"])
+            with open(run_path, "w") as f:
+                yaml.safe_dump(run_data, f, sort_keys=False)
+
+        self._append_run_index(prompt_id, version_id, runs_data)
+        self._update_run_stats(prompt_id, version_id, runs_data)
+        self._append_time_index(prompt_id, version_id, runs_data, signature)
+        if self._search_index_enabled():
+            self.search_index.add_runs(prompt_id, version_id, runs_data)
+
+    def _get_run_index_path(self, prompt_id: str, version_id: str) -> str:
+        """Get the full path for the run index of a version.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+
+        Returns:
+            str: Full path to the run index file
+        """
+        return os.path.join(
+            self._get_version_path(prompt_id, version_id), RUN_INDEX_FILE
+        )
+
+    def _append_run_index(
+        self, prompt_id: str, version_id: str, runs_data: List[Dict]
+    ) -> None:
+        """Append runs to the run index of a version.
+
+        The index is rebuilt from the run files instead if it doesn't exist yet
+        for a version that already has other runs.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+            runs_data (List[Dict]): Run data that was just written
+        """
+        index_path = self._get_run_index_path(prompt_id, version_id)
+        runs_path = os.path.join(self._get_version_path(prompt_id, version_id), "runs")
+        if not os.path.exists(index_path) and len(os.listdir(runs_path)) > len(
+            runs_data
+        ):
+            self._rebuild_run_index(prompt_id, version_id)
+            return
+
+        with open(index_path, "a", encoding="utf-8") as f:
+            f.writelines(self._run_index_line(run_data) for run_data in runs_data)
+
+    def _run_index_line(self, run_data: Dict) -> str:
+        """Serialize the index columns of a run as one JSON line.
+
+        Args:
+            run_data (Dict): Run data
+
+        Returns:
+            str: The JSON line
+        """
+        entry = {c: run_data[c] for c in RUN_INDEX_COLUMNS if c in run_data}
+        return self._get_codec().dumps(entry, default=str) + "\n"
+
+    def _rebuild_run_index(self, prompt_id: str, version_id: str) -> List[Dict]:
+        """Rebuild the run index of a version from its run files.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+
+        Returns:
+            List[Dict]: The index entries
+        """
+        runs = self.list_runs(prompt_id, version_id)
+        with open(
+            self._get_run_index_path(prompt_id, version_id), "w", encoding="utf-8"
+        ) as f:
+            f.writelines(self._run_index_line(run) for run in runs)
+        return [{c: run[c] for c in RUN_INDEX_COLUMNS if c in run} for run in runs]
+
+    def _read_run_index(self, prompt_id: str, version_id: str) -> List[Dict]:
+        """Read the run index of a version.
+
+        The index is rebuilt if it is missing or doesn't cover every run file.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+
+        Returns:
+            List[Dict]: The index entries, one per run
+        """
+        runs_path = os.path.join(self._get_version_path(prompt_id, version_id), "runs")
+        try:
+            num_runs = len(os.listdir(runs_path))
+        except FileNotFoundError:
+            return []
+
+        entries = {}
+        json_codec = self._get_codec()
+        try:
+            with open(
+                self._get_run_index_path(prompt_id, version_id), "r", encoding="utf-8"
+            ) as f:
+                for line in f:
+                    entry = json_codec.loads(line)
+                    entries[entry["run_id"]] = entry
+        except (FileNotFoundError, ValueError, KeyError):
+            entries = {}
+
+        if len(entries) != num_runs:
+            return self._rebuild_run_index(prompt_id, version_id)
+        return list(entries.values())
+
+    def _get_run_stats_path(self, prompt_id: str, version_id: str) -> str:
+        """Get the full path for the run statistics of a version.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+
+        Returns:
+            str: Full path to the statistics file
+        """
+        return os.path.join(
+            self._get_version_path(prompt_id, version_id), RUN_STATS_FILE
+        )
+
+    def _update_run_stats(
+        self, prompt_id: str, version_id: str, runs_data: List[Dict]
+    ) -> None:
+        """Add runs to the statistics of a version.
+
+        The statistics are rebuilt instead if they don't exist yet for a version
+        that already has other runs.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+            runs_data (List[Dict]): Run data that was just written
+        """
+        data = self._read_yaml(self._get_run_stats_path(prompt_id, version_id))
+        runs_path = os.path.join(self._get_version_path(prompt_id, version_id), "runs")
+        if data is None and len(os.listdir(runs_path)) > len(runs_data):
+            self._write_run_stats(
+                prompt_id, version_id, self._read_run_index(prompt_id, version_id)
+            )
+            return
+
+        stats = RunStats.from_dict(data or {})
+        for run_data in runs_data:
+            stats.add(run_data)
+        self._write_yaml(
+            self._get_run_stats_path(prompt_id, version_id), stats.to_dict()
+        )
+
+    def get_run_stats(self, prompt_id: str, version_id: str) -> Dict:
+        """Get the statistics of the runs of a version without reading the runs.
+
+        The statistics are rebuilt if they are missing or don't cover every run
+        file.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+
+        Returns:
+            Dict: The statistics, see `promptsite.stats.RunStats.to_dict`
+        """
+        runs_path = os.path.join(self._get_version_path(prompt_id, version_id), "runs")
+        num_runs = len(self._list_files(runs_path))
+        data = self._read_yaml(self._get_run_stats_path(prompt_id, version_id))
+        if data is None or data.get("count") != num_runs:
+            return self._write_run_stats(
+                prompt_id, version_id, self._read_run_index(prompt_id, version_id)
+            )
+        return data
+
+    def rebuild_run_stats(self, prompt_id: str, version_id: str) -> Dict:
+        """Recompute the statistics of a version from its run files.
+
+        The run index of the version is rebuilt from the run files first, so
+        that an out of date index is fixed as well.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+
+        Returns:
+            Dict: The statistics, see `promptsite.stats.RunStats.to_dict`
+        """
+        if not os.path.isdir(self._get_version_path(prompt_id, version_id)):
+            return RunStats().to_dict()
+        runs = self._rebuild_run_index(prompt_id, version_id)
+        return self._write_run_stats(prompt_id, version_id, runs)
+
+    def _write_run_stats(
+        self, prompt_id: str, version_id: str, runs: List[Dict]
+    ) -> Dict:
+        """Compute the statistics of a version from its runs and store them.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+            runs (List[Dict]): The runs of the version, or their index entries
+
+        Returns:
+            Dict: The statistics, see `promptsite.stats.RunStats.to_dict`
+        """
+        stats = RunStats()
+        for run in runs:
+            stats.add(run)
+        data = stats.to_dict()
+        if os.path.isdir(self._get_version_path(prompt_id, version_id)):
+            self._write_yaml(self._get_run_stats_path(prompt_id, version_id), data)
+        return data
+
+    def _get_time_index_path(self, prompt_id: str) -> str:
+        """Get the full path for the time index of a prompt.
+
+        Args:
+            prompt_id (str): ID of the prompt
+
+        Returns:
+            str: Full path to the time index file
+        """
+        return os.path.join(self._get_prompt_path(prompt_id), RUN_TIME_INDEX_FILE)
+
+    def _time_key(self, value: Any) -> Optional[str]:
+        """Format a timestamp so that time index entries sort as strings.
+
+        Args:
+            value (Any): A datetime or ISO formatted string
+
+        Returns:
+            Optional[str]: The UTC timestamp with microseconds, None if the value
+                is not a timestamp
+        """
+        value = normalize("created_at", value)
+        if not isinstance(value, datetime):
+            return None
+        return value.astimezone(UTC).isoformat(timespec="microseconds")
+
+    def _time_index_signature(self, prompt_id: str) -> str:
+        """Get a signature of the run directories of a prompt.
+
+        The signature changes whenever a run file is added to or removed from a
+        version, since that changes the modification time of its directory, so
+        the time index can be checked without listing every run.
+
+        Args:
+            prompt_id (str): ID of the prompt
+
+        Returns:
+            str: A hash of the version IDs and run directory modification times
+        """
+        versions_path = os.path.join(self._get_prompt_path(prompt_id), "versions")
+        digest = hashlib.blake2b(digest_size=16)
+        for entry in sorted(self._list_dirs(versions_path), key=lambda e: e.name):
+            try:
+                mtime = os.stat(os.path.join(entry.path, "runs")).st_mtime_ns
+            except FileNotFoundError:
+                mtime = 0
+            digest.update(f"{entry.name}:{mtime}\n".encode())
+        return digest.hexdigest()
+
+    def _append_time_index(
+        self, prompt_id: str, version_id: str, runs_data: List[Dict], signature: str
+    ) -> None:
+        """Append runs to the time index of their prompt.
+
+        The index is rebuilt from the run indexes instead if it doesn't exist yet,
+        or if other run files were added since it was written.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+            runs_data (List[Dict]): Run data that was just written
+            signature (str): The signature of the run directories before the
+                runs were written
+        """
+        self._time_indexes.pop(prompt_id, None)
+        index_path = self._get_time_index_path(prompt_id)
+        try:
+            with open(index_path, "r+") as f:
+                if f.readline() == _time_index_header(signature):
+                    f.seek(0, os.SEEK_END)
+                    for run_data in runs_data:
+                        key = self._time_key(run_data.get("created_at")) or ""
+                        f.write(f"{key}\t{version_id}\t{run_data['run_id']}\n")
+                    f.seek(0)
+                    f.write(_time_index_header(self._time_index_signature(prompt_id)))
+                    return
+        except FileNotFoundError:
+            pass
+        self._rebuild_time_index(prompt_id)
+
+    def _rebuild_time_index(self, prompt_id: str) -> List[Tuple[str, str, str]]:
+        """Rebuild the time index of a prompt from the run indexes of its versions.
+
+        Args:
+            prompt_id (str): ID of the prompt
+
+        Returns:
+            List[Tuple[str, str, str]]: The entries sorted by created_at
+        """
+        signature = self._time_index_signature(prompt_id)
+        entries = []
+        for version in self.list_versions(prompt_id, exclude_runs=True):
+            version_id = version["version_id"]
+            for run in self._read_run_index(prompt_id, version_id):
+                key = self._time_key(run.get("created_at")) or ""
+                entries.append((key, version_id, run["run_id"]))
+        entries.sort()
+
+        index_path = self._get_time_index_path(prompt_id)
+        with open(index_path, "w") as f:
+            f.write(_time_index_header(signature))
+            f.writelines("\t".join(entry) + "\n" for entry in entries)
+        version = (signature, os.stat(index_path).st_mtime_ns)
+        self._time_indexes[prompt_id] = (version, entries)
+        return entries
+
+    def _read_time_index(self, prompt_id: str) -> List[Tuple[str, str, str]]:
+        """Read the time index of a prompt, sorted by created_at.
+
+        The index is kept in memory until it or the run files of the prompt
+        change. It is rebuilt if it is missing, unreadable or older than the
+        run directories of the prompt.
+
+        Args:
+            prompt_id (str): ID of the prompt
+
+        Returns:
+            List[Tuple[str, str, str]]: `(created_at, version_id, run_id)` entries
+        """
+        signature = self._time_index_signature(prompt_id)
+        index_path = self._get_time_index_path(prompt_id)
+        try:
+            version = (signature, os.stat(index_path).st_mtime_ns)
+        except FileNotFoundError:
+            version = None
+        cached = self._time_indexes.get(prompt_id)
+        if cached is not None and cached[0] == version:
+            return cached[1]
+
+        entries = {}
+        try:
+            with open(index_path, "r") as f:
+                if f.readline() != _time_index_header(signature):
+                    raise ValueError("The time index is out of date")
+                for line in f:
+                    key, version_id, run_id = line.rstrip("\n").split("\t")
+                    entries[run_id] = (key, version_id, run_id)
+        except (FileNotFoundError, ValueError):
+            if not os.path.isdir(self._get_prompt_path(prompt_id)):
+                return []
+            return self._rebuild_time_index(prompt_id)
+
+        # Runs are appended as they are added, so this is usually a single pass
+        index = sorted(entries.values())
+        self._time_indexes[prompt_id] = (version, index)
+        return index
 
-        with open(run_path, "w") as f:
-            yaml.safe_dump(run_data, f, sort_keys=False)
+    def _seek_time_index(
+        self, prompt_id: str, filters: List[Filter]
+    ) -> List[Tuple[str, str, str]]:
+        """Find the runs of a prompt that can match a query using its time index.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            filters (List[Filter]): Predicates of the query
+
+        Returns:
+            List[Tuple[str, str, str]]: `(created_at, version_id, run_id)` entries
+                of the candidate runs
+        """
+        lower, upper = range_bounds(filters, "created_at")
+        lower, upper = self._time_key(lower), self._time_key(upper)
+        version_ids = scope_values(filters, "version_id")
+
+        entries = self._read_time_index(prompt_id)
+        # Entries without a timestamp sort first, like the lowest timestamp
+        start = 0 if lower is None else bisect_left(entries, (lower,))
+        end = len(entries) if upper is None else bisect_left(entries, (upper, "\uffff"))
+        return [
+            entry
+            for entry in entries[start:end]
+            if version_ids is None or entry[1] in version_ids
+        ]
 
     def list_versions(self, prompt_id: str, exclude_runs: bool = False) -> List[Dict]:
         """List all versions for a specific prompt.
@@ -319,29 +961,64 @@ class FileStorage(StorageBackend):
             - created_at: datetime
         - runs: List[Dict]
         """
-        prompt_path = self._get_prompt_path(prompt_id)
-        versions_path = os.path.join(prompt_path, "versions")
-        versions = []
+        return self._load_versions([prompt_id], exclude_runs=exclude_runs)[0]
 
-        try:
-            for version_dir in os.listdir(versions_path):
-                version_file = os.path.join(versions_path, version_dir, "version.yaml")
-                if os.path.isdir(
-                    os.path.join(versions_path, version_dir)
-                ) and os.path.exists(version_file):
-                    with open(version_file, "r") as f:
-                        version_data = yaml.safe_load(f)
-                        if not exclude_runs:
-                            version_data["runs"] = self.list_runs(
-                                prompt_id, version_dir
-                            )
-                        versions.append(version_data)
+    def _load_versions(
+        self, prompt_ids: List[str], exclude_runs: bool = False
+    ) -> List[List[Dict]]:
+        """Load the versions of several prompts at once.
 
+        Each stage (listing version directories, reading version files, listing
+        run directories and reading run files) is fanned out over the thread pool
+        for all prompts together.
+
+        Args:
+            prompt_ids (List[str]): IDs of the prompts
+            exclude_runs (bool): Whether to exclude runs from the version data
+
+        Returns:
+            List[List[Dict]]: The versions of each prompt sorted by created_at,
+                in the order of the prompt IDs
+        """
+        version_dirs = self._map(
+            lambda prompt_id: self._list_dirs(
+                os.path.join(self._get_prompt_path(prompt_id), "versions")
+            ),
+            prompt_ids,
+        )
+        entries = [(i, entry) for i, dirs in enumerate(version_dirs) for entry in dirs]
+        loaded = self._map(
+            lambda item: (
+                *item,
+                self._read_yaml(os.path.join(item[1].path, "version.yaml")),
+            ),
+            entries,
+        )
+        loaded = [item for item in loaded if item[2] is not None]
+
+        if not exclude_runs:
+            run_files = self._map(
+                lambda item: (
+                    item[2],
+                    self._list_files(os.path.join(item[1].path, "runs")),
+                ),
+                loaded,
+            )
+            runs = self._parse_run_files(
+                [path for _, files in run_files for path in files]
+            )
+            for data, files in run_files:
+                data["runs"] = [
+                    run for run in islice(runs, len(files)) if run is not None
+                ]
+
+        versions = [[] for _ in prompt_ids]
+        for i, _, data in loaded:
+            versions[i].append(data)
+        for prompt_versions in versions:
             # Sort versions by created_at timestamp
-            versions.sort(key=lambda x: x["created_at"])
-            return versions
-        except FileNotFoundError:
-            return []
+            prompt_versions.sort(key=lambda x: x["created_at"])
+        return versions
 
     def list_runs(self, prompt_id: str, version_id: str) -> List[Dict]:
         """List all runs for a specific version.
@@ -352,15 +1029,25 @@ class FileStorage(StorageBackend):
             - run_id: str
             - created_at: datetime
         """
+        return list(self._iter_runs(prompt_id, version_id))
+
+    def _iter_runs(self, prompt_id: str, version_id: str) -> Iterator[Dict]:
+        """Iterate over the runs of a version, reading the run files in chunks.
+
+        The files of a chunk are read in parallel, so only a bounded number of
+        files is read ahead of the consumer.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+
+        Returns:
+            Iterator[Dict]: An iterator of run data
+        """
         runs_path = os.path.join(self._get_version_path(prompt_id, version_id), "runs")
-        runs = []
-        try:
-            for run_file in os.listdir(runs_path):
-                with open(os.path.join(runs_path, run_file), "r") as f:
-                    runs.append(yaml.safe_load(f))
-        except FileNotFoundError:
-            pass
-        return runs
+        for run in self._parse_run_files(self._list_files(runs_path)):
+            if run is not None:
+                yield run
 
     def get_version(self, prompt_id: str, version_id: str) -> Optional[Dict]:
         """Get a specific version of a prompt.
@@ -387,20 +1074,305 @@ class FileStorage(StorageBackend):
         Returns:
             List of prompt dictionaries containing all metadata, versions, and runs
         """
-        try:
-            prompts_dir = os.path.join(self.base_path, "prompts")
-            if not os.path.exists(prompts_dir):
-                return []
+        prompt_ids = [entry.name for entry in self._list_dirs(self.prompts_dir)]
+        found = self._map(
+            lambda prompt_id: (
+                prompt_id,
+                self._read_yaml(
+                    os.path.join(self.prompts_dir, prompt_id, "prompt.yaml")
+                ),
+            ),
+            prompt_ids,
+        )
+        found = [(prompt_id, data) for prompt_id, data in found if data is not None]
+
+        if not exclude_versions:
+            versions = self._load_versions([prompt_id for prompt_id, _ in found])
+            for i, (_, data) in enumerate(found):
+                data["versions"] = self._parse_version_dates(versions[i])
+
+        return [data for _, data in found]
+
+    def query_runs(
+        self,
+        filters: Optional[List[Filter]] = None,
+        order_by: Optional[List[str]] = None,
+        limit: Optional[int] = None,
+        offset: int = 0,
+        columns: Optional[List[str]] = None,
+    ) -> Iterator[Dict]:
+        """Query runs, only reading the run files that can match.
+
+        Filters on prompt_id, version_id and run_id are resolved from the
+        directory structure, so only the matching prompt and version directories
+        are listed and runs filtered by ID are opened directly. Ranges of
+        created_at, and the first or last N runs by created_at, are resolved
+        from the time index of each prompt. When the query only needs the
+        columns kept in the run index, the index is read instead of the run files.
+
+        Args:
+            filters (Optional[List[Filter]]): Predicates the runs must satisfy
+            order_by (Optional[List[str]]): Fields to order by, "-" for descending
+            limit (Optional[int]): Maximum number of runs to return
+            offset (int): Number of runs to skip
+            columns (Optional[List[str]]): Columns to return, all columns if None
 
-            prompts = []
-            for prompt_id in os.listdir(prompts_dir):
-                # Get the prompt data using existing method which already includes versions
-                prompt_data = self.get_prompt(
-                    prompt_id, exclude_versions=exclude_versions
+        Returns:
+            Iterator[Dict]: Matching run data annotated with prompt_id and version_id
+        """
+        filters = filters or []
+        version_ids = scope_values(filters, "version_id")
+        run_ids = scope_values(filters, "run_id")
+        use_index = columns is not None and (
+            set(columns) | required_fields(filters, order_by)
+        ) - {"prompt_id", "version_id"} <= set(RUN_INDEX_COLUMNS)
+
+        # Queries on a created_at range, or for the first or last N runs, find
+        # their runs in the time index instead of listing every run
+        top = None
+        ordering = parse_order_by(order_by or [])
+        if (
+            limit is not None
+            and len(ordering) == 1
+            and ordering[0][0] == "created_at"
+            and all(
+                (f.field in ("prompt_id", "version_id") and f.op in ("eq", "in"))
+                or (
+                    f.field == "created_at" and f.op in ("eq", "gt", "gte", "lt", "lte")
                 )
-                if prompt_data:
-                    prompts.append(prompt_data)
+                for f in filters
+            )
+        ):
+            top = (offset + limit, ordering[0][1])
+        seek = run_ids is None and (
+            top is not None or range_bounds(filters, "created_at") != (None, None)
+        )
+
+        def records():
+            prompt_ids = self._scoped_prompt_ids(filters)
+            if seek:
+                entries = [
+                    (key, prompt_id, version_id, run_id)
+                    for prompt_id in prompt_ids
+                    for key, version_id, run_id in self._seek_time_index(
+                        prompt_id, filters
+                    )
+                ]
+                if top is not None:
+                    count, descending = top
+                    select = heapq.nlargest if descending else heapq.nsmallest
+                    entries = select(count, entries)
+                candidates = {}
+                for _, prompt_id, version_id, run_id in entries:
+                    candidates.setdefault((prompt_id, version_id), []).append(run_id)
+                scoped = [(*key, ids) for key, ids in candidates.items()]
+            else:
+                versions = self._load_versions(prompt_ids, exclude_runs=True)
+                scoped = [
+                    (
+                        prompt_id,
+                        version["version_id"],
+                        None if run_ids is None else sorted(run_ids),
+                    )
+                    for i, prompt_id in enumerate(prompt_ids)
+                    for version in versions[i]
+                    if version_ids is None or version["version_id"] in version_ids
+                ]
+
+            for prompt_id, version_id, candidates in scoped:
+                runs = self._read_runs(prompt_id, version_id, candidates, use_index)
+                for run in runs:
+                    if run is not None:
+                        yield {**run, "prompt_id": prompt_id, "version_id": version_id}
+
+        return project(
+            apply_query(records(), filters, order_by, limit, offset), columns
+        )
+
+    def _read_runs(
+        self,
+        prompt_id: str,
+        version_id: str,
+        run_ids: Optional[Iterable[str]] = None,
+        use_index: bool = False,
+    ) -> Iterator[Optional[Dict]]:
+        """Read the runs of a version, or only the runs with the given IDs.
 
-            return prompts
-        except FileNotFoundError:
-            return []
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+            run_ids (Optional[Iterable[str]]): IDs of the runs to read, all if None
+            use_index (bool): Whether to read the run index instead of the run files
+
+        Returns:
+            Iterator[Optional[Dict]]: The run data, None for runs that don't exist
+        """
+        if use_index:
+            wanted = None if run_ids is None else set(run_ids)
+            return (
+                run
+                for run in self._read_run_index(prompt_id, version_id)
+                if wanted is None or run["run_id"] in wanted
+            )
+        if run_ids is None:
+            return self._iter_runs(prompt_id, version_id)
+
+        runs_path = os.path.join(self._get_version_path(prompt_id, version_id), "runs")
+        return self._parse_run_files(
+            [os.path.join(runs_path, f"{run_id}.yaml") for run_id in run_ids]
+        )
+
+    def _get_dataset_path(self, dataset_id: str) -> str:
+        """Get the directory of a dataset.
+
+        Args:
+            dataset_id (str): ID of the dataset
+
+        Returns:
+            str: Full path to the dataset directory
+        """
+        return os.path.join(self.datasets_dir, dataset_id)
+
+    def save_dataset(
+        self,
+        dataset_id: str,
+        dataset_data: Dict,
+        rows: Any,
+        format: Optional[str] = None,
+    ) -> None:
+        """Save a dataset, replacing it if it exists.
+
+        Args:
+            dataset_id (str): ID of the dataset
+            dataset_data (Dict): Dataset metadata
+            rows (Any): The rows, a list of dicts or a pyarrow Table
+            format (Optional[str]): "arrow", "parquet" or "jsonl", "arrow" when
+                pyarrow is installed and "jsonl" otherwise if None
+        """
+        format = format or default_dataset_format()
+        path = self._get_dataset_path(dataset_id)
+        self._ensure_path_exists(path)
+
+        write_dataset_rows(
+            os.path.join(path, DATASET_FILES[format]),
+            rows,
+            format,
+            json_codec=self._get_codec(),
+        )
+        for other, filename in DATASET_FILES.items():
+            if other != format:
+                self._remove_file(os.path.join(path, filename))
+        self._write_yaml(
+            os.path.join(path, DATASET_FILE), {**dataset_data, "format": format}
+        )
+
+    def get_dataset(self, dataset_id: str) -> Optional[Dict]:
+        """Get a dataset.
+
+        Arrow and Parquet rows are memory-mapped rather than read into memory.
+
+        Args:
+            dataset_id (str): ID of the dataset
+
+        Returns:
+            Optional[Dict]: The dataset metadata with its rows under "rows", None
+                if the dataset doesn't exist
+        """
+        path = self._get_dataset_path(dataset_id)
+        dataset_data = self._read_yaml(os.path.join(path, DATASET_FILE))
+        if dataset_data is None:
+            return None
+
+        format = dataset_data["format"]
+        dataset_data["rows"] = read_dataset_rows(
+            os.path.join(path, DATASET_FILES[format]),
+            format,
+            json_codec=self._get_codec(),
+        )
+        return dataset_data
+
+    def list_datasets(self) -> List[str]:
+        """List the IDs of the stored datasets.
+
+        Returns:
+            List[str]: The dataset IDs, sorted
+        """
+        return sorted(
+            entry.name
+            for entry in self._list_dirs(self.datasets_dir)
+            if os.path.exists(os.path.join(entry.path, DATASET_FILE))
+        )
+
+    def delete_dataset(self, dataset_id: str) -> None:
+        """Delete a dataset.
+
+        Args:
+            dataset_id (str): ID of the dataset
+
+        Note:
+            Silently succeeds if the dataset doesn't exist
+        """
+        self._remove_directory(self._get_dataset_path(dataset_id))
+
+    def _search_index_enabled(self) -> bool:
+        """Check whether writes should update the search index.
+
+        Returns:
+            bool: True if FTS5 is supported and the index has been built
+        """
+        return fts5_available() and self.search_index.exists()
+
+    def rebuild_search_index(self) -> None:
+        """Build the search index from all versions and runs."""
+        prompt_ids = self._scoped_prompt_ids([])
+        versions = self._load_versions(prompt_ids, exclude_runs=True)
+        self.search_index.rebuild(
+            (
+                (prompt_id, version)
+                for i, prompt_id in enumerate(prompt_ids)
+                for version in versions[i]
+            ),
+            self.query_runs(),
+        )
+
+    def search(
+        self,
+        text: str,
+        scope: str = "runs",
+        prompt_id: Optional[str] = None,
+        limit: Optional[int] = 20,
+    ) -> List[Dict[str, Any]]:
+        """Search version contents or run prompts and outputs with the search index.
+
+        The index is built on the first search. Without FTS5 support in SQLite,
+        every version or run is scanned instead.
+
+        Args:
+            text (str): The search text, every term must match
+            scope (str): "versions" or "runs"
+            prompt_id (Optional[str]): Only search the versions or runs of a prompt
+            limit (Optional[int]): The maximum number of results
+
+        Returns:
+            List[Dict[str, Any]]: The matches with their IDs and a snippet of the
+                matching text, best matches first
+        """
+        if not fts5_available():
+            return super().search(text, scope, prompt_id, limit)
+        if not self.search_index.exists():
+            self.rebuild_search_index()
+        return self.search_index.search(text, scope, prompt_id, limit)
+
+    def _scoped_prompt_ids(self, filters: List[Filter]) -> List[str]:
+        """Get the prompt IDs a query needs to read from the prompts directory.
+
+        Args:
+            filters (List[Filter]): Predicates of the query
+
+        Returns:
+            List[str]: The prompt IDs restricted by the filters, or all prompt IDs
+        """
+        prompt_ids = scope_values(filters, "prompt_id")
+        if prompt_ids is not None:
+            return sorted(prompt_ids)
+        return [entry.name for entry in self._list_dirs(self.prompts_dir)]
@@ -1,16 +1,25 @@
 """Git-based storage implementations for promptsite."""
 
+import os
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
 
 from git import GitCommandError, Repo
 
 from ..exceptions import StorageError
-from .file import FileStorage
+from .file import RUN_INDEX_FILE, RUN_STATS_FILE, RUN_TIME_INDEX_FILE, FileStorage
 
+# Caches that FileStorage rebuilds from the run files. They are rewritten by
+# every run, so tracking them would make clones that record runs conflict.
+DERIVED_FILES = (
+    f"prompts/*/versions/*/{RUN_INDEX_FILE}",
+    f"prompts/*/versions/*/{RUN_STATS_FILE}",
+    f"prompts/*/{RUN_TIME_INDEX_FILE}",
+)
 
-@dataclass
+
+@dataclass(init=False)
 class GitStorage(FileStorage):
     """Git-based storage implementation extending FileStorage.
 
@@ -18,8 +27,15 @@ class GitStorage(FileStorage):
     are automatically committed to the Git repository and can be synced with
     a remote repository.
 
+    The run index, run statistics and time index of FileStorage are rebuilt
+    from the run files, so they are kept out of the repository by its
+    .gitignore.
+
+    The remote is the second positional argument, the options inherited from
+    FileStorage are keyword-only.
+
     Attributes:
-        remote (str): URL of the remote Git repository
+        remote (Optional[str]): URL of the remote Git repository
         branch (str): Git branch to use (defaults to "main")
         auto_sync (bool): Whether to automatically sync with remote
         repo (Repo): GitPython repository instance
@@ -33,10 +49,33 @@ class GitStorage(FileStorage):
         ... )
     """
 
-    remote: str
+    remote: Optional[str]
     branch: str = "main"
     auto_sync: bool = False
 
+    def __init__(
+        self,
+        base_path: str,
+        remote: Optional[str],
+        branch: str = "main",
+        auto_sync: bool = False,
+        *,
+        max_workers: Optional[int] = None,
+        parse_processes: Optional[int] = None,
+        json_codec: Optional[str] = None,
+    ) -> None:
+        # Written by hand because dataclass fields can't be keyword-only on
+        # Python 3.9, and the generated __init__ would put remote after the
+        # defaulted FileStorage fields
+        self.base_path = base_path
+        self.max_workers = max_workers
+        self.parse_processes = parse_processes
+        self.json_codec = json_codec
+        self.remote = remote
+        self.branch = branch
+        self.auto_sync = auto_sync
+        self.__post_init__()
+
     def __post_init__(self) -> None:
         """Initialize the storage."""
         # Initialize FileStorage first
@@ -104,9 +143,28 @@ class GitStorage(FileStorage):
                     self.repo.create_head(self.branch)
                 self.repo.heads[self.branch].checkout()
 
+            self._ignore_derived_files()
         except GitCommandError as e:
             raise StorageError(f"Git repository error: {str(e)}") from e
 
+    def _ignore_derived_files(self) -> None:
+        """Keep the derived run caches out of the repository.
+
+        The caches are added to the .gitignore of the repository, and untracked
+        if an earlier version of the storage committed them.
+        """
+        gitignore = Path(self.base_path) / ".gitignore"
+        lines = gitignore.read_text().splitlines() if gitignore.exists() else []
+        missing = [pattern for pattern in DERIVED_FILES if pattern not in lines]
+        if missing:
+            with gitignore.open("a") as f:
+                f.writelines(f"{pattern}\n" for pattern in missing)
+
+        self.repo.git.rm("--cached", "--ignore-unmatch", "-q", "--", *DERIVED_FILES)
+        self.repo.git.add("--", ".gitignore")
+        if not self.repo.head.is_valid() or self.repo.index.diff("HEAD"):
+            self.repo.index.commit("Stop tracking derived run caches")
+
     def _commit(self, message: str, files: Optional[List[str]] = None) -> None:
         """Create a git commit with the specified message and files.
 
@@ -120,9 +178,11 @@ class GitStorage(FileStorage):
                 relative_files = [
                     str(Path(f).relative_to(self.base_path)) for f in files
                 ]
-                self.repo.index.add(relative_files)
+                # git add honours the .gitignore of the derived caches, and
+                # stages the removal of deleted paths
+                self.repo.git.add("--all", "--", *relative_files)
             else:
-                self.repo.index.add("*")
+                self.repo.git.add("--all")
 
             if self.repo.is_dirty() or self.repo.untracked_files:
                 self.repo.index.commit(message)
@@ -234,8 +294,71 @@ class GitStorage(FileStorage):
         super().add_run(prompt_id, version_id, run_data)
         self._commit(
             f"Add run {run_data.get('run_id')} to version {version_id} of prompt: {prompt_id}",
-            [
-                str(self._get_prompt_path(prompt_id)),
-                str(self._get_version_path(prompt_id, version_id)),
-            ],
+            self._run_files(prompt_id, version_id, [run_data]),
+        )
+
+    def add_runs(self, prompt_id: str, version_id: str, runs_data: List[Dict]) -> None:
+        """Add several runs to a version of a prompt in a single commit.
+
+        Args:
+            prompt_id (str): Unique identifier for the prompt
+            version_id (str): Unique identifier for the version
+            runs_data (List[Dict]): Run data including output and metadata
+        """
+        if not runs_data:
+            return
+        super().add_runs(prompt_id, version_id, runs_data)
+        self._commit(
+            f"Add {len(runs_data)} runs to version {version_id} of prompt: {prompt_id}",
+            self._run_files(prompt_id, version_id, runs_data),
         )
+
+    def _run_files(
+        self, prompt_id: str, version_id: str, runs_data: List[Dict]
+    ) -> List[str]:
+        """Get the files to commit for new runs, without the derived caches.
+
+        Args:
+            prompt_id (str): Unique identifier for the prompt
+            version_id (str): Unique identifier for the version
+            runs_data (List[Dict]): Run data of the new runs
+
+        Returns:
+            List[str]: Paths of the run files and of the version file
+        """
+        return [
+            self._get_run_path(prompt_id, version_id, run_data["run_id"])
+            for run_data in runs_data
+        ] + [
+            os.path.join(self._get_version_path(prompt_id, version_id), "version.yaml")
+        ]
+
+    def save_dataset(
+        self,
+        dataset_id: str,
+        dataset_data: Dict,
+        rows: Any,
+        format: Optional[str] = None,
+    ) -> None:
+        """Save a dataset in the Git repository, replacing it if it exists.
+
+        Args:
+            dataset_id (str): Unique identifier for the dataset
+            dataset_data (Dict): Dataset metadata
+            rows (Any): The rows, a list of dicts or a pyarrow Table
+            format (Optional[str]): "arrow", "parquet" or "jsonl"
+        """
+        super().save_dataset(dataset_id, dataset_data, rows, format=format)
+        self._commit(
+            f"Save dataset: {dataset_id}", [str(self._get_dataset_path(dataset_id))]
+        )
+
+    def delete_dataset(self, dataset_id: str) -> None:
+        """Delete a dataset from the Git repository.
+
+        Args:
+            dataset_id (str): Unique identifier for the dataset
+        """
+        path = self._get_dataset_path(dataset_id)
+        super().delete_dataset(dataset_id)
+        self._commit(f"Delete dataset: {dataset_id}", [str(path)])
@@ -0,0 +1,278 @@
+"""Full-text search index for promptsite storage backends."""
+
+import os
+import sqlite3
+from contextlib import closing
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+SEARCH_SCOPES = ("versions", "runs")
+
+SNIPPET_TOKENS = 12
+
+
+@lru_cache(maxsize=None)
+def fts5_available() -> bool:
+    """Check whether the SQLite library supports FTS5.
+
+    Returns:
+        bool: True if FTS5 tables can be created, False otherwise
+    """
+    try:
+        with closing(sqlite3.connect(":memory:")) as conn:
+            conn.execute("CREATE VIRTUAL TABLE t USING fts5(a)")
+        return True
+    except sqlite3.OperationalError:
+        return False
+
+
+def search_terms(text: str) -> List[str]:
+    """Split search text into terms, all of which must match.
+
+    Args:
+        text (str): The search text
+
+    Returns:
+        List[str]: The terms
+    """
+    return text.split()
+
+
+def _fts_query(text: str) -> str:
+    """Quote search text as an FTS5 query matching every term.
+
+    Args:
+        text (str): The search text
+
+    Returns:
+        str: The FTS5 query
+    """
+    return " ".join('"' + term.replace('"', '""') + '"' for term in search_terms(text))
+
+
+@dataclass
+class SearchIndex:
+    """Full-text index of version contents and run prompts and outputs.
+
+    The index is a SQLite database with FTS5 tables, so searches don't read
+    the prompt files. It is only updated while it exists, and is built from
+    the storage backend on the first search.
+
+    Attributes:
+        path (str): Path to the SQLite database file
+
+    Example:
+        >>> index = SearchIndex(path=".promptsite/index/search.db")
+        >>> index.search("timeout", scope="runs")
+    """
+
+    path: str
+
+    def exists(self) -> bool:
+        """Check whether the index has been built.
+
+        Returns:
+            bool: True if the database file exists, False otherwise
+        """
+        return os.path.exists(self.path)
+
+    def _connect(self) -> sqlite3.Connection:
+        """Open the database, creating the tables if needed.
+
+        Returns:
+            sqlite3.Connection: The connection
+        """
+        directory = os.path.dirname(self.path)
+        os.makedirs(directory, exist_ok=True)
+        # The index is derived data, keep it out of git backed storage
+        gitignore = os.path.join(directory, ".gitignore")
+        if not os.path.exists(gitignore):
+            with open(gitignore, "w") as f:
+                f.write("*\n")
+
+        conn = sqlite3.connect(self.path, timeout=30)
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS versions USING fts5("
+            "prompt_id UNINDEXED, version_id UNINDEXED, content)"
+        )
+        conn.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS runs USING fts5("
+            "prompt_id UNINDEXED, version_id UNINDEXED, run_id UNINDEXED, "
+            "created_at UNINDEXED, final_prompt, llm_output)"
+        )
+        # Maps run IDs to the rowids of the runs table, where run_id can only be
+        # found by a full scan
+        has_rowids = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'run_rowids'"
+        ).fetchone()
+        if not has_rowids:
+            with conn:
+                conn.execute(
+                    "CREATE TABLE run_rowids ("
+                    "rowid INTEGER PRIMARY KEY, run_id TEXT NOT NULL UNIQUE)"
+                )
+                conn.execute(
+                    "INSERT OR IGNORE INTO run_rowids SELECT rowid, run_id FROM runs"
+                )
+        return conn
+
+    def _version_row(self, prompt_id: str, version_data: Dict) -> Tuple:
+        """Get the indexed values of a version."""
+        return (prompt_id, version_data["version_id"], version_data.get("content"))
+
+    def _run_row(self, prompt_id: str, version_id: str, run_data: Dict) -> Tuple:
+        """Get the indexed values of a run."""
+        created_at = run_data.get("created_at")
+        return (
+            prompt_id,
+            version_id,
+            run_data["run_id"],
+            None if created_at is None else str(created_at),
+            run_data.get("final_prompt"),
+            run_data.get("llm_output"),
+        )
+
+    def add_version(self, prompt_id: str, version_data: Dict) -> None:
+        """Index a version, replacing it if it is already indexed.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_data (Dict): Version data
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute(
+                "DELETE FROM versions WHERE prompt_id = ? AND version_id = ?",
+                (prompt_id, version_data["version_id"]),
+            )
+            conn.execute(
+                "INSERT INTO versions VALUES (?, ?, ?)",
+                self._version_row(prompt_id, version_data),
+            )
+
+    def add_run(self, prompt_id: str, version_id: str, run_data: Dict) -> None:
+        """Index a run, replacing it if it is already indexed.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+            run_data (Dict): Run data
+        """
+        self.add_runs(prompt_id, version_id, [run_data])
+
+    def add_runs(self, prompt_id: str, version_id: str, runs_data: List[Dict]) -> None:
+        """Index runs in a single transaction, replacing those already indexed.
+
+        Args:
+            prompt_id (str): ID of the prompt
+            version_id (str): ID of the version
+            runs_data (List[Dict]): Run data
+        """
+        with closing(self._connect()) as conn, conn:
+            for run_data in runs_data:
+                row = self._run_row(prompt_id, version_id, run_data)
+                indexed = conn.execute(
+                    "SELECT rowid FROM run_rowids WHERE run_id = ?", (row[2],)
+                ).fetchone()
+                if indexed:
+                    rowid = indexed[0]
+                    conn.execute("DELETE FROM runs WHERE rowid = ?", (rowid,))
+                else:
+                    rowid = conn.execute(
+                        "INSERT INTO run_rowids (run_id) VALUES (?)", (row[2],)
+                    ).lastrowid
+                conn.execute(
+                    "INSERT INTO runs (rowid, prompt_id, version_id, run_id, "
+                    "created_at, final_prompt, llm_output) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (rowid, *row),
+                )
+
+    def delete_prompt(self, prompt_id: str) -> None:
+        """Remove the versions and runs of a prompt from the index.
+
+        Args:
+            prompt_id (str): ID of the prompt
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM versions WHERE prompt_id = ?", (prompt_id,))
+            conn.execute(
+                "DELETE FROM run_rowids WHERE rowid IN "
+                "(SELECT rowid FROM runs WHERE prompt_id = ?)",
+                (prompt_id,),
+            )
+            conn.execute("DELETE FROM runs WHERE prompt_id = ?", (prompt_id,))
+
+    def rebuild(
+        self,
+        versions: Iterable[Tuple[str, Dict]],
+        runs: Iterable[Dict],
+    ) -> None:
+        """Replace the contents of the index in a single transaction.
+
+        Args:
+            versions (Iterable[Tuple[str, Dict]]): Pairs of prompt ID and version data
+            runs (Iterable[Dict]): Run data annotated with prompt_id and version_id
+        """
+        with closing(self._connect()) as conn, conn:
+            conn.execute("DELETE FROM versions")
+            conn.execute("DELETE FROM runs")
+            conn.execute("DELETE FROM run_rowids")
+            conn.executemany(
+                "INSERT INTO versions VALUES (?, ?, ?)",
+                (self._version_row(p, v) for p, v in versions),
+            )
+            conn.executemany(
+                "INSERT INTO runs VALUES (?, ?, ?, ?, ?, ?)",
+                (self._run_row(r["prompt_id"], r["version_id"], r) for r in runs),
+            )
+            conn.execute(
+                "INSERT OR IGNORE INTO run_rowids SELECT rowid, run_id FROM runs"
+            )
+
+    def search(
+        self,
+        text: str,
+        scope: str = "runs",
+        prompt_id: Optional[str] = None,
+        limit: Optional[int] = 20,
+    ) -> List[Dict[str, Any]]:
+        """Search the index, best matches first.
+
+        Args:
+            text (str): The search text, every term must match
+            scope (str): "versions" to search version contents, "runs" to search
+                run prompts and outputs
+            prompt_id (Optional[str]): Only search the versions or runs of a prompt
+            limit (Optional[int]): The maximum number of results
+
+        Returns:
+            List[Dict[str, Any]]: The matches with their IDs and a snippet of the
+                matching text, the matching terms surrounded by brackets
+        """
+        if not search_terms(text):
+            return []
+
+        if scope == "versions":
+            table, columns = "versions", ["prompt_id", "version_id"]
+        else:
+            table, columns = "runs", ["prompt_id", "version_id", "run_id", "created_at"]
+        sql = (
+            f"SELECT {', '.join(columns)}, "
+            f"snippet({table}, -1, '[', ']', '...', {SNIPPET_TOKENS}) "
+            f"FROM {table} WHERE {table} MATCH ?"
+        )
+        params: List[Any] = [_fts_query(text)]
+        if prompt_id is not None:
+            sql += " AND prompt_id = ?"
+            params.append(prompt_id)
+        sql += " ORDER BY rank"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        with closing(self._connect()) as conn:
+            rows = conn.execute(sql, params).fetchall()
+        keys = [*columns, "snippet"]
+        return [{key: row[i] for i, key in enumerate(keys)} for row in rows]
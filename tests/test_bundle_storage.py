@@ -0,0 +1,105 @@
+import pytest
+from pydantic import BaseModel
+
+from promptsite.core import PromptSite
+from promptsite.exceptions import StorageError, VersionNotFoundError
+from promptsite.model.variable import ArrayVariable, StringVariable
+
+
+class CustomerModel(BaseModel):
+    id: int
+    name: str
+
+
+@pytest.fixture
+def bundle_path(storage_path):
+    return str(storage_path / "prompts.bundle.json")
+
+
+def test_export_and_load_bundle(promptsite, bundle_path):
+    """Test exporting the latest versions and loading them from the bundle."""
+    promptsite.register_prompt(
+        "greeting",
+        description="Greeting prompt",
+        tags=["test"],
+        initial_content="Hello {{ name }}",
+        variables={"name": StringVariable()},
+    )
+    latest = promptsite.add_prompt_version("greeting", "Hi {{ name }}")
+    promptsite.register_prompt(
+        "customers",
+        initial_content="Customers: {{ customers }}",
+        variables={"customers": ArrayVariable(model=CustomerModel)},
+    )
+    promptsite.add_run("greeting", latest.version_id, "Hi John", llm_output="Hey")
+
+    promptsite.export_bundle(bundle_path)
+    ps = PromptSite.from_bundle(bundle_path)
+
+    prompt = ps.get_prompt("greeting")
+    assert prompt.description == "Greeting prompt"
+    assert prompt.tags == ["test"]
+    assert list(prompt.versions) == [latest.version_id]
+    assert prompt.get_latest_version().content == "Hi {{ name }}"
+    assert prompt.get_latest_version().runs == {}
+    assert {p.id for p in ps.list_prompts()} == {"greeting", "customers"}
+
+    # Variable schemas are served from the bundle without generating models
+    variable = ps.get_prompt("customers").get_latest_version().variables["customers"]
+    assert variable._model is None
+    assert variable.to_dict()["model"] == CustomerModel.model_json_schema()
+    assert variable.validate([{"id": 1, "name": "John"}]) is True
+
+
+def test_export_and_load_msgpack_bundle(promptsite, storage_path):
+    """Test bundles written as msgpack, chosen by their file extension."""
+    pytest.importorskip("msgpack")
+    promptsite.register_prompt(
+        "customers",
+        initial_content="Customers: {{ customers }}",
+        variables={"customers": ArrayVariable(model=CustomerModel)},
+    )
+    bundle_path = str(storage_path / "prompts.bundle.msgpack")
+
+    promptsite.export_bundle(bundle_path)
+    with open(bundle_path, "rb") as f:
+        assert not f.read().startswith(b"{")
+    ps = PromptSite.from_bundle(bundle_path)
+
+    version = ps.get_prompt("customers").get_latest_version()
+    assert version.content == "Customers: {{ customers }}"
+    assert version.variables["customers"].validate([{"id": 1, "name": "John"}])
+
+
+def test_export_bundle_pinned_version(promptsite, bundle_path):
+    """Test pinning a version instead of the latest one."""
+    promptsite.register_prompt("greeting", initial_content="Hello")
+    pinned = promptsite.get_prompt("greeting").get_latest_version()
+    promptsite.add_prompt_version("greeting", "Hi")
+
+    promptsite.export_bundle(bundle_path, version_ids={"greeting": pinned.version_id})
+    ps = PromptSite.from_bundle(bundle_path)
+
+    assert ps.get_prompt("greeting").get_latest_version().content == "Hello"
+
+    with pytest.raises(VersionNotFoundError):
+        promptsite.export_bundle(bundle_path, version_ids={"greeting": "missing"})
+
+
+def test_bundle_is_read_only(promptsite, bundle_path):
+    """Test that writes to a bundle are rejected."""
+    promptsite.register_prompt("greeting", initial_content="Hello")
+    promptsite.export_bundle(bundle_path)
+    ps = PromptSite.from_bundle(bundle_path)
+
+    with pytest.raises(StorageError):
+        ps.add_prompt_version("greeting", "Hi")
+
+
+def test_load_invalid_bundle(storage_path):
+    """Test loading a file that is not a bundle."""
+    path = storage_path / "invalid.json"
+    path.write_text('{"prompts": []}')
+
+    with pytest.raises(StorageError):
+        PromptSite.from_bundle(str(path))
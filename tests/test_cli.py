@@ -6,6 +6,7 @@ from click.testing import CliRunner
 from promptsite.cli import cli
 from promptsite.core import PromptSite
 from promptsite.exceptions import PromptNotFoundError, PromptSiteError
+from promptsite.stats import RunStats
 
 
 @pytest.fixture
@@ -151,21 +152,37 @@ def test_version_list(runner, mock_ps, mocker):
     """Test listing all versions of a prompt."""
     mocker.patch("promptsite.cli.get_promptsite", return_value=mock_ps)
 
-    mock_versions = {
-        "v1": mocker.Mock(
+    mock_versions = [
+        mocker.Mock(
             version_id="v1", content="Content 1", created_at=datetime(2024, 1, 1)
         ),
-        "v2": mocker.Mock(
+        mocker.Mock(
             version_id="v2", content="Content 2", created_at=datetime(2024, 1, 2)
         ),
-    }
+    ]
     mock_ps.list_versions.return_value = mock_versions
+    stats = RunStats()
+    stats.add({"created_at": "2024-01-03 10:00:00", "execution_time": 1.5})
+    mock_ps.get_run_stats.return_value = stats
 
     result = runner.invoke(cli, ["version", "list", "test-prompt"])
     assert result.exit_code == 0
     assert "v1" in result.output
     assert "v2" in result.output
-    mock_ps.list_versions.assert_called_once_with("test-prompt")
+    assert "Runs: 1  Mean: 1.50s" in result.output
+    assert "Last run: 2024-01-03 10:00" in result.output
+    mock_ps.list_versions.assert_called_once_with("test-prompt", exclude_runs=True)
+
+
+def test_version_rebuild_stats(runner, mock_ps, mocker):
+    """Test rebuilding the run statistics of versions."""
+    mocker.patch("promptsite.cli.get_promptsite", return_value=mock_ps)
+    mock_ps.rebuild_run_stats.return_value = 2
+
+    result = runner.invoke(cli, ["version", "rebuild-stats", "test-prompt"])
+    assert result.exit_code == 0
+    assert "Rebuilt run statistics of 2 version(s)" in result.output
+    mock_ps.rebuild_run_stats.assert_called_once_with("test-prompt")
 
 
 def test_prompt_delete(runner, mock_ps, mocker):
@@ -224,10 +241,12 @@ def test_run_list(runner, mock_ps, mocker):
         ),
     ]
     mock_ps.list_runs.return_value = mock_runs
+    mock_ps.get_run_stats.return_value = RunStats()
 
     result = runner.invoke(cli, ["run", "list", "test-prompt", "v1"])
 
     assert result.exit_code == 0
+    assert "Runs: 0" in result.output
     assert "run1" in result.output
     assert "run2" in result.output
     mock_ps.list_runs.assert_called_once_with("test-prompt", "v1")
@@ -245,6 +264,8 @@ def test_run_get(runner, mock_ps, mocker):
         execution_time=1.5,
         variables={"var1": "val1"},
         llm_config={"temp": 0.7},
+        validation={"name": "sample(100)"},
+        dropped_rows={"name": 3},
     )
     mock_ps.get_run.return_value = mock_run
 
@@ -256,6 +277,7 @@ def test_run_get(runner, mock_ps, mocker):
     assert "LLM output" in result.output
     assert "Variables" in result.output
     assert "LLM config" in result.output
+    assert "sample(100)" in result.output
     mock_ps.get_run.assert_called_once_with("test-prompt", "v1", "test-run")
 
 
@@ -283,6 +305,8 @@ def test_last_run(runner, mock_ps, mocker):
         llm_output="LLM output",
         variables=None,
         llm_config=None,
+        validation=None,
+        dropped_rows=None,
     )
     mock_ps.get_last_run.return_value = mock_run
 
@@ -290,3 +314,64 @@ def test_last_run(runner, mock_ps, mocker):
 
     assert result.exit_code == 0
     assert "test-run" in result.output
+
+
+def test_export_bundle(runner, mock_ps, mocker):
+    """Test exporting a bundle with a pinned version."""
+    mocker.patch("promptsite.cli.get_promptsite", return_value=mock_ps)
+
+    result = runner.invoke(
+        cli, ["export-bundle", "prompts.bundle.json", "--pin", "test-prompt=v1"]
+    )
+
+    assert result.exit_code == 0
+    assert "Exported bundle to prompts.bundle.json" in result.output
+    mock_ps.export_bundle.assert_called_once_with(
+        "prompts.bundle.json", version_ids={"test-prompt": "v1"}, format=None
+    )
+
+
+def test_export_bundle_invalid_pin(runner, mock_ps, mocker):
+    """Test exporting a bundle with a malformed pin."""
+    mocker.patch("promptsite.cli.get_promptsite", return_value=mock_ps)
+
+    result = runner.invoke(cli, ["export-bundle", "out.json", "--pin", "test-prompt"])
+
+    assert result.exit_code == 1
+    mock_ps.export_bundle.assert_not_called()
+
+
+def test_run_export_parquet(runner, mock_ps, mocker):
+    """Test exporting runs to Parquet."""
+    mocker.patch("promptsite.cli.get_promptsite", return_value=mock_ps)
+    mock_ps.runs = mocker.Mock()
+    query = mock_ps.runs.where.return_value
+
+    result = runner.invoke(cli, ["run", "export", "runs", "--prompt-id", "p1"])
+
+    assert result.exit_code == 0
+    assert "Exported runs to runs" in result.output
+    mock_ps.runs.where.assert_called_once_with(prompt_id="p1", version_id=None)
+    query.to_parquet.assert_called_once_with("runs")
+
+
+def test_search(runner, mock_ps, mocker):
+    """Test searching run outputs."""
+    mocker.patch("promptsite.cli.get_promptsite", return_value=mock_ps)
+    mock_ps.search.return_value = [
+        {
+            "prompt_id": "test-prompt",
+            "version_id": "v1",
+            "run_id": "run1",
+            "created_at": "2024-01-01 10:00:00+00:00",
+            "snippet": "...a [timeout] occurred...",
+        }
+    ]
+
+    result = runner.invoke(cli, ["search", "timeout", "-p", "test-prompt"])
+    assert result.exit_code == 0
+    assert "test-prompt [v1] run1  2024-01-01 10:00" in result.output
+    assert "[timeout]" in result.output
+    mock_ps.search.assert_called_once_with(
+        "timeout", scope="runs", prompt_id="test-prompt", limit=20
+    )
@@ -0,0 +1,67 @@
+import os
+from datetime import datetime, timezone
+
+import pytest
+
+from promptsite import codec
+from promptsite.codec import JsonCodec, OrjsonCodec
+from promptsite.config import Config
+from promptsite.storage.file import FileStorage
+
+
+@pytest.fixture(autouse=True)
+def reset_codec():
+    yield
+    codec.set_codec("auto")
+
+
+def test_codecs_write_the_same_json():
+    """Test that orjson and the standard library encode values identically."""
+    pytest.importorskip("orjson")
+    value = {
+        "name": "café",
+        "created_at": datetime(2024, 1, 1, tzinfo=timezone.utc),
+        "rows": [{"b": 1, "a": [1.5, None, True]}],
+    }
+    expected = JsonCodec().dumps(value, default=str, sort_keys=True)
+    assert OrjsonCodec().dumps(value, default=str, sort_keys=True) == expected
+    assert '"created_at":"2024-01-01 00:00:00+00:00"' in expected
+    assert OrjsonCodec().loads(expected) == JsonCodec().loads(expected.encode())
+    assert OrjsonCodec().dumps({1: "one"}) == JsonCodec().dumps({1: "one"})
+
+
+def test_set_codec():
+    """Test choosing the codec by name."""
+    pytest.importorskip("orjson")
+    assert codec.get_codec().name == "orjson"
+    codec.set_codec("json")
+    assert codec.get_codec().name == "json"
+    assert codec.loads(codec.dumps_bytes([1, 2])) == [1, 2]
+    with pytest.raises(ValueError):
+        codec.set_codec("yaml")
+
+
+def test_strip_code_fences():
+    """Test removing Markdown code fences around LLM output."""
+    assert codec.strip_code_fences('```json\n{"a": 1}\n```') == '\n{"a": 1}\n'
+    assert codec.strip_code_fences("plain text") == "plain text"
+
+
+def test_config_codec_is_scoped_to_storage(storage_path):
+    """Test that a configured codec only applies to the storage built from it."""
+    pytest.importorskip("orjson")
+    config = Config(
+        {
+            "storage_backend": "file",
+            "llm_backend": "openai",
+            "llm_config": {"model": "gpt-4o-mini"},
+            "json_codec": "json",
+        }
+    )
+    storage = config.get_storage_backend()
+    Config().load_config()
+
+    assert codec.get_codec().name == "orjson"
+    assert storage._get_codec().name == "json"
+    assert FileStorage(str(storage_path))._get_codec().name == "orjson"
+    os.remove(config.config_file)
@@ -1,9 +1,18 @@
+import json
+import os
+import re
+from typing import List, Optional
+
 import pytest
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
 
-from promptsite.exceptions import DatasetFieldNotFoundError
-from promptsite.model.dataset import Dataset
-from promptsite.model.variable import ArrayVariable, ObjectVariable
+from promptsite.exceptions import (
+    DatasetFieldNotFoundError,
+    DatasetGenerationError,
+    DatasetNotFoundError,
+)
+from promptsite.model.dataset import Dataset, DatasetGraph
+from promptsite.model.variable import ArrayVariable, Budget, ObjectVariable
 
 
 # Test models
@@ -104,6 +113,18 @@ def test_dataset_validate_invalid_data():
     assert dataset.validate() is False
 
 
+def test_dataset_validate_policy(customer_data):
+    invalid_row = {"id": "not_an_int", "name": "John", "age": 25, "gender": "Male"}
+    dataset = Dataset(
+        id="customers",
+        variable=ArrayVariable(model=CustomerModel, validation="first(2)"),
+        data=customer_data + [invalid_row],
+    )
+    assert dataset.validate() is True
+    assert dataset.validate("full") is False
+    assert dataset.validate("off") is True
+
+
 def test_dataset_with_relationships(orders_dataset):
     assert orders_dataset.relationships is not None
     assert "customer_id" in orders_dataset.relationships
@@ -155,6 +176,76 @@ def test_generate_single_dataset(config, mock_llm, mocker):
     )
 
 
+def _customers(ids):
+    return json.dumps(
+        [{"id": i, "name": f"Customer {i}", "age": 25, "gender": "Female"} for i in ids]
+    )
+
+
+def test_generate_dataset_in_batches(config, mock_llm, mocker):
+    def run(prompt):
+        batch = int(re.search(r"This is batch (\d+) of 3", prompt).group(1))
+        size = int(re.search(r"a list of (\d+) JSON instances", prompt).group(1))
+        return _customers(range(batch * 10, batch * 10 + size))
+
+    mock_llm.run.side_effect = run
+    mocker.patch("promptsite.config.Config.get_llm_backend", return_value=mock_llm)
+
+    dataset = Dataset.generate(
+        id="customers",
+        variable=ArrayVariable(model=CustomerModel, description="customers"),
+        description="customers between 20 and 30 years old",
+        num_rows=5,
+        batch_size=2,
+    )
+
+    assert mock_llm.run.call_count == 3
+    assert [row["id"] for row in dataset.data] == [10, 11, 20, 21, 30]
+    assert dataset.validate() is True
+
+
+def test_generate_dataset_in_batches_retries_missing_rows(config, mock_llm, mocker):
+    invalid_row = {"id": 99, "name": "Invalid"}
+    mock_llm.run.side_effect = [
+        RuntimeError("rate limited"),
+        _customers([1, 2]),
+        "not json",
+        # Retry of the missing 4 rows, with a duplicate and an invalid row
+        _customers([2, 3])[:-1] + ", " + json.dumps(invalid_row) + "]",
+        _customers([4]),
+        # Retry of the missing row
+        _customers([5]),
+    ]
+    mocker.patch("promptsite.config.Config.get_llm_backend", return_value=mock_llm)
+
+    dataset = Dataset.generate(
+        id="customers",
+        variable=ArrayVariable(model=CustomerModel),
+        num_rows=5,
+        batch_size=2,
+        max_workers=1,
+    )
+
+    assert mock_llm.run.call_count == 6
+    assert [row["id"] for row in dataset.data] == [1, 2, 3, 4, 5]
+
+
+def test_generate_dataset_in_batches_fails(config, mock_llm, mocker):
+    mock_llm.run.side_effect = RuntimeError("rate limited")
+    mocker.patch("promptsite.config.Config.get_llm_backend", return_value=mock_llm)
+
+    with pytest.raises(DatasetGenerationError):
+        Dataset.generate(
+            id="customers",
+            variable=ArrayVariable(model=CustomerModel),
+            num_rows=5,
+            batch_size=2,
+            max_retries=1,
+        )
+
+    assert mock_llm.run.call_count == 6
+
+
 def test_generate_dataset_with_relationships(config, mock_llm, mocker):
     mock_llm.run.return_value = """```json
         [
@@ -191,5 +282,433 @@ def test_generate_dataset_with_relationships(config, mock_llm, mocker):
     ]
     assert (
         mock_llm.run.call_args[0][0]
-        == 'You are a data expert who can generates data that satisfies the DATA DESCRIPTION, the DATA REQUIREMENT and the OUTPUT SCHEMA, given the EXTRA DATASETS.\n\n\nDATA DESCRIPTION:\norders\n\n\n\nEXTRA DATASETS:\n\n- DATASET "customers_between_20_and_30":\n    * SCHEMA:\n    {\'properties\': {\'id\': {\'description\': \'The id of the customer\', \'title\': \'Id\', \'type\': \'integer\'}, \'name\': {\'description\': \'The name of the customer\', \'title\': \'Name\', \'type\': \'string\'}, \'age\': {\'description\': \'The age of the customer\', \'title\': \'Age\', \'type\': \'integer\'}, \'gender\': {\'description\': \'The gender of the customer\', \'title\': \'Gender\', \'type\': \'string\'}}, \'required\': [\'id\', \'name\', \'age\', \'gender\'], \'title\': \'CustomerModel\', \'type\': \'object\'}\n    * DATASET:\n    [{\'id\': 1, \'name\': \'John\', \'age\': 25, \'gender\': \'Male\'}, {\'id\': 2, \'name\': \'Jane\', \'age\': 22, \'gender\': \'Female\'}]\n\n\n\nDATA REQUIREMENT: \norders below 100 dollars for customers between 20 and 30 years old\n\n\n- Make sure "customer_id" field matches "id" field in the DATASET "customers_between_20_and_30"\n\n\n\nOUTPUT SCHEMA:\nThe output should be formatted as a list of  JSON instances that conforms to the JSON schema below. Please only output the JSON , nothing else in the output.\n\n                          \nAs an example, for the schema {"properties": {"foo": {"title": "Foo", "description": "a list of strings", "type": "array", "items": {"type": "string"}}}, "required": ["foo"]}\nthe object {"foo": ["bar", "baz"]} is a well-formatted instance of the schema. The object {"properties": {"foo": ["bar", "baz"]}} is not well-formatted.\n\nHere is the instance schema in the output:\n```\n{"properties": {"id": {"description": "The id of the order", "title": "Id", "type": "integer"}, "customer_id": {"description": "The id of the customer", "title": "Customer Id", "type": "integer"}, "amount": {"description": "The amount of the order", "title": "Amount", "type": "number"}}, "required": ["id", "customer_id", "amount"], "title": "OrderModel", "type": "object"}\n```\n\nHere is an example of the output:\n```\n[{"foo": ["bar", "baz"]}, {"foo": ["bar", "baz"]}]\n```'
+        == 'You are a data expert who can generates data that satisfies the DATA DESCRIPTION, the DATA REQUIREMENT and the OUTPUT SCHEMA, given the EXTRA DATASETS.\n\n\nDATA DESCRIPTION:\norders\n\n\n\nEXTRA DATASETS:\n\n- DATASET "customers_between_20_and_30":\n    * SCHEMA:\n    {\'properties\': {\'id\': {\'description\': \'The id of the customer\', \'title\': \'Id\', \'type\': \'integer\'}, \'name\': {\'description\': \'The name of the customer\', \'title\': \'Name\', \'type\': \'string\'}, \'age\': {\'description\': \'The age of the customer\', \'title\': \'Age\', \'type\': \'integer\'}, \'gender\': {\'description\': \'The gender of the customer\', \'title\': \'Gender\', \'type\': \'string\'}}, \'required\': [\'id\', \'name\', \'age\', \'gender\'], \'title\': \'CustomerModel\', \'type\': \'object\'}\n    * KEYS:\n    {"id": [1, 2]}\n    * PREVIEW:\n    [{"id": 1, "name": "John", "age": 25, "gender": "Male"}, {"id": 2, "name": "Jane", "age": 22, "gender": "Female"}]\n\n\n\nDATA REQUIREMENT: \norders below 100 dollars for customers between 20 and 30 years old\n\n\n- Make sure "customer_id" field matches "id" field in the DATASET "customers_between_20_and_30"\n\n\n\nOUTPUT SCHEMA:\nThe output should be formatted as a list of  JSON instances that conforms to the JSON schema below. Please only output the JSON , nothing else in the output.\n\n                          \nAs an example, for the schema {"properties": {"foo": {"title": "Foo", "description": "a list of strings", "type": "array", "items": {"type": "string"}}}, "required": ["foo"]}\nthe object {"foo": ["bar", "baz"]} is a well-formatted instance of the schema. The object {"properties": {"foo": ["bar", "baz"]}} is not well-formatted.\n\nHere is the instance schema in the output:\n```\n{"properties": {"id": {"description": "The id of the order", "title": "Id", "type": "integer"}, "customer_id": {"description": "The id of the customer", "title": "Customer Id", "type": "integer"}, "amount": {"description": "The amount of the order", "title": "Amount", "type": "number"}}, "required": ["id", "customer_id", "amount"], "title": "OrderModel", "type": "object"}\n```\n\nHere is an example of the output:\n```\n[{"foo": ["bar", "baz"]}, {"foo": ["bar", "baz"]}]\n```'
     )
+
+
+def _graph_llm(prompt):
+    if "OrderModel" in prompt:
+        return json.dumps([{"id": 1, "customer_id": 2, "amount": 50}])
+    return _customers([1, 2])
+
+
+def test_generate_dataset_drops_unrelated_rows(
+    config, mock_llm, mocker, customers_dataset
+):
+    mock_llm.run.return_value = json.dumps(
+        [
+            {"id": 1, "customer_id": 1, "amount": 50},
+            {"id": 2, "customer_id": 3, "amount": 60},
+        ]
+    )
+    mocker.patch("promptsite.config.Config.get_llm_backend", return_value=mock_llm)
+
+    orders = Dataset.generate(
+        id="orders",
+        variable=ArrayVariable(model=OrderModel),
+        relationships={"customer_id": customers_dataset["id"]},
+    )
+
+    assert orders.data == [{"id": 1, "customer_id": 1, "amount": 50}]
+    assert orders.relationships == {"customer_id": customers_dataset["id"]}
+
+
+def test_check_relationships(customers_dataset, orders_dataset):
+    assert orders_dataset.check_relationships() == {}
+    assert customers_dataset.check_relationships() == {}
+
+    orders_dataset.data.append({"id": 3, "customer_id": 3, "amount": 300})
+    assert orders_dataset.check_relationships() == {"customer_id": [2]}
+
+
+def test_key_values_and_sample_rows(customers_dataset):
+    customers_dataset.data.append(dict(customers_dataset.data[0]))
+    assert customers_dataset.key_values("id") == [1, 2]
+    assert customers_dataset.sample_rows(5) == customers_dataset.data
+
+    sample = customers_dataset.sample_rows(2, seed=1)
+    assert len(sample) == 2
+    assert sample == customers_dataset.sample_rows(2, seed=1)
+
+
+def test_dataset_graph_order():
+    graph = DatasetGraph()
+    graph.add(
+        "orders",
+        ArrayVariable(model=OrderModel),
+        relationships={"customer_id": "customers.id"},
+    )
+    graph.add("customers", ArrayVariable(model=CustomerModel))
+    graph.add("products", ArrayVariable(model=CustomerModel))
+
+    assert graph.order() == [["customers", "products"], ["orders"]]
+
+
+@pytest.mark.parametrize(
+    "relationships, error",
+    [
+        ({"customer_id": "missing.id"}, ValueError),
+        ({"customer_id": "customers"}, ValueError),
+        ({"customer_id": "customers.missing"}, DatasetFieldNotFoundError),
+    ],
+)
+def test_dataset_graph_invalid_relationships(relationships, error):
+    graph = DatasetGraph()
+    graph.add("customers", ArrayVariable(model=CustomerModel))
+    graph.add("orders", ArrayVariable(model=OrderModel), relationships=relationships)
+
+    with pytest.raises(error):
+        graph.order()
+
+
+def test_dataset_graph_cycle():
+    graph = DatasetGraph()
+    graph.add(
+        "customers",
+        ArrayVariable(model=CustomerModel),
+        relationships={"id": "orders.customer_id"},
+    )
+    graph.add(
+        "orders",
+        ArrayVariable(model=OrderModel),
+        relationships={"customer_id": "customers.id"},
+    )
+
+    with pytest.raises(ValueError, match="cyclic"):
+        graph.order()
+
+    with pytest.raises(ValueError):
+        DatasetGraph(list(graph.specs.values()) * 2)
+
+
+def test_dataset_graph_generate_all(config, mock_llm, mocker):
+    mock_llm.run.side_effect = _graph_llm
+    mocker.patch("promptsite.config.Config.get_llm_backend", return_value=mock_llm)
+
+    graph = DatasetGraph()
+    graph.add(
+        "orders",
+        ArrayVariable(model=OrderModel, description="orders"),
+        relationships={"customer_id": "customers.id"},
+    )
+    graph.add("customers", ArrayVariable(model=CustomerModel, description="customers"))
+
+    datasets = graph.generate_all()
+
+    assert list(datasets) == ["orders", "customers"]
+    assert datasets["customers"].data == json.loads(_customers([1, 2]))
+    assert datasets["orders"].data == [{"id": 1, "customer_id": 2, "amount": 50}]
+    assert datasets["orders"].relationships["customer_id"] == {
+        "field": "id",
+        "dataset": datasets["customers"],
+    }
+
+    orders_prompt = next(
+        call.args[0]
+        for call in mock_llm.run.call_args_list
+        if "OrderModel" in call.args[0]
+    )
+    assert '{"id": [1, 2]}' in orders_prompt
+
+
+@pytest.mark.parametrize("format", ["arrow", "parquet", "jsonl"])
+def test_save_and_get_dataset(
+    promptsite, customers_dataset, orders_dataset, order_data, format
+):
+    if format != "jsonl":
+        pytest.importorskip("pyarrow")
+
+    promptsite.save_dataset(customers_dataset, format=format)
+    promptsite.save_dataset(orders_dataset, format=format)
+
+    assert promptsite.list_datasets() == ["customers", "orders"]
+
+    orders = promptsite.get_dataset("orders")
+    assert (orders.table is not None) == (format != "jsonl")
+    assert len(orders) == 2
+    assert list(orders.iter_rows(batch_size=1)) == order_data
+    assert (orders.to_df() is orders.to_df()) == (format != "jsonl")
+    assert orders.to_df()["amount"].tolist() == [100, 200]
+    assert orders.data == order_data
+    assert orders.description == "Test orders"
+
+    customers = orders.relationships["customer_id"]["dataset"]
+    assert customers.id == "customers"
+    assert orders.relationships["customer_id"]["field"] == "id"
+    assert customers.key_values("id") == [1, 2]
+    assert orders.check_relationships() == {}
+    assert orders.validate() is True
+
+
+def test_save_dataset_replaces_format(promptsite, customers_dataset):
+    pytest.importorskip("pyarrow")
+
+    promptsite.save_dataset(customers_dataset, format="jsonl")
+    promptsite.save_dataset(customers_dataset, format="arrow")
+
+    files = os.listdir(os.path.join(promptsite.storage.datasets_dir, "customers"))
+    assert sorted(files) == ["data.arrow", "dataset.yaml"]
+    assert promptsite.get_dataset("customers").data == customers_dataset.data
+
+
+class NoteModel(BaseModel):
+    id: int
+    note: Optional[str] = None
+
+
+@pytest.mark.parametrize("format", ["arrow", "parquet"])
+def test_save_dataset_fields_missing_from_first_row(promptsite, format):
+    pytest.importorskip("pyarrow")
+    dataset = Dataset(
+        id="notes",
+        variable=ArrayVariable(model=NoteModel),
+        data=[{"id": 1}, {"id": 2, "note": "hello"}],
+    )
+    assert dataset.to_arrow().column_names == ["id", "note"]
+
+    promptsite.save_dataset(dataset, format=format)
+
+    assert promptsite.get_dataset("notes").data == [
+        {"id": 1, "note": None},
+        {"id": 2, "note": "hello"},
+    ]
+
+
+def test_save_object_dataset(promptsite):
+    dataset = Dataset(
+        id="customer",
+        variable=ObjectVariable(model=CustomerModel),
+        data={"id": 1, "name": "John", "age": 25, "gender": "Male"},
+    )
+    promptsite.save_dataset(dataset)
+
+    loaded = promptsite.get_dataset("customer")
+    assert loaded.data == dataset.data
+    assert len(loaded) == 1
+
+
+def test_get_and_delete_missing_dataset(promptsite, customers_dataset):
+    with pytest.raises(DatasetNotFoundError):
+        promptsite.get_dataset("customers")
+
+    promptsite.save_dataset(customers_dataset)
+    promptsite.delete_dataset("customers")
+
+    assert promptsite.list_datasets() == []
+    with pytest.raises(DatasetNotFoundError):
+        promptsite.delete_dataset("customers")
+
+
+def test_table_dataset_caches_frame(customers_dataset):
+    pa = pytest.importorskip("pyarrow")
+
+    dataset = Dataset(
+        "customers",
+        customers_dataset.variable,
+        pa.Table.from_pylist(customers_dataset.data),
+    )
+    df = dataset.to_df()
+    assert dataset.to_df() is df
+
+    # Accessing the rows makes them modifiable, the frame is no longer cached
+    dataset.data.append(dict(dataset.data[0]))
+    assert len(dataset.to_df()) == 3
+
+
+class AddressModel(BaseModel):
+    city: str
+
+
+class ProfileModel(BaseModel):
+    id: int
+    score: float
+    active: bool
+    nickname: Optional[str] = None
+    tags: List[str] = []
+    address: AddressModel
+
+
+def test_validation_errors(customers_dataset):
+    rows = [
+        {
+            "id": 1,
+            "score": 1,
+            "active": True,
+            "tags": ["a"],
+            "address": {"city": "Paris"},
+        },
+        {"id": 2.5, "score": 2.0, "active": 1, "address": {"city": 3}},
+        {"id": 3, "score": "high", "active": False, "nickname": 7, "tags": [1]},
+    ]
+    dataset = Dataset("profiles", ArrayVariable(model=ProfileModel), rows)
+
+    errors = dataset.validation_errors()
+    assert list(errors.columns) == ["row", "field", "error"]
+    assert sorted(zip(errors["row"], errors["field"])) == [  # noqa: B905
+        (1, "address"),
+        (1, "id"),
+        (2, "address"),
+        (2, "nickname"),
+        (2, "score"),
+        (2, "tags"),
+    ]
+    assert dataset.validate() is False
+    assert dataset.validate("first(1)") is True
+    assert dataset.validate("off") is True
+
+    assert customers_dataset.validation_errors().empty
+
+
+def test_validation_errors_missing_column_and_relationships(
+    customers_dataset, orders_dataset
+):
+    orders_dataset.data = [
+        {"id": 1, "customer_id": 1, "amount": 10},
+        {"id": 2, "customer_id": 5, "amount": 20},
+        {"id": 3, "amount": 30},
+    ]
+
+    errors = orders_dataset.validation_errors()
+    assert errors.values.tolist() == [
+        [1, "customer_id", "Not in customers.id"],
+        [2, "customer_id", "Field required"],
+        [2, "customer_id", "Not in customers.id"],
+    ]
+
+    orders_dataset.data = [{"id": 1, "amount": 10}]
+    assert orders_dataset.validation_errors()["error"].tolist() == [
+        "Field required",
+        "Not in customers.id",
+    ]
+
+
+def test_validation_errors_row_validators():
+    class PositiveModel(BaseModel):
+        value: int
+
+        @field_validator("value")
+        @classmethod
+        def check_positive(cls, value):
+            if value < 0:
+                raise ValueError("must be positive")
+            return value
+
+    dataset = Dataset(
+        "values", ArrayVariable(model=PositiveModel), [{"value": 1}, {"value": -1}]
+    )
+
+    errors = dataset.validation_errors()
+    assert errors["row"].tolist() == [1]
+    assert "must be positive" in errors["error"][0]
+
+
+def test_validation_errors_invalid_data():
+    dataset = Dataset("customers", ArrayVariable(model=CustomerModel), "not a list")
+    assert dataset.validate() is False
+
+    dataset.data = [{"id": 1, "name": "John", "age": 25, "gender": "Male"}, "John"]
+    assert dataset.validation_errors()["row"].tolist() == [1]
+
+
+def test_evaluate_dataset(promptsite, customers_dataset, mock_llm):
+    promptsite.register_prompt("greet", initial_content="Hello {{ name }}")
+    v1 = promptsite.get_prompt("greet").get_latest_version()
+    v2 = promptsite.add_prompt_version("greet", "Hi {{ name }}, age {{ age }}")
+    mock_llm.config = {"model": "test"}
+    mock_llm.run.side_effect = lambda prompt: prompt.upper()
+
+    results = promptsite.evaluate(
+        "greet", [v1.version_id, v2.version_id], customers_dataset, mock_llm
+    )
+
+    assert list(results.index) == [0, 1]
+    assert list(results["llm_output"].columns) == [v1.version_id, v2.version_id]
+    assert results["llm_output"].values.tolist() == [
+        ["HELLO JOHN", "HI JOHN, AGE 25"],
+        ["HELLO JANE", "HI JANE, AGE 22"],
+    ]
+    assert results["error"].isna().all().all()
+
+    runs = promptsite.list_runs("greet", v1.version_id)
+    assert sorted(run.run_id for run in runs) == sorted(
+        results["run_id"][v1.version_id]
+    )
+    assert promptsite.get_run_stats("greet", v1.version_id).count == 2
+
+
+def test_evaluate_dataset_resumes(promptsite, customers_dataset, mock_llm):
+    promptsite.register_prompt("greet", initial_content="Hello {{ name }}")
+    mock_llm.config = {"model": "test"}
+    mock_llm.run.side_effect = [RuntimeError("timeout"), "Hello Jane"]
+
+    results = promptsite.evaluate("greet", None, customers_dataset, mock_llm, 1)
+    version_id = results["run_id"].columns[0]
+    assert results["error"][version_id][0] == "timeout"
+    assert results["run_id"][version_id].isna().tolist() == [True, False]
+
+    mock_llm.run.side_effect = lambda prompt: prompt
+    results = promptsite.evaluate("greet", None, customers_dataset, mock_llm)
+
+    # Only the failed item is run again
+    assert mock_llm.run.call_count == 3
+    assert list(results["llm_output"][version_id]) == ["Hello John", "Hello Jane"]
+    assert results["error"].isna().all().all()
+    assert len(promptsite.list_runs("greet", version_id)) == 2
+
+    # Edited rows are run again, instead of reusing the runs of the old rows
+    customers_dataset.data[1] = {**customers_dataset.data[1], "name": "Janet"}
+    results = promptsite.evaluate("greet", None, customers_dataset, mock_llm)
+    assert mock_llm.run.call_count == 4
+    assert list(results["llm_output"][version_id]) == ["Hello John", "Hello Janet"]
+
+
+def test_evaluate_dataset_partitions(promptsite, customers_dataset, mock_llm):
+    promptsite.register_prompt(
+        "summarize",
+        initial_content="Summarize {{ customers }}",
+        variables={"customers": ArrayVariable(model=CustomerModel)},
+    )
+    mock_llm.config = {"model": "test"}
+    mock_llm.run.return_value = "summary"
+
+    results = promptsite.evaluate(
+        "summarize",
+        None,
+        customers_dataset,
+        mock_llm,
+        partition_variable="customers",
+        partition_size=1,
+    )
+
+    assert list(results.index) == [0, 1]
+    prompts = [call.args[0] for call in mock_llm.run.call_args_list]
+    assert any('"name": "John"' in p and "Jane" not in p for p in prompts)
+    assert any('"name": "Jane"' in p and "John" not in p for p in prompts)
+
+    with pytest.raises(ValueError):
+        promptsite.evaluate(
+            "summarize", None, customers_dataset, mock_llm, partition_size=1
+        )
+
+
+def test_evaluate_dataset_budget(promptsite, customers_dataset, mock_llm):
+    promptsite.register_prompt(
+        "summarize",
+        initial_content="Summarize {{ customers }}",
+        variables={
+            "customers": ArrayVariable(model=CustomerModel, budget=Budget(max_bytes=80))
+        },
+    )
+    mock_llm.config = {"model": "test"}
+    mock_llm.run.return_value = "summary"
+
+    results = promptsite.evaluate(
+        "summarize", None, customers_dataset, mock_llm, partition_variable="customers"
+    )
+
+    # The budget of the stored variable caps the rendered partition
+    prompt = mock_llm.run.call_args.args[0]
+    assert "John" in prompt and "Jane" not in prompt
+    version_id = results["run_id"].columns[0]
+    run = promptsite.get_run("summarize", version_id, results["run_id"][version_id][0])
+    assert run.dropped_rows == {"customers": 1}
@@ -4,6 +4,7 @@ from promptsite.decorator import tracker
 from promptsite.model.variable import (
     ArrayVariable,
     BooleanVariable,
+    Budget,
     NumberVariable,
     ObjectVariable,
     StringVariable,
@@ -360,3 +361,46 @@ def test_decorator(promptsite):
     runs_after = len(version.runs)
 
     assert runs_after == runs_before
+
+
+def test_decorator_validation_policy(promptsite):
+    class TestModel(BaseModel):
+        name: str
+
+    @tracker(
+        prompt_id="test_prompt_with_validation_policy",
+        variables={"rows": ArrayVariable(model=TestModel, validation="first(2)")},
+    )
+    def mock_llm_call(content=None, llm_config=None, variables=None, **kwargs):
+        return "done"
+
+    rows = [{"name": "a"}, {"name": "b"}, {"name": 3}]
+    mock_llm_call(content="Rows: {{ rows }}", variables={"rows": rows})
+    mock_llm_call(
+        content="Rows: {{ rows }}", variables={"rows": rows}, validation="off"
+    )
+
+    runs = promptsite.runs.order_by("created_at").all()
+    assert [run["validation"] for run in runs] == [
+        {"rows": "first(2)"},
+        {"rows": "off"},
+    ]
+
+
+def test_decorator_budget(promptsite):
+    class TestModel(BaseModel):
+        name: str
+
+    @tracker(
+        prompt_id="test_prompt_with_budget",
+        variables={"rows": ArrayVariable(model=TestModel, budget=Budget(max_bytes=40))},
+    )
+    def mock_llm_call(content=None, llm_config=None, variables=None, **kwargs):
+        return "done"
+
+    rows = [{"name": str(i)} for i in range(10)]
+    mock_llm_call(content="Rows: {{ rows }}", variables={"rows": rows})
+
+    run = promptsite.runs.one()
+    assert run["dropped_rows"] == {"rows": 8}
+    assert '{"name": "2"}' not in run["final_prompt"]
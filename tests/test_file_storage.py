@@ -1,3 +1,6 @@
+import json
+import sqlite3
+from contextlib import closing
 from pathlib import Path
 
 import pytest
@@ -6,7 +9,9 @@ import yaml
 from promptsite.config import Config
 from promptsite.core import PromptSite
 from promptsite.exceptions import PromptNotFoundError
+from promptsite.model.run import Run
 from promptsite.storage.file import FileStorage
+from promptsite.storage.search import SearchIndex, fts5_available
 
 
 def test_register_prompt(promptsite, storage_path):
@@ -291,3 +296,243 @@ def test_get_version_from_initial_prompt(promptsite):
     promptsite.register_prompt("test_version_from_initial_prompt")
     prompt = promptsite.get_prompt("test_version_from_initial_prompt")
     assert prompt.get_latest_version() is None
+
+
+def test_run_index_projection(promptsite, storage_path, mocker):
+    """Test that queries on indexed columns read the run index only."""
+    promptsite.register_prompt("test_index", initial_content="Test content")
+    version_id = promptsite.get_prompt("test_index").get_latest_version().version_id
+    for execution_time in [1.0, 2.0]:
+        promptsite.add_run(
+            "test_index",
+            version_id,
+            "A large prompt",
+            llm_output="A large output",
+            execution_time=execution_time,
+        )
+
+    index_path = (
+        Path(storage_path)
+        / "prompts"
+        / "test_index"
+        / "versions"
+        / version_id
+        / "runs.index.jsonl"
+    )
+    assert index_path.exists()
+
+    iter_runs = mocker.spy(promptsite.storage, "_iter_runs")
+    runs = (
+        promptsite.runs.where(execution_time__gt=1.5)
+        .only(["run_id", "execution_time"])
+        .all()
+    )
+    assert len(runs) == 1
+    assert set(runs[0]) == {"run_id", "execution_time"}
+    iter_runs.assert_not_called()
+
+    # A missing index is rebuilt from the run files
+    index_path.unlink()
+    runs = promptsite.runs.only(["run_id", "prompt_id"]).all()
+    assert len(runs) == 2
+    assert all(r["prompt_id"] == "test_index" for r in runs)
+    assert index_path.exists()
+
+
+def test_parallel_loading_matches_serial(promptsite, storage_path):
+    """Test that parallel reads return the same data in the same order."""
+    for i in range(3):
+        promptsite.register_prompt(f"parallel_{i}", initial_content=f"Content {i}")
+        promptsite.add_prompt_version(f"parallel_{i}", f"Content {i} v2")
+        version_id = promptsite.get_prompt(f"parallel_{i}").get_latest_version()
+        for j in range(3):
+            promptsite.add_run(
+                f"parallel_{i}",
+                version_id.version_id,
+                final_prompt=f"Prompt {j}",
+                llm_output=f"Output {j}",
+                execution_time=float(j),
+            )
+
+    parallel = FileStorage(base_path=str(storage_path), max_workers=4)
+    serial = FileStorage(base_path=str(storage_path), max_workers=1)
+
+    assert parallel.list_prompts() == serial.list_prompts()
+    assert [v["created_at"] for v in parallel.list_versions("parallel_0")] == sorted(
+        v["created_at"] for v in serial.list_versions("parallel_0")
+    )
+    assert list(parallel.query_runs()) == list(serial.query_runs())
+    assert parallel._executor is not None
+    assert serial._executor is None
+
+
+def test_process_pool_parsing(promptsite, storage_path, mocker):
+    """Test that parsing run files in worker processes keeps the results."""
+    mocker.patch("promptsite.storage.file.RUN_PARSE_CHUNK_SIZE", 2)
+    promptsite.register_prompt("parsed", initial_content="Content")
+    version_id = promptsite.get_prompt("parsed").get_latest_version().version_id
+    for i in range(5):
+        promptsite.add_run(
+            "parsed",
+            version_id,
+            final_prompt=f"Prompt {i}",
+            llm_output=f"Output {i}",
+            execution_time=float(i),
+        )
+
+    serial = FileStorage(base_path=str(storage_path), max_workers=1)
+    with FileStorage(base_path=str(storage_path), parse_processes=2) as storage:
+        assert storage.list_prompts() == serial.list_prompts()
+        assert list(storage.query_runs()) == list(serial.query_runs())
+        process_pool = storage._process_pool
+        assert process_pool is not None
+        assert process_pool._mp_context.get_start_method() == "spawn"
+
+    # Closing shuts the pools down
+    assert storage._process_pool is None
+    assert storage._executor is None
+    with pytest.raises(RuntimeError):
+        process_pool.submit(len, [])
+
+
+def test_run_stats(promptsite, storage_path):
+    """Test that run statistics are maintained as runs are added."""
+    promptsite.register_prompt("stats", initial_content="Content")
+    version_id = promptsite.get_prompt("stats").get_latest_version().version_id
+    for execution_time in [0.5, 3.0, 1.5]:
+        promptsite.add_run(
+            "stats", version_id, final_prompt="Prompt", execution_time=execution_time
+        )
+
+    stats_path = (
+        Path(storage_path)
+        / "prompts"
+        / "stats"
+        / "versions"
+        / version_id
+        / "stats.yaml"
+    )
+    assert stats_path.exists()
+
+    stats = promptsite.get_run_stats("stats", version_id)
+    assert stats.count == 3
+    assert stats.execution_time.mean == pytest.approx(5.0 / 3)
+    assert stats.execution_time.min == 0.5
+    assert stats.execution_time.max == 3.0
+    assert stats.first_run_at <= stats.last_run_at
+    last_run = promptsite.get_last_run("stats")
+    assert stats.last_run_at == str(last_run.created_at)
+
+    # Stale or missing statistics are rebuilt from the runs
+    stats_path.unlink()
+    assert promptsite.get_run_stats("stats", version_id).count == 3
+    assert stats_path.exists()
+    assert promptsite.rebuild_run_stats() == 1
+
+    # An explicit rebuild reads the run files, even if the index has every run
+    index_path = stats_path.parent / "runs.index.jsonl"
+    entries = [json.loads(line) for line in index_path.read_text().splitlines()]
+    entries[0]["execution_time"] = 9
+    index_path.write_text("".join(json.dumps(entry) + "\n" for entry in entries))
+    assert promptsite.get_run_stats("stats", version_id).execution_time.max == 3.0
+    stats_path.unlink()
+    assert promptsite.get_run_stats("stats", version_id).execution_time.max == 9
+    promptsite.rebuild_run_stats("stats")
+    assert promptsite.get_run_stats("stats", version_id).execution_time.max == 3.0
+    assert all(
+        json.loads(line)["execution_time"] != 9
+        for line in index_path.read_text().splitlines()
+    )
+    with pytest.raises(PromptNotFoundError):
+        promptsite.rebuild_run_stats("missing")
+
+
+def test_add_runs(promptsite, storage_path):
+    """Test that runs added in bulk are indexed like runs added one at a time."""
+    promptsite.register_prompt("bulk", initial_content="Content")
+    version_id = promptsite.get_prompt("bulk").get_latest_version().version_id
+    promptsite.add_run("bulk", version_id, final_prompt="Prompt", execution_time=1.0)
+    runs = [
+        Run(final_prompt=f"Prompt {i}", llm_output="bulk", execution_time=2.0)
+        for i in range(3)
+    ]
+    promptsite.storage.add_runs("bulk", version_id, [run.to_dict() for run in runs])
+
+    stats = promptsite.get_run_stats("bulk", version_id)
+    assert stats.count == 4
+    assert stats.execution_time.max == 2.0
+    assert len(promptsite.runs.where(prompt_id="bulk").all()) == 4
+    assert promptsite.get_last_run("bulk").run_id == runs[-1].run_id
+    assert len(promptsite.search("bulk", prompt_id="bulk")) == 3
+
+
+def test_search(promptsite, storage_path):
+    """Test searching version contents and run outputs."""
+    promptsite.register_prompt("search1", initial_content="Translate to French")
+    promptsite.register_prompt("search2", initial_content="Summarize the text")
+    version_id = promptsite.get_prompt("search1").get_latest_version().version_id
+    promptsite.add_run(
+        "search1", version_id, final_prompt="Translate hello", llm_output="bonjour"
+    )
+
+    # The index is built on the first search
+    results = promptsite.search("bonjour")
+    assert [r["run_id"] for r in results] == [promptsite.get_last_run("search1").run_id]
+    assert "[bonjour]" in results[0]["snippet"]
+    assert (Path(storage_path) / "index" / "search.db").exists()
+
+    # And updated as versions and runs are written
+    promptsite.add_run(
+        "search1", version_id, final_prompt="Translate bye", llm_output="au revoir"
+    )
+    assert len(promptsite.search("translate", prompt_id="search1")) == 2
+    assert promptsite.search("translate", prompt_id="search2") == []
+
+    promptsite.add_prompt_version("search2", "Summarize the text in French")
+    results = promptsite.search("french", scope="versions")
+    assert sorted(r["prompt_id"] for r in results) == ["search1", "search2"]
+
+    promptsite.delete_prompt("search2")
+    assert [r["prompt_id"] for r in promptsite.search("french", scope="versions")] == [
+        "search1"
+    ]
+
+    with pytest.raises(ValueError):
+        promptsite.search("french", scope="prompts")
+
+
+def test_search_index_replaces_runs(tmp_path):
+    """Test that re-indexed runs replace their earlier entry by rowid."""
+    if not fts5_available():
+        pytest.skip("SQLite has no FTS5 support")
+    index = SearchIndex(str(tmp_path / "index" / "search.db"))
+    index.rebuild([], [{"prompt_id": "p", "version_id": "v", "run_id": "r1"}])
+    # Indexes built before run rowids were mapped are mapped when opened
+    with closing(sqlite3.connect(index.path)) as conn, conn:
+        conn.execute("DROP TABLE run_rowids")
+
+    index.add_runs("p", "v", [{"run_id": "r1", "llm_output": "bonjour"}])
+    index.add_run("p", "v", {"run_id": "r2", "llm_output": "bonjour"})
+    assert sorted(r["run_id"] for r in index.search("bonjour")) == ["r1", "r2"]
+    index.add_run("p", "v", {"run_id": "r1", "llm_output": "au revoir"})
+    assert [r["run_id"] for r in index.search("bonjour")] == ["r2"]
+
+    index.delete_prompt("p")
+    index.add_run("p", "v", {"run_id": "r2", "llm_output": "salut"})
+    assert [r["run_id"] for r in index.search("salut")] == ["r2"]
+    assert index.search("bonjour") == []
+
+
+def test_search_without_index(promptsite, mocker):
+    """Test the scanning fallback when SQLite has no FTS5 support."""
+    mocker.patch("promptsite.storage.file.fts5_available", return_value=False)
+    promptsite.register_prompt("scan", initial_content="Translate to French")
+    version_id = promptsite.get_prompt("scan").get_latest_version().version_id
+    promptsite.add_run(
+        "scan", version_id, final_prompt="Translate", llm_output="Bonjour"
+    )
+
+    results = promptsite.search("BONJOUR", prompt_id="scan")
+    assert len(results) == 1
+    assert results[0]["snippet"] == "Bonjour"
+    assert promptsite.search("french", scope="versions")[0]["prompt_id"] == "scan"
@@ -5,6 +5,7 @@ import yaml
 from git import Repo
 
 from promptsite.exceptions import StorageError
+from promptsite.storage.git import GitStorage
 
 
 def test_register_prompt(git_promptsite, storage_path):
@@ -284,3 +285,44 @@ def test_sync_git_error(git_promptsite, mocker):
 
 
 # ... continue with other tests from test_file_storage.py, adding Git verification ...
+
+
+def test_git_storage_positional_remote(storage_path, mocker):
+    """Test that the remote is the second positional argument."""
+    mocker.patch("promptsite.storage.git.GitStorage._ensure_repo")
+    storage = GitStorage(
+        str(storage_path), "https://example.com/repo.git", max_workers=2
+    )
+    assert storage.remote == "https://example.com/repo.git"
+    assert storage.max_workers == 2
+    assert storage.branch == "main"
+    with pytest.raises(TypeError):
+        GitStorage(str(storage_path), None, "main", False, 2)
+
+
+def test_run_caches_not_committed(git_promptsite, storage_path):
+    """Test that the derived run caches are kept out of the repository."""
+    git_promptsite.register_prompt("cached", initial_content="Test content")
+    version_id = git_promptsite.get_prompt("cached").get_latest_version().version_id
+    run = git_promptsite.add_run(
+        "cached", version_id, "Test content", llm_output="output", execution_time=1.0
+    )
+    git_promptsite.add_prompt_version("cached", "New content")
+    git_promptsite.get_run_stats("cached", version_id)
+
+    version_path = f"prompts/cached/versions/{version_id}"
+    repo = Repo(storage_path)
+    files = repo.git.ls_files().splitlines()
+    assert f"{version_path}/runs/{run.run_id}.yaml" in files
+    assert f"{version_path}/version.yaml" in files
+    assert not [f for f in files if f.endswith(("index.jsonl", "stats.yaml", ".tsv"))]
+    assert not repo.is_dirty()
+    assert not [f for f in repo.untracked_files if f.startswith("prompts/")]
+
+    # Caches committed by an earlier version of the storage are untracked
+    stats_path = Path(storage_path) / version_path / "stats.yaml"
+    repo.git.add("--force", f"{version_path}/stats.yaml")
+    repo.index.commit("Track stats")
+    GitStorage(str(storage_path), None)
+    assert f"{version_path}/stats.yaml" not in repo.git.ls_files().splitlines()
+    assert stats_path.exists()
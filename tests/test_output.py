@@ -0,0 +1,115 @@
+import pytest
+from pydantic import BaseModel
+
+from promptsite.decorator import tracker
+from promptsite.exceptions import OutputParseError
+from promptsite.model.variable import ArrayVariable, StringVariable
+from promptsite.output import OutputParser, extract_json
+
+
+class Item(BaseModel):
+    name: str
+    price: float
+
+
+def test_extract_json():
+    """Test extracting the first fenced block of an output."""
+    assert extract_json('Sure:\n```json\n[{"a": 1}]\n```\nDone') == '[{"a": 1}]\n'
+    assert extract_json('{"a": 1}') == '{"a": 1}'
+
+
+def test_parse_validates_output():
+    """Test parsing complete output against the output variable."""
+    parser = OutputParser(ArrayVariable(model=Item, is_output=True))
+    assert parser.parse('```json\n[{"name": "tea", "price": 2}]\n```') == [
+        {"name": "tea", "price": 2}
+    ]
+    with pytest.raises(OutputParseError, match="output schema"):
+        parser.parse('[{"name": "tea"}]')
+    with pytest.raises(OutputParseError, match="not valid JSON"):
+        parser.parse("[{name: tea}]")
+
+
+def test_feed_fails_fast():
+    """Test that streamed output raises on the first invalid item."""
+    parser = OutputParser(ArrayVariable(model=Item, is_output=True))
+    assert parser.feed("```json\n") is None
+    assert parser.feed('[{"name": "tea", "price": 2},') == [{"name": "tea", "price": 2}]
+    with pytest.raises(OutputParseError):
+        parser.feed(' {"name": "cake"}, {"name"')
+
+    parser = OutputParser()
+    assert parser.feed("Here you go: {}") is None
+    with pytest.raises(OutputParseError):
+        parser.close()
+
+    parser = OutputParser(ArrayVariable(model=Item, is_output=True))
+    with pytest.raises(OutputParseError, match=r"1\.price"):
+        parser.feed('[{"name": "tea", "price": 2}, {"name": "cake"},')
+
+    parser = OutputParser(ArrayVariable(model=Item, is_output=True))
+    for chunk in ['[{"name": "tea", ', '"price": 2}', "]"]:
+        parser.feed(chunk)
+    assert parser.close() == [{"name": "tea", "price": 2}]
+
+
+def test_feed_scans_incrementally():
+    """Test that streamed items are parsed once, across chunk boundaries."""
+    parser = OutputParser()
+    chunks = ['{"a": [1, "x,]', "}\\", '\\\\"", 2]', ', "b"', ': {"c": null}}']
+    values = [dict(parser.feed(chunk)) for chunk in chunks]
+    assert values[:4] == [{}, {}, {}, {"a": [1, 'x,]}\\"', 2]}]
+    assert values[-1] == {"a": [1, 'x,]}\\"', 2], "b": {"c": None}}
+    assert parser.close() == values[-1]
+
+    parser = OutputParser()
+    with pytest.raises(OutputParseError, match="not valid JSON"):
+        for chunk in ["[1, ", "2, ", "]"]:
+            parser.feed(chunk)
+
+
+@pytest.mark.parametrize(
+    "output",
+    [
+        'Here you go:\n```json\n[{"name": "tea", "price": 2}]\n```',
+        'Here you go: ```\n[{"name": "tea", "price": 2}]```',
+        '  [{"name": "tea", "price": 2}]',
+    ],
+)
+def test_feed_skips_preamble(output):
+    """Test that streamed output accepts the preambles that parse accepts."""
+    parser = OutputParser(ArrayVariable(model=Item, is_output=True))
+    for chunk in output:
+        parser.feed(chunk)
+    assert parser.close() == parser.parse(output) == [{"name": "tea", "price": 2}]
+
+
+def test_tracker_strict_output(promptsite):
+    """Test that the tracker validates and streams structured output."""
+    variables = {
+        "topic": StringVariable(),
+        "items": ArrayVariable(model=Item, is_output=True),
+    }
+    outputs = []
+
+    @tracker(prompt_id="strict_output", variables=variables, strict_output=True)
+    def mock_llm_call(content=None, llm_config=None, variables=None, **kwargs):
+        return iter(outputs)
+
+    outputs[:] = ['[{"name": "tea", "price": 2}', "]"]
+    result = mock_llm_call(content="{{ topic }} {{ items }}", variables={"topic": "a"})
+    assert result == [{"name": "tea", "price": 2}]
+
+    outputs[:] = [
+        '[{"name": "tea"},',
+        ' {"name": "cake", "price": 3},',
+        ' {"name": "pie", "price": 4}]',
+    ]
+    with pytest.raises(OutputParseError):
+        mock_llm_call(content="{{ topic }} {{ items }}", variables={"topic": "a"})
+
+    runs = promptsite.runs.order_by("created_at").all()
+    assert [run["llm_output"] for run in runs] == [
+        '[{"name": "tea", "price": 2}]',
+        '[{"name": "tea"},',
+    ]
@@ -1,4 +1,11 @@
+from datetime import datetime, timezone
+
 import pytest
+import yaml
+
+from promptsite.exceptions import PromptNotFoundError
+from promptsite.filters import parse_filters, scope_values
+from promptsite.model.run import Run
 
 
 @pytest.fixture
@@ -69,6 +76,8 @@ def test_run_query_all(query_ps):
         "created_at",
         "version_id",
         "llm_config",
+        "validation",
+        "dropped_rows",
         "run_id",
         "run_at",
         "execution_time",
@@ -111,3 +120,249 @@ def test_empty_queries(promptsite):
     assert len(promptsite.prompts.as_df()) == 0
     assert len(promptsite.versions.as_df()) == 0
     assert len(promptsite.runs.as_df()) == 0
+
+
+@pytest.fixture
+def timed_ps(promptsite):
+    """Create a PromptSite instance with runs of known execution times."""
+    promptsite.register_prompt("prompt1", "Test Prompt 1", tags=["fast"])
+    promptsite.register_prompt("prompt2", "Test Prompt 2", tags=["slow"])
+    v1 = promptsite.add_prompt_version("prompt1", "content1")
+    v2 = promptsite.add_prompt_version("prompt2", "content2")
+    for i, execution_time in enumerate([0.5, 3.0, 1.5]):
+        promptsite.add_run(
+            "prompt1", v1.version_id, f"p1 {i}", execution_time=execution_time
+        )
+    promptsite.add_run("prompt2", v2.version_id, "p2", execution_time=2.0)
+    return promptsite
+
+
+def test_run_query_where_operators(timed_ps):
+    """Test filtering runs with operators."""
+    runs = timed_ps.runs.where(execution_time__gt=1.0).all()
+    assert sorted(r["execution_time"] for r in runs) == [1.5, 2.0, 3.0]
+
+    runs = timed_ps.runs.where("prompt1", execution_time__lte=1.5).all()
+    assert sorted(r["execution_time"] for r in runs) == [0.5, 1.5]
+
+    runs = timed_ps.runs.where(created_at__gte=datetime(2000, 1, 1)).all()
+    assert len(runs) == 4
+    assert timed_ps.runs.where(created_at__lt=datetime(2000, 1, 1)).all() == []
+
+
+def test_run_query_where_run_id(timed_ps):
+    """Test filtering runs by run_id."""
+    run = timed_ps.runs.where("prompt2").one()
+    runs = timed_ps.runs.where(run_id=run["run_id"]).all()
+    assert len(runs) == 1
+    assert runs[0]["run_id"] == run["run_id"]
+    assert runs[0]["prompt_id"] == "prompt2"
+
+
+def test_run_query_order_by_limit_offset(timed_ps):
+    """Test ordering and paginating runs."""
+    runs = timed_ps.runs.order_by("-execution_time").limit(2).all()
+    assert [r["execution_time"] for r in runs] == [3.0, 2.0]
+
+    runs = timed_ps.runs.order_by("execution_time").offset(1).limit(2).all()
+    assert [r["execution_time"] for r in runs] == [1.5, 2.0]
+
+
+def test_prompt_query_where_contains(timed_ps):
+    """Test filtering prompts by tags."""
+    prompts = timed_ps.prompts.where(tags__contains="slow").all()
+    assert [p["id"] for p in prompts] == ["prompt2"]
+
+
+def test_version_query_where_version_id(timed_ps):
+    """Test filtering versions by version_id."""
+    version = timed_ps.versions.where("prompt2").one()
+    versions = timed_ps.versions.where(version_id=version["version_id"]).all()
+    assert len(versions) == 1
+    assert versions[0]["prompt_id"] == "prompt2"
+
+
+def test_query_where_missing_prompt(timed_ps):
+    """Test that scoping a query to a missing prompt raises."""
+    with pytest.raises(PromptNotFoundError):
+        timed_ps.prompts.where(prompt_id="missing").all()
+    with pytest.raises(PromptNotFoundError):
+        timed_ps.versions.where("missing").all()
+    with pytest.raises(PromptNotFoundError):
+        timed_ps.runs.where("missing").aggregate()
+
+
+def test_filters_unhashable_and_in_values(timed_ps):
+    """Test filters with list values and normalized `in` values."""
+    (tags_filter,) = parse_filters(tags=["slow"])
+    assert scope_values([tags_filter], "tags") is None
+    assert [p["id"] for p in timed_ps.prompts.where(tags=["slow"]).all()] == ["prompt2"]
+
+    run = timed_ps.runs.where("prompt2").one()
+    runs = timed_ps.runs.where(created_at__in=[str(run["created_at"])]).all()
+    assert [r["run_id"] for r in runs] == [run["run_id"]]
+
+
+def test_query_invalid_operator(timed_ps):
+    """Test filtering with an unsupported operator."""
+    with pytest.raises(ValueError):
+        timed_ps.runs.where(execution_time__between=(1, 2))
+
+
+def test_run_query_iter(timed_ps):
+    """Test iterating over runs lazily."""
+    runs = timed_ps.runs.where("prompt1").iter()
+    first = next(runs)
+    assert first["prompt_id"] == "prompt1"
+    assert len(list(runs)) == 2
+
+
+def test_run_query_iter_batches(timed_ps):
+    """Test iterating over runs in batches."""
+    batches = list(timed_ps.runs.order_by("execution_time").iter_batches(3))
+    assert [len(batch) for batch in batches] == [3, 1]
+    assert [r["execution_time"] for r in batches[0]] == [0.5, 1.5, 2.0]
+
+    with pytest.raises(ValueError):
+        next(timed_ps.runs.iter_batches(0))
+
+
+def test_run_query_iter_early_termination(timed_ps, mocker):
+    """Test that stopping early doesn't read the remaining runs."""
+    read = mocker.spy(timed_ps.storage, "_iter_runs")
+    run = timed_ps.runs.limit(1).one()
+    assert run["run_id"]
+    assert read.call_count == 1
+
+
+def test_run_query_as_arrow(timed_ps):
+    """Test getting runs as a pyarrow Table."""
+    pa = pytest.importorskip("pyarrow")
+
+    table = timed_ps.runs.order_by("execution_time").as_arrow(batch_size=3)
+    assert table.num_rows == 4
+    assert table.schema.field("created_at").type == pa.timestamp("us", tz="UTC")
+    assert table.column("execution_time").to_pylist() == [0.5, 1.5, 2.0, 3.0]
+
+    table = timed_ps.runs.only(["run_id", "execution_time"]).as_arrow()
+    assert table.column_names == ["run_id", "execution_time"]
+
+
+def test_run_query_to_parquet(timed_ps, storage_path):
+    """Test exporting runs to a partitioned Parquet dataset."""
+    pq = pytest.importorskip("pyarrow.parquet")
+
+    output = storage_path / "export"
+    timed_ps.runs.to_parquet(str(output), batch_size=2)
+
+    partitions = sorted(p.name for p in output.iterdir())
+    assert partitions == ["prompt_id=prompt1", "prompt_id=prompt2"]
+    assert all(p.name.startswith("date=") for p in (output / partitions[0]).iterdir())
+
+    table = pq.read_table(str(output))
+    assert table.num_rows == 4
+    assert set(table.column("prompt_id").to_pylist()) == {"prompt1", "prompt2"}
+
+
+def test_prompt_query_as_df_from_columns(timed_ps):
+    """Test that DataFrames built from column batches keep every row."""
+    df = timed_ps.prompts.only(["id", "tags"]).as_df()
+    assert list(df.columns) == ["id", "tags"]
+    assert len(df) == 2
+
+
+def test_run_query_aggregate(timed_ps):
+    """Test computing run statistics per version."""
+    df = timed_ps.runs.aggregate()
+    assert list(df.columns) == [
+        "prompt_id",
+        "version_id",
+        "execution_time_count",
+        "execution_time_mean",
+        "execution_time_p50",
+        "execution_time_p95",
+        "execution_time_p99",
+    ]
+    row = df[df["prompt_id"] == "prompt1"].iloc[0]
+    assert row["execution_time_count"] == 3
+    assert row["execution_time_mean"] == pytest.approx(5.0 / 3)
+    assert row["execution_time_p50"] == pytest.approx(1.5)
+
+    df = timed_ps.runs.where(execution_time__gt=1.0).aggregate(
+        by=["prompt_id"], metrics={"execution_time": ["min", "max", "sum"]}
+    )
+    assert df.set_index("prompt_id").to_dict("index") == {
+        "prompt1": {
+            "execution_time_min": 1.5,
+            "execution_time_max": 3.0,
+            "execution_time_sum": 4.5,
+        },
+        "prompt2": {
+            "execution_time_min": 2.0,
+            "execution_time_max": 2.0,
+            "execution_time_sum": 2.0,
+        },
+    }
+
+    with pytest.raises(ValueError, match="Unsupported metric"):
+        timed_ps.runs.aggregate(metrics={"execution_time": ["median"]})
+
+
+def test_run_query_created_range(timed_ps, storage_path):
+    """Test filtering runs by creation time through the time index."""
+    runs = timed_ps.runs.order_by("created_at").all()
+    middle = datetime.fromisoformat(runs[1]["created_at"])
+
+    after = timed_ps.runs.where(created_after=middle).all()
+    assert sorted(r["run_id"] for r in after) == sorted(r["run_id"] for r in runs[1:])
+    before = timed_ps.runs.where(created_before=middle).all()
+    assert [r["run_id"] for r in before] == [runs[0]["run_id"]]
+
+    # A missing index is rebuilt from the runs
+    index_path = storage_path / "prompts" / "prompt1" / "runs.time.tsv"
+    index_path.unlink()
+    assert len(timed_ps.runs.where("prompt1", created_after=middle).all()) == 2
+    assert index_path.exists()
+
+
+def test_run_query_time_index_checks(timed_ps, storage_path, mocker):
+    """Test that the time index is checked without listing the run files."""
+    storage = timed_ps.storage
+    version_id = timed_ps.runs.where("prompt1").all()[0]["version_id"]
+    timed_ps.runs.where(created_after=datetime(2000, 1, 1)).all()
+
+    list_files = mocker.spy(storage, "_list_files")
+    rebuild = mocker.spy(storage, "_rebuild_time_index")
+    runs = timed_ps.runs.where("prompt1", created_after=datetime(2000, 1, 1)).all()
+    assert len(runs) == 3
+    assert list_files.call_count == 0
+    assert rebuild.call_count == 0
+
+    # Entries appended out of order are still found by their timestamp
+    early = Run(run_id="early", created_at=datetime(2001, 1, 1, tzinfo=timezone.utc))
+    storage.add_run("prompt1", version_id, early.to_dict())
+    runs = timed_ps.runs.where("prompt1", created_before=datetime(2002, 1, 1)).all()
+    assert [r["run_id"] for r in runs] == ["early"]
+    assert rebuild.call_count == 0
+
+    # Run files written by something else invalidate the index
+    runs_path = storage_path / "prompts" / "prompt1" / "versions" / version_id / "runs"
+    copied = Run(run_id="copied", created_at=datetime(2001, 6, 1, tzinfo=timezone.utc))
+    (runs_path / "copied.yaml").write_text(yaml.safe_dump(copied.to_dict()))
+    runs = timed_ps.runs.where("prompt1", created_before=datetime(2002, 1, 1)).all()
+    assert sorted(r["run_id"] for r in runs) == ["copied", "early"]
+    assert rebuild.call_count == 1
+
+
+def test_run_query_last(timed_ps, mocker):
+    """Test that the last runs only read their own run files."""
+    expected = timed_ps.runs.order_by("-created_at").all()[:2]
+
+    read = mocker.spy(timed_ps.storage, "_read_yaml")
+    runs = timed_ps.runs.last(2).all()
+    assert [r["run_id"] for r in runs] == [r["run_id"] for r in expected]
+    assert read.call_count == 2
+
+    assert timed_ps.get_last_run("prompt1").run_id == next(
+        r["run_id"] for r in expected if r["prompt_id"] == "prompt1"
+    )
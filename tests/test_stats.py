@@ -0,0 +1,55 @@
+import random
+
+import pytest
+
+from promptsite.stats import RunningStats, TDigest, quantile_of, validate_metrics
+
+
+def test_tdigest_quantiles():
+    """Test that the sketch estimates quantiles of a large stream."""
+    rng = random.Random(0)
+    values = [rng.expovariate(1.0) for _ in range(20000)]
+    digest = TDigest()
+    for value in values:
+        digest.add(value)
+
+    values.sort()
+    for q in (0.5, 0.95, 0.99):
+        exact = values[int(q * len(values))]
+        assert digest.quantile(q) == pytest.approx(exact, rel=0.05)
+    assert len(digest.centroids()) < 200
+    assert TDigest().quantile(0.5) is None
+
+
+def test_tdigest_merge_and_serialization():
+    """Test merging sketches and restoring them from a dict."""
+    left, right = TDigest(), TDigest()
+    for i in range(1000):
+        (left if i % 2 else right).add(i)
+    left.merge(right)
+    assert left.count == 1000
+    assert left.quantile(0.5) == pytest.approx(500, rel=0.02)
+
+    restored = TDigest.from_dict(left.to_dict())
+    assert restored.quantile(0.9) == left.quantile(0.9)
+
+
+def test_running_stats():
+    """Test the exact counters and metric lookup of running statistics."""
+    stats = RunningStats()
+    for value in [0.5, 3.0, None, 1.5]:
+        stats.add(value)
+    assert stats.value("count") == 3
+    assert stats.value("sum") == 5.0
+    assert stats.value("min") == 0.5
+    assert stats.value("max") == 3.0
+    assert stats.value("p50") == 1.5
+
+    other = RunningStats.from_dict(stats.to_dict())
+    other.merge(stats)
+    assert other.count == 6
+    assert other.mean == pytest.approx(5.0 / 3)
+
+    assert quantile_of("p99.9") == pytest.approx(0.999)
+    with pytest.raises(ValueError):
+        validate_metrics({"execution_time": ["avg"]})
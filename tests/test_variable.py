@@ -0,0 +1,231 @@
+import hashlib
+import json
+
+import pytest
+from pydantic import BaseModel, Field
+
+from promptsite.exceptions import VariableBudgetError, VariableValidationError
+from promptsite.model.variable import (
+    ArrayVariable,
+    Budget,
+    ComplexVariable,
+    NumberVariable,
+    ObjectVariable,
+    StringVariable,
+    ValidationPolicy,
+    Variable,
+)
+from promptsite.model.version import Version
+
+
+class Person(BaseModel):
+    name: str = Field(description="The name of the person")
+    age: int = Field(description="The age of the person")
+
+
+class Address(BaseModel):
+    city: str
+
+
+def test_complex_variable_schema_cache(mocker):
+    """Test that the schema is generated and serialized once per variable."""
+    variable = ArrayVariable(model=Person)
+    generate = mocker.spy(Person, "model_json_schema")
+
+    for _ in range(3):
+        variable.get_prompt_insert([{"name": "John", "age": 30}])
+        variable.to_dict()
+    assert generate.call_count == 1
+
+    expected = json.dumps(Person.model_json_schema(), sort_keys=True)
+    assert variable.schema_json == expected
+    assert variable.schema_hash == hashlib.sha256(expected.encode()).hexdigest()
+
+    # Replacing the model invalidates the cached schema
+    variable.model = Address
+    assert variable.json_schema["title"] == "Address"
+    assert variable.schema_hash != hashlib.sha256(expected.encode()).hexdigest()
+
+
+def test_complex_variable_from_dict_schema():
+    """Test that loaded variables serve the stored schema without codegen."""
+    data = ObjectVariable(model=Person).to_dict()
+    variable = ComplexVariable.from_dict(data)
+
+    assert isinstance(variable, ObjectVariable)
+    assert variable.schema_json == json.dumps(data["model"], sort_keys=True)
+    assert variable._model is None
+
+
+def test_variable_fingerprint():
+    """Test that fingerprints identify the type, schema and output flag."""
+    assert StringVariable().fingerprint == StringVariable().fingerprint
+    assert StringVariable().fingerprint != NumberVariable().fingerprint
+
+    variable = ArrayVariable(model=Person)
+    assert variable.fingerprint == ArrayVariable(model=Person).fingerprint
+    assert variable.fingerprint != ArrayVariable(model=Address).fingerprint
+    assert variable.fingerprint != ObjectVariable(model=Person).fingerprint
+    assert (
+        variable.fingerprint != ArrayVariable(model=Person, is_output=True).fingerprint
+    )
+    assert variable.to_dict()["fingerprint"] == variable.fingerprint
+
+
+def test_compare_variables_by_fingerprint():
+    """Test that stored variables are compared without rebuilding their schema."""
+    data = ArrayVariable(model=Person).to_dict()
+    version = Version(
+        content="{{ people }}", variables={"people": Variable.from_dict(data)}
+    )
+
+    assert version.compare_variables({"people": ArrayVariable(model=Person)})
+    assert not version.compare_variables({"people": ArrayVariable(model=Address)})
+    assert not version.compare_variables({"other": ArrayVariable(model=Person)})
+    assert version.variables["people"]._model is None
+    assert version.variables["people"]._schema_json is None
+
+
+def test_array_variable_validate_adapter():
+    """Test that arrays are validated by one cached adapter."""
+    variable = ArrayVariable(model=Person)
+    people = [{"name": f"Person {i}", "age": i} for i in range(1000)]
+
+    assert variable.validate(people)
+    assert variable.adapter is variable.adapter
+    assert not variable.validate(people + [{"name": "John"}])
+    assert not variable.validate({"name": "John", "age": 30})
+
+    assert variable.validate_json(json.dumps(people).encode())
+    assert not variable.validate_json('[{"name": "John"}]')
+    assert not variable.validate_json("not json")
+
+    variable.model = Address
+    assert variable.validate([{"city": "Paris"}])
+    assert ObjectVariable(model=Address).validate_json('{"city": "Paris"}')
+
+
+def test_validation_policy():
+    """Test parsing validation policies and selecting the validated items."""
+    items = list(range(10))
+    assert ValidationPolicy.parse("full").select(items) == items
+    assert ValidationPolicy.parse("first(3)").select(items) == [0, 1, 2]
+    assert ValidationPolicy.parse("off").select(items) == []
+    sample = ValidationPolicy.sample(4, seed=1).select(items)
+    assert len(sample) == 4 and sample == sorted(sample)
+    assert str(ValidationPolicy.sample(4)) == "sample(4)"
+    with pytest.raises(ValueError):
+        ValidationPolicy.parse("some")
+    with pytest.raises(ValueError):
+        ValidationPolicy.first(0)
+
+    variable = ArrayVariable(model=Person, validation=ValidationPolicy.first(1))
+    rows = [{"name": "John", "age": 30}, {"name": "Jane"}]
+    assert variable.validate(rows)
+    assert not variable.validate(rows, "full")
+    assert not variable.validate_json(json.dumps(rows), "full")
+    assert variable.validate_json(json.dumps(rows))
+    assert ArrayVariable(model=Person, disable_validation=True).validation_policy == (
+        ValidationPolicy.off()
+    )
+
+
+def test_stream_final_prompt():
+    """Test that streamed prompts join to the rendered prompt."""
+    people = [{"name": f"Person {i}", "age": i} for i in range(500)]
+    version = Version(
+        content="People: {{ people }}\nCount: {{ people | length }}\n"
+        "Home: {{ home }}\nTone: {{ tone }}\n{{ answer }}",
+        variables={
+            "people": ArrayVariable(model=Person),
+            "home": ObjectVariable(model=Address),
+            "tone": StringVariable(),
+            "answer": ArrayVariable(model=Person, is_output=True),
+        },
+    )
+    values = {"people": people, "home": {"city": "Paris"}, "tone": "formal"}
+
+    expected = version.build_final_prompt(values)
+    chunks = list(version.stream_final_prompt(values, chunk_size=1024))
+    assert "".join(chunks) == expected
+    assert len(chunks) > 1
+
+    custom = "Schema: {schema}, Data: {dataset}"
+    assert "".join(
+        version.stream_final_prompt(values, custom_instructions=custom)
+    ) == version.build_final_prompt(values, custom_instructions=custom)
+
+    del version.variables["answer"]
+    assert "".join(
+        version.stream_final_prompt(values, no_instructions=True)
+    ) == version.build_final_prompt(values, no_instructions=True)
+
+    with pytest.raises(VariableValidationError):
+        list(version.stream_final_prompt({**values, "people": [{"name": "John"}]}))
+
+    plain = Version(content="Hello {{ name }}")
+    assert "".join(plain.stream_final_prompt({"name": "John"})) == "Hello John"
+
+
+def test_budget_fit():
+    """Test that budgets keep the rows fitting the limits by strategy."""
+    rows = [{"id": i} for i in range(10)]
+    row_bytes = len(json.dumps(rows[0]))
+    max_bytes = 2 + 4 * row_bytes + 3 * 2
+
+    assert Budget(max_bytes=max_bytes).fit(rows) == (rows[:4], 6)
+    assert Budget(max_bytes=max_bytes, strategy="tail").fit(rows) == (rows[6:], 6)
+    kept, dropped = Budget(max_bytes=max_bytes, strategy="head_tail").fit(rows)
+    assert kept == rows[:2] + rows[8:] and dropped == 6
+    sample = Budget(max_bytes=max_bytes, strategy="sample", seed=3).fit(rows)
+    assert sample == Budget(max_bytes=max_bytes, strategy="sample", seed=3).fit(rows)
+    assert len(sample[0]) == 4
+
+    budget = Budget(max_tokens=3, tokenizer=lambda text: text.count("id"))
+    assert budget.fit(rows) == (rows[:3], 7)
+    with pytest.raises(ValueError):
+        Budget()
+
+
+def test_budget_prompt_insert():
+    """Test that inserts and runs are capped by the variable budget."""
+    people = [{"name": f"Person {i}", "age": i} for i in range(100)]
+    variable = ArrayVariable(model=Person, budget=Budget(max_bytes=200))
+    insert = variable.get_prompt_insert(people)
+    dataset = insert.split("The actual dataset is: \n")[1].strip()
+    assert len(dataset.encode()) <= 200
+    assert json.loads(dataset) == people[: len(json.loads(dataset))]
+    assert "".join(variable.iter_prompt_insert(people)) == insert
+
+    version = Version(content="{{ people }}", variables={"people": variable})
+    rendered = version.render({"people": people})
+    assert rendered.prompt == insert
+    assert rendered.dropped_rows == {"people": 100 - len(json.loads(dataset))}
+    assert variable.fingerprint != ArrayVariable(model=Person).fingerprint
+
+    small = ObjectVariable(model=Person, budget=Budget(max_bytes=10))
+    with pytest.raises(VariableBudgetError):
+        small.get_prompt_insert(people[0])
+
+
+def test_budget_round_trip(promptsite):
+    """Test that a budget is stored with its variable and applied once loaded."""
+    people = [{"name": f"Person {i}", "age": i} for i in range(100)]
+    variable = ArrayVariable(
+        model=Person, budget=Budget(max_bytes=60, strategy="tail", seed=3)
+    )
+    promptsite.register_prompt(
+        "budgeted", initial_content="{{ people }}", variables={"people": variable}
+    )
+
+    version = promptsite.get_prompt("budgeted").get_latest_version()
+    loaded = version.variables["people"]
+    assert loaded.budget == Budget(max_bytes=60, strategy="tail", seed=3)
+    assert loaded.fingerprint == variable.fingerprint
+    assert version.compare_variables({"people": variable})
+
+    live = Version(content="{{ people }}", variables={"people": variable})
+    rendered = version.render({"people": people})
+    assert rendered.prompt == live.render({"people": people}).prompt
+    assert rendered.dropped_rows == live.render({"people": people}).dropped_rows
+    assert rendered.dropped_rows["people"] > 0